@@ -1,8 +1,11 @@
 import streamlit as st
-import json
-from core.parser import parse_python_file, parse_python_content
-from core.summarizer import DocstringGenerator, generate_docstring
-from core.diagram_generator import generate_mermaid_diagram, generate_mermaid_diagram_from_code
+import base64
+import io
+import os
+from core.parser import parse_python_content
+from core.diagram_generator import PACKAGE_MAX_NODES, graph_from_code, render_mermaid_parts, write_diagrams
+from core.profiling import maybe_profile
+# Model code (summarizer, backends, cascade, work queue) is imported on first use
 
 # Enhanced CSS for eye-catching UI
 st.markdown("""
@@ -298,6 +301,53 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Optional model pinned for the lifetime of the server process
+PINNED_MODEL = os.environ.get("DOCUMIND_PINNED_MODEL")
+
+
+@st.cache_resource(show_spinner=False)
+def get_generator(model_name: str, keep_alive: str = None):
+    """One generator per model and keep-alive window, shared across reruns and sessions."""
+    from core.summarizer import DocstringGenerator
+    return DocstringGenerator(model=model_name, keep_alive=keep_alive)
+
+
+@st.cache_resource(show_spinner=False)
+def get_work_queue():
+    """Model work shared by every session of this server; interactive requests run ahead of batch jobs."""
+    from core.concurrency import AdaptiveLimiter
+    from core.work_queue import WorkQueue
+    max_workers = int(os.environ.get("DOCUMIND_WORKERS", "8"))
+    return WorkQueue(workers=max_workers, limiter=AdaptiveLimiter(maximum=max_workers))
+
+
+@st.cache_resource(show_spinner=False)
+def get_cascade(fast_model: str, model_name: str, keep_alive: str = None):
+    """Fast model first, the selected model only for docstrings that fail validation."""
+    from core.cascade import ModelCascade
+    return ModelCascade([get_generator(fast_model, keep_alive), get_generator(model_name, keep_alive)])
+
+
+@st.cache_resource(show_spinner=False)
+def get_symbol_index(db_path: str):
+    """One index connection per database, shared across reruns and sessions."""
+    from core.symbol_index import SymbolIndex
+    return SymbolIndex(db_path)
+
+
+@st.cache_resource(show_spinner="🔥 Loading pinned model...")
+def warm_up_pinned_model(model_name: str) -> float:
+    """Load the pinned model once per server process."""
+    from core.backends import PINNED_KEEP_ALIVE
+    return get_generator(model_name, PINNED_KEEP_ALIVE).warm_up()
+
+
+if PINNED_MODEL:
+    try:
+        warm_up_pinned_model(PINNED_MODEL)
+    except RuntimeError as e:
+        st.warning(f"⚠️ Could not load pinned model '{PINNED_MODEL}': {e}")
+
 # Animated Header with gradient
 st.markdown("""
 <div class="main-header">
@@ -318,7 +368,7 @@ with st.sidebar:
     
     page = st.radio(
         "Choose a tool",
-        ["🔍 Parser", "✨ Docstring Generator", "📊 Diagram Generator"],
+        ["🔍 Parser", "✨ Docstring Generator", "📊 Diagram Generator", "🗂️ Project Index"],
         label_visibility="collapsed"
     )
     
@@ -397,7 +447,7 @@ if "Parser" in page:
             st.warning("⚠️ Please upload a file or enter Python code to parse.")
         else:
             try:
-                with st.spinner("🔄 Parsing your code..."):
+                with st.spinner("🔄 Parsing your code..."), maybe_profile("app-parse"):
                     result = parse_python_content(code_input)
                 
                 st.success("✅ Code parsed successfully!")
@@ -628,6 +678,7 @@ if "Parser" in page:
                 
                 # JSON output in expander
                 with st.expander("📋 View Raw JSON Output"):
+                    import json
                     st.code(json.dumps(result, indent=2), language="json")
                     
             except Exception as e:
@@ -638,15 +689,43 @@ if "Parser" in page:
 elif "Docstring Generator" in page:
     st.markdown('<div class="section-header"><h2 style="margin: 0;">✨ Docstring Generator</h2></div>', unsafe_allow_html=True)
     st.markdown("### Generate comprehensive Python docstrings for functions and classes using Ollama (local LLM).")
+    from core.backends import DEFAULT_KEEP_ALIVE, PINNED_KEEP_ALIVE, format_latency_report
     
     # Ollama Model selection
     with st.expander("⚙️ Model Configuration", expanded=False):
+        model_options = ["phi3", "gemma3:4b", "llama3", "codellama", "mistral"]
+        if PINNED_MODEL and PINNED_MODEL not in model_options:
+            model_options.insert(0, PINNED_MODEL)
         model = st.selectbox(
             "Ollama Model:",
-            ["phi3", "gemma3:4b", "llama3", "codellama", "mistral"],
-            index=0,
+            model_options,
+            index=model_options.index(PINNED_MODEL) if PINNED_MODEL else 0,
             help="Select the Ollama model to use. Make sure the model is installed: ollama pull <model_name>"
         )
+        if model == PINNED_MODEL:
+            keep_alive = PINNED_KEEP_ALIVE
+            st.caption("📌 This model is pinned and stays loaded for the lifetime of the server.")
+        else:
+            keep_alive = st.text_input(
+                "Keep model loaded for:",
+                value=DEFAULT_KEEP_ALIVE or "5m",
+                help="Ollama keep-alive window, e.g. 5m, 30m or 1h"
+            ).strip() or None
+        if st.button("🔥 Warm up model"):
+            try:
+                with st.spinner(f"Loading {model}..."):
+                    load_time = get_generator(model, keep_alive).warm_up()
+                st.success(f"✅ {model} loaded in {load_time:.2f}s")
+            except RuntimeError as e:
+                st.error(f"❌ Setup Error: {e}")
+        fast_model = st.selectbox(
+            "⚡ Try a faster model first:",
+            ["Off"] + [option for option in model_options if option != model],
+            index=0,
+            help="Cascade mode: the faster model answers first and the selected model is only used "
+                 "when the docstring fails validation against the code"
+        )
+        fast_model = None if fast_model == "Off" else fast_model
         st.info("💡 Using local Ollama models - no API keys needed! Install Ollama from https://ollama.ai")
     
     # Code type selection
@@ -713,20 +792,31 @@ elif "Docstring Generator" in page:
     with col2:
         generate_button = st.button("✨ Generate Docstring", use_container_width=True, type="primary")
     
-    if generate_button:
+    # After one generation, changing only the style re-renders from the generator's
+    # cache (converted locally) instead of waiting for another model call
+    request_key = (model, fast_model, code_type, code_input, context, "Class" in code_type and include_methods)
+    show_cached = st.session_state.get("docstring_request_key") == request_key
+    
+    if generate_button or show_cached:
         if not code_input.strip():
             st.warning("⚠️ Please enter code to generate a docstring.")
         else:
             try:
-                generator = DocstringGenerator(model=model)
+                from core.cascade import format_acceptance_rates
+                from core.work_queue import INTERACTIVE, estimate_cost
+                generator = get_generator(model, keep_alive)
+                writer = get_cascade(fast_model, model, keep_alive) if fast_model else generator
                 
                 if "Function" in code_type:
-                    with st.spinner("🤖 Generating function docstring with AI..."):
-                        docstring = generator.generate_function_docstring(
+                    with st.spinner("🤖 Generating function docstring with AI..."), maybe_profile("app-docstring"):
+                        docstring = get_work_queue().submit(
+                            writer.generate_function_docstring,
                             code_input,
                             context=context if context else None,
-                            style=style
-                        )
+                            style=style,
+                            priority=INTERACTIVE,
+                            cost=estimate_cost(code_input)
+                        ).result()
                     
                     st.success("✅ Function docstring generated successfully!")
                     st.markdown("---")
@@ -745,13 +835,16 @@ elif "Docstring Generator" in page:
                         st.warning(f"⚠️ Could not format function automatically: {e}")
                 
                 else:  # Class
-                    with st.spinner("🤖 Generating class docstring with AI..."):
-                        result = generator.generate_class_docstring(
+                    with st.spinner("🤖 Generating class docstring with AI..."), maybe_profile("app-docstring"):
+                        result = get_work_queue().submit(
+                            writer.generate_class_docstring,
                             code_input,
                             context=context if context else None,
                             style=style,
-                            include_methods=include_methods
-                        )
+                            include_methods=include_methods,
+                            priority=INTERACTIVE,
+                            cost=estimate_cost(code_input)
+                        ).result()
                     
                     st.success("✅ Class docstring generated successfully!")
                     st.markdown("---")
@@ -786,6 +879,11 @@ elif "Docstring Generator" in page:
                                         st.code(formatted_method, language="python")
                                 except:
                                     pass
+                
+                st.session_state["docstring_request_key"] = request_key
+                st.caption(f"⏱️ {format_latency_report(writer.latency_report())}")
+                if fast_model:
+                    st.caption(f"🪜 {format_acceptance_rates(writer.acceptance_rates())}")
                     
             except RuntimeError as e:
                 st.error(f"❌ Setup Error: {e}")
@@ -857,6 +955,14 @@ elif "Diagram Generator" in page:
             key="diagram_code_input"
         )
     
+    with st.expander("⚙️ Large Diagrams"):
+        focus_class = st.text_input("Focus on class", value="", key="diagram_focus",
+                                    help="Only draw this class and its neighbours")
+        focus_hops = st.number_input("Relationship hops", min_value=1, max_value=5, value=1, key="diagram_hops")
+        max_nodes = st.number_input("Max classes per diagram", min_value=0, max_value=500,
+                                    value=PACKAGE_MAX_NODES, key="diagram_max_nodes",
+                                    help="Larger diagrams are split into linked parts (0 for no limit)")
+    
     # Generate button
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
@@ -888,32 +994,131 @@ elif "Diagram Generator" in page:
             st.warning("⚠️ Please upload a file or enter Python code to generate a diagram.")
         else:
             try:
-                with st.spinner("📊 Generating class diagram..."):
+                with st.spinner("📊 Generating class diagram..."), maybe_profile("app-diagram"):
                     # Generate diagram directly from code (no temp file needed)
-                    diagram = generate_mermaid_diagram_from_code(code_to_process)
+                    graph = graph_from_code(code_to_process)
+                    diagrams = render_mermaid_parts(graph, focus=focus_class.strip() or None,
+                                                    hops=int(focus_hops), max_nodes=int(max_nodes))
+                    
+                    # Lay out and draw server-side; repeat requests for the same graph hit the SVG cache
+                    svg_stream = io.StringIO()
+                    write_diagrams(graph, svg_stream, "svg", focus=focus_class.strip() or None, hops=int(focus_hops))
+                    svg_image = svg_stream.getvalue()
                 
                 st.success("✅ Diagram generated successfully!")
                 st.markdown("---")
                 
-                # Display diagram
-                st.markdown("### 📊 Mermaid Class Diagram")
-                st.code(diagram, language="text")
+                # Rendered image: no need to paste the code into an external editor
+                st.markdown("### 🖼️ Class Diagram")
+                svg_data = base64.b64encode(svg_image.encode("utf-8")).decode("ascii")
+                st.markdown(
+                    f'<div style="overflow: auto; max-height: 800px; background: #fff; border-radius: 8px;">'
+                    f'<img src="data:image/svg+xml;base64,{svg_data}" alt="Class diagram"/></div>',
+                    unsafe_allow_html=True
+                )
+                st.download_button("⬇️ Download SVG", svg_image, file_name="class_diagram.svg",
+                                   mime="image/svg+xml", key="diagram_svg_download")
+                st.markdown("---")
+                
+                for part, diagram in enumerate(diagrams, 1):
+                    # Display diagram
+                    if len(diagrams) > 1:
+                        st.markdown(f"### 📊 Mermaid Class Diagram (Part {part} of {len(diagrams)})")
+                    else:
+                        st.markdown("### 📊 Mermaid Class Diagram")
+                    st.code(diagram, language="text")
                 
                 # Copy button info
-                st.info("💡 **Tip:** Copy the diagram code above and paste it into:\n- GitHub markdown files (with ```mermaid code block)\n- [Mermaid Live Editor](https://mermaid.live)\n- Documentation tools that support Mermaid")
+                st.info("💡 **Tip:** Copy the diagram code above and paste it into:\n- GitHub markdown files (with ```mermaid code block)\n- Documentation tools that support Mermaid")
                 
                 # Display in markdown format for easy copying
                 st.markdown("---")
                 st.markdown("### 📋 Copy This (Markdown Format)")
-                markdown_diagram = f"```mermaid\n{diagram}\n```"
+                markdown_diagram = "\n\n".join(f"```mermaid\n{diagram}\n```" for diagram in diagrams)
                 st.code(markdown_diagram, language="markdown")
                         
             except SyntaxError as e:
                 st.error(f"❌ Syntax error in code: {e}")
+            except ValueError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ Error generating diagram: {e}")
                 st.exception(e)
 
+# Project Index Page
+elif "Project Index" in page:
+    from core.symbol_index import default_index_path
+    
+    st.markdown('<div class="section-header"><h2 style="margin: 0;">🗂️ Project Index</h2></div>', unsafe_allow_html=True)
+    st.markdown("### Index a project once, then search its symbols and diagram it without reparsing unchanged files.")
+    
+    project_dir = st.text_input("Project directory:", value=os.environ.get("DOCUMIND_PROJECT", "."), key="index_project")
+    
+    if not os.path.isdir(project_dir):
+        st.warning(f"⚠️ Directory '{project_dir}' not found.")
+    else:
+        # The index lives outside the project and is only created when asked for
+        db_path = os.environ.get("DOCUMIND_INDEX") or default_index_path(project_dir)
+        update = st.button("🔄 Update Index", type="primary", key="index_update")
+        if not update and not os.path.exists(db_path):
+            st.info("ℹ️ This project has no index yet. Click **Update Index** to build it "
+                    f"(stored in `{db_path}`, outside the project).")
+        else:
+            index = get_symbol_index(db_path)
+            if update:
+                with st.spinner("🗂️ Indexing project..."):
+                    changes = index.update_project(project_dir)
+                st.success(f"✅ {changes['scanned']} file(s) scanned: {changes['reparsed']} reparsed, "
+                           f"{changes['unchanged']} unchanged, {changes['removed']} removed")
+            
+            summary = index.summary()
+            columns = st.columns(4)
+            columns[0].metric("Files", summary["files"])
+            for column, kind in zip(columns[1:], ("class", "function", "method")):
+                counts = summary["kinds"].get(kind, {"total": 0, "documented": 0})
+                column.metric(f"{kind.title()}es" if kind == "class" else f"{kind.title()}s", counts["total"],
+                              f"{counts['documented']} documented", delta_color="off")
+        
+            st.markdown("---")
+            st.markdown("### 🔎 Find Symbols")
+            col1, col2, col3 = st.columns([3, 1, 1])
+            with col1:
+                query = st.text_input("Name (* and ? wildcards):", value="*", key="index_query")
+            with col2:
+                kind = st.selectbox("Kind", ["all", "class", "function", "method"], key="index_kind")
+            with col3:
+                undocumented_only = st.checkbox("Undocumented only", key="index_undocumented")
+        
+            results = index.find(query or "*", kind=None if kind == "all" else kind, limit=500)
+            if undocumented_only:
+                results = [symbol for symbol in results if not symbol["docstring"]]
+            st.caption(f"{len(results)} symbol(s)")
+            if results:
+                st.dataframe(
+                    [{"module": symbol["module"], "symbol": symbol["qualname"], "kind": symbol["kind"],
+                      "signature": symbol["signature"], "lines": f"{symbol['start_line']}-{symbol['end_line']}",
+                      "documented": bool(symbol["docstring"])} for symbol in results],
+                    use_container_width=True, hide_index=True
+                )
+        
+            st.markdown("---")
+            st.markdown("### 📊 Project Class Diagram")
+            focus_class = st.text_input("Focus on class (blank for all):", value="", key="index_focus")
+            if st.button("📊 Draw Diagram", key="index_diagram"):
+                try:
+                    with st.spinner("📊 Drawing class diagram..."):
+                        svg_stream = io.StringIO()
+                        write_diagrams(index.class_graph(project_dir), svg_stream, "svg",
+                                       focus=focus_class.strip() or None, hops=2, namespaces=True)
+                    svg_data = base64.b64encode(svg_stream.getvalue().encode("utf-8")).decode("ascii")
+                    st.markdown(
+                        f'<div style="overflow: auto; max-height: 800px; background: #fff; border-radius: 8px;">'
+                        f'<img src="data:image/svg+xml;base64,{svg_data}" alt="Project class diagram"/></div>',
+                        unsafe_allow_html=True
+                    )
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+
 # Simple Footer matching color theme
 st.markdown("---")
 st.markdown(
@@ -0,0 +1,137 @@
+"""
+Import-time budget check.
+
+Measures the import time of the parse-only and diagram-only entry points with
+`python -X importtime` on top of the standard-library modules they need, which are
+imported first as a baseline (`import ast` alone takes most of the total), and
+verifies that they never pull in model code. Exits non-zero when the median of
+several fresh interpreters exceeds a budget or a forbidden module is imported, so
+it can run in CI or a pre-commit hook.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --scale 2.0
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = str(Path(__file__).parent.parent)
+
+# Model-related modules that parse-only and diagram-only paths must not import
+MODEL_MODULES = ("core.summarizer", "core.backends", "core.cascade", "core.work_queue", "core.callgraph")
+
+# module -> (import budget in milliseconds on top of its stdlib baseline, modules it must not import)
+TARGETS = {
+    "core.parser": (10.0, MODEL_MODULES + ("core.diagram_generator",)),
+    "core.diagram_generator": (12.0, MODEL_MODULES + ("core.parser",)),
+}
+
+
+def _python(code: str, *flags, write_bytecode: bool = False) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    if write_bytecode:
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, cwd=ROOT, env=env)
+
+
+def stdlib_baseline(module: str) -> list:
+    """Modules outside the project that importing module loads into a bare interpreter."""
+    loaded = imported_modules(module) - imported_modules("sys")
+    return sorted(name for name in loaded if name.split(".")[0] != module.split(".")[0])
+
+
+def import_time_ms(module: str, baseline: list) -> tuple:
+    """
+    Import times in one fresh interpreter, from -X importtime.
+
+    Returns:
+        (ms to import the baseline modules, ms to import module once they are loaded)
+    """
+    result = _python(f"import {', '.join(baseline + [module])}", "-X", "importtime")
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    stdlib_ms, module_ms = 0.0, None
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        # Only top-level entries (one leading space): nested imports are already in their parent
+        if parts[2].startswith("  "):
+            continue
+        if name == module:
+            module_ms = int(parts[1]) / 1000.0
+        elif name in baseline:
+            stdlib_ms += int(parts[1]) / 1000.0
+    if module_ms is None:
+        raise RuntimeError(f"No importtime entry for {module}")
+    return stdlib_ms, module_ms
+
+
+def imported_modules(module: str) -> set:
+    """Every module loaded by importing module."""
+    result = _python(f"import sys, {module}; print('\\n'.join(sys.modules))")
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return set(result.stdout.split())
+
+
+def startup_ms(module: str) -> float:
+    """Wall-clock interpreter start plus import, as a CLI invocation would see it."""
+    start = time.perf_counter()
+    _python(f"import {module}")
+    return (time.perf_counter() - start) * 1000.0
+
+
+def report(line: str):
+    """Print one line; if the reader went away (piped into `head`), keep checking silently."""
+    try:
+        print(line, flush=True)
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(prog="python benchmarks/import_time.py", description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--runs", type=int, default=7,
+                            help="Fresh interpreters per module; budgets apply to the median (default: 7)")
+    arg_parser.add_argument("--scale", type=float, default=1.0,
+                            help="Multiply every budget, e.g. for slow CI machines (default: 1.0)")
+    args = arg_parser.parse_args()
+
+    # Warm the bytecode cache so the first run does not pay for compilation
+    for module in TARGETS:
+        _python(f"import {module}", write_bytecode=True)
+    baseline = min(startup_ms("sys") for _ in range(args.runs))
+
+    failures = []
+    for module, (budget, forbidden) in TARGETS.items():
+        budget *= args.scale
+        stdlib = stdlib_baseline(module)
+        stdlib_runs, module_runs = zip(*(import_time_ms(module, stdlib) for _ in range(args.runs)))
+        own, stdlib_ms = statistics.median(module_runs), statistics.median(stdlib_runs)
+        wall = statistics.median(startup_ms(module) for _ in range(args.runs))
+        leaked = sorted(name for name in forbidden if name in imported_modules(module))
+        status = "✅" if own <= budget and not leaked else "❌"
+        report(f"{status} {module:<24} import {own:7.1f} ms + stdlib {stdlib_ms:5.1f} ms (budget {budget:.0f} ms)  "
+              f"CLI start {wall:7.1f} ms (bare interpreter {baseline:.1f} ms)")
+        if own > budget:
+            failures.append(f"{module} imports in a median {own:.1f} ms beyond the stdlib, "
+                            f"over its {budget:.0f} ms budget")
+        if leaked:
+            failures.append(f"{module} imports model code: {', '.join(leaked)}")
+
+    if failures:
+        report("\n".join(f"  - {failure}" for failure in failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
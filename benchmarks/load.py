@@ -0,0 +1,252 @@
+"""
+End-to-end load test simulating concurrent app users.
+
+Each session loops like a user of app.py: pick an operation from the workload mix
+(parse, function/class docstring, diagram), run it the way the app does, then
+pause for an exponentially distributed think time. Docstring requests go through
+one shared DocstringGenerator and adaptive WorkQueue, as the app's cached resources
+do, against a replay backend with synthetic latency and a fixed number of model
+slots standing in for Ollama.
+
+Usage:
+    python benchmarks/load.py --sessions 1,4,16,32 --duration 30 --latency 0.5 --model-slots 2
+    python benchmarks/load.py --fixture fixtures/run.json --mix function_docstring=1 --output load.json
+"""
+
+import argparse
+import io
+import json
+import math
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.backends import ReplayBackend
+from core.concurrency import AdaptiveLimiter
+from core.diagram_generator import PACKAGE_MAX_NODES, graph_from_code, render_mermaid_parts, write_diagrams
+from core.parser import parse_python_content
+from core.summarizer import DocstringGenerator
+from core.work_queue import INTERACTIVE, WorkQueue, estimate_cost
+
+
+OPERATIONS = ("parse", "function_docstring", "class_docstring", "diagram")
+
+DEFAULT_MIX = "parse=2,function_docstring=4,class_docstring=1,diagram=2"
+
+FAKE_DOCSTRING = """Process the given items.
+
+Args:
+    items (list): Input values.
+
+Returns:
+    list: Processed values."""
+
+_FUNCTION = '''def process_{n}(items, factor={n}):
+    result = []
+    for item in items:
+        if item is not None:
+            result.append(item * factor)
+    return result
+'''
+
+_CLASS = '''class Store{n}:
+    def __init__(self, name):
+        self.name = name
+        self.items = {{}}
+
+    def add(self, key, value={n}):
+        self.items[key] = value
+        return len(self.items)
+
+    def get(self, key):
+        return self.items.get(key)
+'''
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def parse_mix(text: str) -> dict:
+    """Parse "op=weight,..." into a weight dict."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name.strip()}'; choose from {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Session(threading.Thread):
+    """One simulated user issuing operations until the deadline."""
+
+    def __init__(self, index: int, harness, deadline: float):
+        super().__init__(name=f"load-session-{index}", daemon=True)
+        self.harness = harness
+        self.deadline = deadline
+        self.random = random.Random(harness.seed * 1000 + index)
+        self.samples = []
+
+    def snippet(self, template: str) -> str:
+        # Users often paste the same samples; repeats exercise the generator cache
+        if self.random.random() < self.harness.repeat_ratio:
+            n = self.random.randrange(10)
+        else:
+            n = self.random.randrange(10, 10 ** 9)
+        return template.format(n=n)
+
+    def run(self):
+        ops, weights = zip(*self.harness.mix.items())
+        while time.perf_counter() < self.deadline:
+            op = self.random.choices(ops, weights)[0]
+            start = time.perf_counter()
+            error = None
+            try:
+                self.harness.run_operation(op, self)
+            except Exception as e:
+                error = str(e)
+            self.samples.append((op, time.perf_counter() - start, error))
+            if self.harness.think_time:
+                time.sleep(min(self.random.expovariate(1.0 / self.harness.think_time),
+                               max(0.0, self.deadline - time.perf_counter())))
+
+
+class LoadHarness:
+    """Shared server-side state for one load level: generator, work queue and workload settings."""
+
+    def __init__(self, mix: dict, fixture: str = "", latency: float = 0.5, jitter: float = 0.2,
+                 model_slots: int = 2, workers: int = 8, think_time: float = 1.0,
+                 repeat_ratio: float = 0.2, style: str = "google", seed: int = 0):
+        self.mix = mix
+        self.think_time = think_time
+        self.repeat_ratio = repeat_ratio
+        self.style = style
+        self.seed = seed
+        backend = ReplayBackend(fixture, model="load-test", latency=latency, jitter=jitter,
+                                fallback=FAKE_DOCSTRING, seed=seed, slots=model_slots)
+        self.generator = DocstringGenerator(model="load-test", backend=backend)
+        self.work_queue = WorkQueue(workers=workers, limiter=AdaptiveLimiter(maximum=workers))
+
+    def run_operation(self, op: str, session: Session):
+        """Run one app operation; docstrings go through the shared queue as interactive work."""
+        if op == "parse":
+            parse_python_content(session.snippet(_FUNCTION) + "\n\n" + session.snippet(_CLASS))
+        elif op == "diagram":
+            # Same path as the app's Class Diagram page: Mermaid parts plus the server-side SVG
+            graph = graph_from_code(session.snippet(_CLASS))
+            render_mermaid_parts(graph, max_nodes=PACKAGE_MAX_NODES)
+            write_diagrams(graph, io.StringIO(), "svg")
+        elif op == "function_docstring":
+            code = session.snippet(_FUNCTION)
+            self.work_queue.submit(self.generator.generate_function_docstring, code, style=self.style,
+                                   priority=INTERACTIVE, cost=estimate_cost(code)).result()
+        elif op == "class_docstring":
+            code = session.snippet(_CLASS)
+            self.work_queue.submit(self.generator.generate_class_docstring, code, style=self.style,
+                                   priority=INTERACTIVE, cost=estimate_cost(code)).result()
+        else:
+            raise ValueError(f"Unknown operation: {op}")
+
+    def run(self, sessions: int, duration: float) -> dict:
+        """Drive `sessions` concurrent users for `duration` seconds and summarize the samples."""
+        started = time.perf_counter()
+        deadline = started + duration
+        threads = [Session(i, self, deadline) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        self.work_queue.shutdown()
+
+        samples = [sample for thread in threads for sample in thread.samples]
+        operations = {}
+        for op in sorted({op for op, _, _ in samples}):
+            latencies = [seconds for name, seconds, error in samples if name == op and error is None]
+            errors = sum(1 for name, _, error in samples if name == op and error is not None)
+            operations[op] = {
+                "requests": len(latencies) + errors,
+                "errors": errors,
+                "throughput_per_second": len(latencies) / elapsed,
+                "p50_seconds": percentile(latencies, 50),
+                "p95_seconds": percentile(latencies, 95),
+                "p99_seconds": percentile(latencies, 99),
+            }
+        completed = sum(1 for _, _, error in samples if error is None)
+        return {
+            "sessions": sessions,
+            "elapsed_seconds": elapsed,
+            "requests": len(samples),
+            "throughput_per_second": completed / elapsed,
+            "operations": operations,
+            "queue": self.work_queue.stats(),
+        }
+
+
+def format_level(result: dict) -> str:
+    """Render one load level as a small table."""
+    lines = [f"👥 {result['sessions']} session(s): {result['requests']} request(s), "
+             f"{result['throughput_per_second']:.1f} req/s, "
+             f"concurrency limit {result['queue']['concurrency_limit']}"]
+    for op, stats in result["operations"].items():
+        p50, p95, p99 = (stats[key] * 1000 if stats[key] is not None else float("nan")
+                         for key in ("p50_seconds", "p95_seconds", "p99_seconds"))
+        lines.append(f"  {op:<20} {stats['throughput_per_second']:7.2f}/s  p50 {p50:8.1f} ms  "
+                     f"p95 {p95:8.1f} ms  p99 {p99:8.1f} ms  errors {stats['errors']}")
+    return "\n".join(lines)
+
+
+def _parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python benchmarks/load.py", description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--sessions", default="1,4,16",
+                            help="Concurrent sessions; a comma-separated list runs one level after another")
+    arg_parser.add_argument("--duration", type=float, default=20.0, help="Seconds per load level (default: 20)")
+    arg_parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default: {DEFAULT_MIX})")
+    arg_parser.add_argument("--think-time", type=float, default=1.0,
+                            help="Mean pause between a session's requests in seconds (default: 1.0)")
+    arg_parser.add_argument("--repeat-ratio", type=float, default=0.2,
+                            help="Share of requests reusing a common snippet (default: 0.2)")
+    arg_parser.add_argument("--fixture", default="", help="Recorded model fixture to replay (default: none)")
+    arg_parser.add_argument("--latency", type=float, default=0.5,
+                            help="Synthetic model latency per call in seconds (default: 0.5)")
+    arg_parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter fraction (default: 0.2)")
+    arg_parser.add_argument("--model-slots", type=int, default=2,
+                            help="Requests the fake model server handles in parallel (default: 2)")
+    arg_parser.add_argument("--workers", type=int, default=8, help="Work queue upper bound (default: 8)")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    return arg_parser.parse_args(argv)
+
+
+def main():
+    args = _parse_args()
+    mix = parse_mix(args.mix)
+    levels = [int(level) for level in args.sessions.split(",") if level.strip()]
+    results = []
+    for sessions in levels:
+        harness = LoadHarness(mix, fixture=args.fixture, latency=args.latency, jitter=args.jitter,
+                              model_slots=args.model_slots, workers=args.workers, think_time=args.think_time,
+                              repeat_ratio=args.repeat_ratio, seed=args.seed)
+        result = harness.run(sessions, args.duration)
+        results.append(result)
+        print(format_level(result), flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "levels": results}, f, indent=2, sort_keys=True)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
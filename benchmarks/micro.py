@@ -0,0 +1,296 @@
+"""
+Micro-benchmarks for the parser, cleaner and diagram hot paths.
+
+Runs each operation over synthetic Python sources from 1 KB to 50 MB and stores
+the timings as JSON. With --compare, timings are checked against a saved baseline
+and any operation slower by more than --threshold is reported as a regression.
+The suite runs --rounds times and each benchmark keeps its fastest run: the
+minimum is far less sensitive to scheduler and frequency noise than one median.
+
+Usage:
+    python benchmarks/micro.py --output baseline.json
+    python benchmarks/micro.py --compare baseline.json --output after.json
+    python benchmarks/micro.py --max-size 1MB --ops extract_top_level_items,_clean_code
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.backends import ReplayBackend
+from core.diagram_generator import _normalize_indentation, generate_mermaid_diagram_from_code
+from core.parser import ASTParser, extract_top_level_items
+from core.summarizer import DocstringGenerator
+
+
+# Slowdowns smaller than this (seconds) are timer noise, whatever their ratio
+MIN_REGRESSION_SECONDS = 0.0001
+
+SIZES = {"1KB": 1 << 10, "10KB": 10 << 10, "100KB": 100 << 10, "1MB": 1 << 20, "10MB": 10 << 20, "50MB": 50 << 20}
+
+_TEMPLATE = '''
+
+class Record{n}(Base{n}):
+    """A record with a few fields."""
+
+    limit = {n}
+
+    def __init__(self, name, value=None):
+        self.name = name
+        self.value = value or []
+
+    def update(self, key, amount: int = 1):
+        """Add amount to key."""
+        if key not in self.value:
+            raise KeyError(key)
+        return self.value[key] + amount
+
+    def _private(self):
+        return [item for item in self.value if item]
+
+
+def process_{n}(items, factor=2):
+    """
+    Scale every item.
+
+    Args:
+        items (list): Input values.
+        factor (int): Multiplier.
+
+    Returns:
+        list: Scaled values.
+    """
+    result = []
+    for item in items:
+        result.append(item * factor)
+    return result
+'''
+
+_RESPONSE_TEMPLATE = '''Here's the docstring:
+
+```python
+"""
+Scale every item in block {n}.
+
+Args:
+    items (list): Input values.
+
+Returns:
+    list: Scaled values.
+"""
+```
+def process_{n}(items):
+    return items
+'''
+
+
+def synthetic_source(size: int, template: str = _TEMPLATE) -> str:
+    """Repeat a template with numbered names until the text reaches about `size` bytes."""
+    blocks, total, n = [], 0, 0
+    while total < size:
+        block = template.replace("{n}", str(n))
+        blocks.append(block)
+        total += len(block)
+        n += 1
+    return "".join(blocks)
+
+
+def _indented(source: str) -> str:
+    return "\n".join("        " + line if line.strip() else line for line in source.split("\n"))
+
+
+def _cleaner():
+    """A generator whose backend never calls a model, for the pure text-cleaning methods."""
+    return DocstringGenerator(model="benchmark", backend=ReplayBackend("", model="benchmark", fallback=""))
+
+
+def operations(workdir: str) -> dict:
+    """Benchmarked operations: name -> (prepare(size) -> input, run(input))."""
+    cleaner = _cleaner()
+
+    def source_file(size):
+        path = os.path.join(workdir, f"source_{size}.py")
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(synthetic_source(size))
+        return path
+
+    def extract_items(path):
+        # Items slice their code from the mapped file lazily; read it so the timing covers the full extraction
+        return [item["code"] for item in extract_top_level_items(path)]
+
+    return {
+        "extract_top_level_items": (source_file, extract_items),
+        "ASTParser.parse_content": (synthetic_source, ASTParser().parse_content),
+        "_clean_code": (synthetic_source, cleaner._clean_code),
+        "_clean_response": (lambda size: synthetic_source(size, _RESPONSE_TEMPLATE), cleaner._clean_response),
+        "_normalize_indentation": (lambda size: _indented(synthetic_source(size)), _normalize_indentation),
+        "generate_mermaid_diagram_from_code": (synthetic_source, generate_mermaid_diagram_from_code),
+    }
+
+
+def measure(run, data, min_time: float = 0.2, max_runs: int = 20, min_runs: int = 3, budget: float = 60.0) -> list:
+    """Time run(data) at least min_runs times (fewer once budget seconds are spent) and until min_time has passed."""
+    timings = []
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if timings and not (len(timings) < min_runs and elapsed < budget) \
+                and not (elapsed < min_time and len(timings) < max_runs):
+            break
+        t0 = time.perf_counter()
+        run(data)
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def run_benchmarks(op_names: list, size_names: list, min_time: float = 0.2, budget: float = 60.0,
+                   rounds: int = 3) -> dict:
+    """
+    Run the selected operations at the selected sizes and return the results document.
+
+    The whole selection runs `rounds` times, so slow spells of the machine hit every
+    round differently; each benchmark keeps its fastest run and the median of its
+    round medians. Once one size of an operation takes longer than `budget` seconds,
+    its larger sizes are recorded as skipped instead of being run.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="documind-bench-") as workdir:
+        ops = operations(workdir)
+        for round_number in range(rounds):
+            if rounds > 1:
+                print(f"🔁 Round {round_number + 1}/{rounds}", flush=True)
+            _run_round(ops, op_names, size_names, min_time, budget, results)
+    for result in results.values():
+        if not result.get("skipped"):
+            medians = result.pop("round_medians")
+            result["median_seconds"] = statistics.median(medians)
+            result["mb_per_second"] = result["bytes"] / (1 << 20) / result["min_seconds"] \
+                if result["min_seconds"] else None
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def _run_round(ops: dict, op_names: list, size_names: list, min_time: float, budget: float, results: dict):
+    """One pass over the selection, folding its timings into results."""
+    for op_name in op_names:
+        prepare, run = ops[op_name]
+        over_budget = False
+        for size_name in size_names:
+            size = SIZES[size_name]
+            key = f"{op_name}@{size_name}"
+            if over_budget or results.get(key, {}).get("skipped"):
+                # Sizes over budget in an earlier round stay skipped
+                results.setdefault(key, {"operation": op_name, "size": size_name, "bytes": size, "skipped": True})
+                over_budget = True
+                print(f"  {op_name:<38} {size_name:>6}  skipped (over {budget:.0f}s budget)", flush=True)
+                continue
+            data = prepare(size)
+            timings = measure(run, data, min_time, budget=budget)
+            median = statistics.median(timings)
+            result = results.setdefault(key, {
+                "operation": op_name,
+                "size": size_name,
+                "bytes": size,
+                "runs": 0,
+                "min_seconds": min(timings),
+                "round_medians": [],
+            })
+            result["runs"] += len(timings)
+            result["min_seconds"] = min(result["min_seconds"], min(timings))
+            result["round_medians"].append(median)
+            print(f"  {op_name:<38} {size_name:>6}  min {min(timings) * 1000:10.2f} ms  "
+                  f"median {median * 1000:10.2f} ms  ({len(timings)} run(s))", flush=True)
+            over_budget = median > budget
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25) -> list:
+    """
+    Return regressions: benchmarks whose fastest run grew by more than threshold over the baseline.
+
+    Baselines written before min_seconds was recorded are compared by their median.
+    Slowdowns below MIN_REGRESSION_SECONDS are ignored.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if result.get("skipped") or not before or before.get("skipped"):
+            continue
+        field = "min_seconds" if before.get("min_seconds") else "median_seconds"
+        if not before.get(field):
+            continue
+        ratio = result[field] / before[field]
+        if ratio > 1.0 + threshold and result[field] - before[field] > MIN_REGRESSION_SECONDS:
+            regressions.append({"benchmark": key, "baseline_seconds": before[field],
+                                "current_seconds": result[field], "ratio": ratio})
+    return regressions
+
+
+def _parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python benchmarks/micro.py", description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--ops", help="Comma-separated operations (default: all)")
+    arg_parser.add_argument("--max-size", default="50MB", choices=list(SIZES),
+                            help="Largest synthetic source to benchmark (default: 50MB)")
+    arg_parser.add_argument("--min-time", type=float, default=0.2,
+                            help="Minimum seconds to spend repeating each measurement (default: 0.2)")
+    arg_parser.add_argument("--budget", type=float, default=60.0,
+                            help="Skip larger sizes of an operation once one run exceeds this many seconds (default: 60)")
+    arg_parser.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    arg_parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against a saved results file")
+    arg_parser.add_argument("--rounds", type=int, default=3,
+                            help="Run the whole selection this many times and keep each benchmark's fastest run (default: 3)")
+    arg_parser.add_argument("--threshold", type=float, default=0.25,
+                            help="Allowed slowdown of the fastest run before it counts as a regression (default: 0.25)")
+    return arg_parser.parse_args(argv)
+
+
+def main():
+    args = _parse_args()
+    all_ops = list(operations(tempfile.gettempdir()))
+    op_names = [name.strip() for name in args.ops.split(",")] if args.ops else all_ops
+    unknown = [name for name in op_names if name not in all_ops]
+    if unknown:
+        print(f"❌ Unknown operation(s): {', '.join(unknown)}. Available: {', '.join(all_ops)}")
+        sys.exit(2)
+    size_names = list(SIZES)[:list(SIZES).index(args.max_size) + 1]
+
+    print(f"⏱️  Running {len(op_names)} operation(s) at {', '.join(size_names)}")
+    current = run_benchmarks(op_names, size_names, args.min_time, args.budget, max(1, args.rounds))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for reg in regressions:
+                print(f"  {reg['benchmark']}: {reg['baseline_seconds'] * 1000:.2f} ms -> "
+                      f"{reg['current_seconds'] * 1000:.2f} ms ({reg['ratio']:.2f}x)")
+            sys.exit(1)
+        print(f"✅ No regressions over {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
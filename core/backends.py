@@ -0,0 +1,495 @@
+"""
+Model backends for the docstring generator.
+Wraps the local Ollama CLI and tracks cold-start vs. warm latency. Recording and
+replay backends capture prompt/response pairs to a fixture so the pipeline can be
+benchmarked and tested without a model.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core import metrics
+from core.concurrency import note_model_call
+
+
+# Keep-alive window passed to `ollama run --keepalive` (e.g. "5m", "1h").
+# None leaves Ollama's own default (5 minutes) in place.
+DEFAULT_KEEP_ALIVE = os.environ.get("DOCUMIND_KEEP_ALIVE") or None
+
+# A negative duration keeps the model resident until Ollama is stopped.
+PINNED_KEEP_ALIVE = "-1s"
+
+WARM_UP_PROMPT = "Reply with OK."
+
+# Comma-separated Ollama endpoints (host:port) to load-balance across
+DEFAULT_HOSTS = [host.strip() for host in os.environ.get("DOCUMIND_OLLAMA_HOSTS", "").split(",") if host.strip()]
+
+# Fixture files: record every model call to DOCUMIND_RECORD, or serve calls from DOCUMIND_REPLAY
+RECORD_PATH = os.environ.get("DOCUMIND_RECORD") or None
+REPLAY_PATH = os.environ.get("DOCUMIND_REPLAY") or None
+
+
+_STAT_LINE = re.compile(r"^\s*(total duration|load duration|prompt eval count|prompt eval duration|"
+                        r"eval count|eval duration):\s*(\S+)", re.MULTILINE)
+_GO_DURATION = re.compile(r"(\d+(?:\.\d+)?)(h|ms|m|s|µs|us|ns)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 1e-3, "µs": 1e-6, "us": 1e-6, "ns": 1e-9}
+
+
+def parse_ollama_stats(text: str) -> dict:
+    """
+    Parse the timing block `ollama run --verbose` prints to stderr.
+
+    Returns:
+        Dict with any of total/load/prompt_eval/eval seconds and prompt_tokens/eval_tokens.
+    """
+    stats = {}
+    for label, value in _STAT_LINE.findall(text or ""):
+        key = label.replace(" ", "_")
+        if key.endswith("_count"):
+            stats["prompt_tokens" if key.startswith("prompt") else "eval_tokens"] = int(value)
+        else:
+            parts = _GO_DURATION.findall(value)
+            if parts:
+                stats[key.replace("_duration", "_seconds")] = sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    return stats
+
+
+class _TimedBackend:
+    """Cold-start vs. warm latency bookkeeping shared by the backends."""
+
+    model = None
+    host = None
+    keep_alive = None
+
+    def __init__(self):
+        self.cold_start_seconds = None
+        self.warm_latencies = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def last_stats(self) -> dict:
+        """Model-reported token counts and eval durations of this thread's last call, if any."""
+        return getattr(self._local, "stats", None)
+
+    def _record_stats(self, stats: dict):
+        """Keep the backend's own timing stats and feed them into the metrics registry."""
+        self._local.stats = stats or None
+        if not stats:
+            return
+        for phase in ("load", "prompt_eval", "eval", "total"):
+            metrics.observe("documind_model_seconds", stats.get(f"{phase}_seconds"), phase=phase, model=self.model)
+        for kind in ("prompt", "eval"):
+            metrics.observe("documind_model_tokens", stats.get(f"{kind}_tokens"), buckets=metrics.TOKEN_BUCKETS,
+                            kind=kind, model=self.model)
+
+    def warm_up(self) -> float:
+        """Load the model with a tiny prompt and return how long that took."""
+        start = time.perf_counter()
+        self.generate(WARM_UP_PROMPT)
+        return time.perf_counter() - start
+
+    def _record_latency(self, seconds: float):
+        """The first call pays the model load; later calls count as warm."""
+        note_model_call(seconds)
+        with self._lock:
+            if self.cold_start_seconds is None:
+                self.cold_start_seconds = seconds
+            else:
+                self.warm_latencies.append(seconds)
+
+    def latency_report(self) -> dict:
+        """Return cold-start latency and warm-call statistics in seconds."""
+        with self._lock:
+            warm = list(self.warm_latencies)
+        warm_mean = sum(warm) / len(warm) if warm else None
+        speedup = None
+        if warm_mean and self.cold_start_seconds is not None:
+            speedup = self.cold_start_seconds / warm_mean
+        return {
+            "model": self.model,
+            "host": self.host,
+            "keep_alive": self.keep_alive,
+            "cold_start_seconds": self.cold_start_seconds,
+            "warm_calls": len(warm),
+            "warm_mean_seconds": warm_mean,
+            "cold_to_warm_ratio": speedup,
+        }
+
+
+class OllamaBackend(_TimedBackend):
+    """
+    Runs prompts through the Ollama CLI.
+    Supports an explicit warm-up call and a configurable keep-alive window.
+    """
+
+    def __init__(self, model: str = "gemma3:4b", keep_alive: str = DEFAULT_KEEP_ALIVE, host: str = None):
+        super().__init__()
+        self.model = model
+        self.keep_alive = keep_alive
+        self.host = host
+
+    def _env(self):
+        """Environment for the CLI; OLLAMA_HOST points it at a specific endpoint."""
+        if not self.host:
+            return None
+        return dict(os.environ, OLLAMA_HOST=self.host)
+
+    def check_available(self):
+        """Ensure Ollama is installed and the chosen model exists."""
+        try:
+            # check ollama CLI
+            version = subprocess.run(["ollama", "--version"], capture_output=True, text=True)
+            if version.returncode != 0:
+                raise RuntimeError("Ollama not detected. Install from https://ollama.ai")
+
+            # verify model
+            models = subprocess.run(["ollama", "list"], capture_output=True, text=True, env=self._env())
+            if models.returncode != 0:
+                raise RuntimeError(f"Ollama endpoint {self.host or 'default'} not reachable: {models.stderr}")
+            if self.model not in models.stdout:
+                raise RuntimeError(
+                    f"Model '{self.model}' not found.\nRun: ollama pull {self.model}\n\nAvailable:\n{models.stdout}"
+                )
+
+        except FileNotFoundError:
+            raise RuntimeError("Ollama not installed or not in PATH. Download from https://ollama.ai")
+
+    def _command(self, prompt: str) -> list:
+        """Build the `ollama run` command line for a prompt."""
+        command = ["ollama", "run", self.model]
+        if self.keep_alive:
+            command += ["--keepalive", self.keep_alive]
+        if metrics.enabled():
+            # Prints token counts and prompt-eval / eval durations to stderr
+            command.append("--verbose")
+        command.append(prompt)
+        return command
+
+    def generate(self, prompt: str) -> str:
+        """Send prompt to Ollama and return its response."""
+        start = time.perf_counter()
+        result = subprocess.run(self._command(prompt), capture_output=True, text=True,
+                                stdin=subprocess.DEVNULL, env=self._env())
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            note_model_call(elapsed)
+            raise RuntimeError(f"Ollama error: {result.stderr}")
+        self._record_latency(elapsed)
+        self._record_stats(parse_ollama_stats(result.stderr))
+        return result.stdout.strip()
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    """Fixture key for one model call."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def load_fixture(path: str) -> dict:
+    """Read a recorded fixture file; a missing file is an empty fixture."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {"version": 1, "calls": {}}
+    if not isinstance(data, dict) or not isinstance(data.get("calls"), dict):
+        raise RuntimeError(f"Not a DocuMind model fixture: {path}")
+    return data
+
+
+# Recorders writing to the same file (e.g. both cascade tiers) share one fixture
+_recordings = {}
+_recordings_lock = threading.Lock()
+
+
+class RecordingBackend:
+    """
+    Wraps another backend and records every prompt, response and call duration to a JSON fixture.
+    The fixture is rewritten atomically after each call, so an interrupted run keeps what it recorded.
+    """
+
+    def __init__(self, backend, path: str):
+        self.backend = backend
+        self.path = path
+        self.model = getattr(backend, "model", None)
+        self.host = getattr(backend, "host", None)
+        with _recordings_lock:
+            key = os.path.abspath(path)
+            if key not in _recordings:
+                _recordings[key] = (load_fixture(path), threading.Lock())
+            self._fixture, self._lock = _recordings[key]
+
+    def check_available(self):
+        self.backend.check_available()
+
+    def generate(self, prompt: str) -> str:
+        """Call the wrapped backend and store the exchange."""
+        start = time.perf_counter()
+        response = self.backend.generate(prompt)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            call = {"model": self.model, "prompt": prompt, "response": response, "seconds": round(elapsed, 4)}
+            stats = getattr(self.backend, "last_stats", None)
+            if stats:
+                call["stats"] = stats
+            self._fixture["calls"][prompt_key(self.model, prompt)] = call
+            self._save()
+        return response
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._fixture, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def last_stats(self) -> dict:
+        return getattr(self.backend, "last_stats", None)
+
+    def warm_up(self) -> float:
+        return self.backend.warm_up()
+
+    def latency_report(self) -> dict:
+        return self.backend.latency_report()
+
+
+class ReplayBackend(_TimedBackend):
+    """
+    Serves responses from a recorded fixture instead of calling a model.
+
+    By default each call sleeps for its recorded duration (scaled by `speed`); a fixed
+    `latency` in seconds overrides that. `jitter` adds a random +/- fraction of the delay,
+    drawn from a seeded generator so runs are reproducible. Prompts missing from the
+    fixture raise RuntimeError unless a `fallback` response is given. With `slots`, at
+    most that many calls are served at once, like a model server's parallel slots; the
+    wait for a slot counts toward the call's latency, as queueing on a real server does.
+    """
+
+    def __init__(self, path: str, model: str = None, latency: float = None, jitter: float = 0.0,
+                 speed: float = 1.0, fallback: str = None, seed: int = 0, slots: int = None):
+        super().__init__()
+        self.path = path
+        self.calls = load_fixture(path)["calls"]
+        recorded_models = {call.get("model") for call in self.calls.values()}
+        self.model = model or (recorded_models.pop() if len(recorded_models) == 1 else None)
+        self.host = f"replay:{os.path.basename(path)}"
+        self.latency = latency
+        self.jitter = jitter
+        self.speed = speed
+        self.fallback = fallback
+        self._random = random.Random(seed)
+        self._slots = threading.BoundedSemaphore(max(1, slots)) if slots else contextlib.nullcontext()
+        self.hits = 0
+        self.misses = 0
+
+    def check_available(self):
+        """A fixture with no calls and no fallback cannot answer anything."""
+        if not self.calls and self.fallback is None:
+            raise RuntimeError(f"Model fixture {self.path} is empty or missing")
+
+    def _delay(self, recorded: float) -> float:
+        delay = self.latency if self.latency is not None else recorded / self.speed if self.speed else 0.0
+        if self.jitter:
+            with self._lock:
+                delay *= 1.0 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
+
+    def generate(self, prompt: str) -> str:
+        """Return the recorded response for prompt after the configured delay."""
+        start = time.perf_counter()
+        call = self.calls.get(prompt_key(self.model, prompt))
+        if call is None:
+            with self._lock:
+                self.misses += 1
+            if self.fallback is None:
+                raise RuntimeError(f"No recorded response for prompt: {prompt[:80]!r}")
+            response, recorded = self.fallback, 0.0
+        else:
+            with self._lock:
+                self.hits += 1
+            response, recorded = call["response"], call.get("seconds", 0.0)
+        with self._slots:
+            time.sleep(self._delay(recorded))
+        self._record_latency(time.perf_counter() - start)
+        self._record_stats(call.get("stats") if call else None)
+        return response
+
+
+class BackendPool:
+    """
+    Load-balances prompts across several backends (e.g. Ollama instances on different hosts).
+
+    Requests go to the healthy backend with the fewest outstanding requests. A backend
+    that fails `max_failures` times in a row is ejected for `eject_seconds`, then
+    re-checked with its own check_available() before it receives traffic again.
+    """
+
+    def __init__(self, backends: list, max_failures: int = 3, eject_seconds: float = 30.0):
+        if not backends:
+            raise ValueError("BackendPool needs at least one backend")
+        self.backends = list(backends)
+        self.model = getattr(self.backends[0], "model", None)
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        self._state = [
+            {"outstanding": 0, "completed": 0, "failures": 0, "consecutive_failures": 0,
+             "ejected_until": 0.0, "error": None}
+            for _ in self.backends
+        ]
+        self._next = 0
+
+    def _eject(self, index: int, error):
+        state = self._state[index]
+        state["ejected_until"] = time.monotonic() + self.eject_seconds
+        state["error"] = str(error)
+
+    def check_available(self):
+        """Check every endpoint (model present, daemon reachable); fail only if none is usable."""
+        errors = []
+        for index, backend in enumerate(self.backends):
+            try:
+                backend.check_available()
+                with self._lock:
+                    self._state[index].update(ejected_until=0.0, consecutive_failures=0, error=None)
+            except RuntimeError as e:
+                with self._lock:
+                    self._eject(index, e)
+                errors.append(str(e))
+        if len(errors) == len(self.backends):
+            raise RuntimeError("No usable model backend:\n" + "\n".join(errors))
+
+    def health_check(self):
+        """Re-check ejected backends whose ejection period has passed."""
+        now = time.monotonic()
+        with self._lock:
+            due = [i for i, state in enumerate(self._state) if 0 < state["ejected_until"] <= now]
+        for index in due:
+            try:
+                self.backends[index].check_available()
+                with self._lock:
+                    self._state[index].update(ejected_until=0.0, consecutive_failures=0, error=None)
+            except RuntimeError as e:
+                with self._lock:
+                    self._eject(index, e)
+
+    def _acquire(self, exclude: set):
+        """Pick the healthy backend with the least outstanding requests (round-robin on ties)."""
+        self.health_check()
+        with self._lock:
+            now = time.monotonic()
+            count = len(self.backends)
+            candidates = [(self._next + offset) % count for offset in range(count)]
+            candidates = [i for i in candidates if i not in exclude and self._state[i]["ejected_until"] <= now]
+            if not candidates:
+                return None
+            index = min(candidates, key=lambda i: self._state[i]["outstanding"])
+            self._state[index]["outstanding"] += 1
+            self._next = (index + 1) % count
+            return index
+
+    def generate(self, prompt: str) -> str:
+        """Send prompt to the least-loaded healthy backend, retrying elsewhere on failure."""
+        tried, last_error = set(), None
+        while True:
+            index = self._acquire(tried)
+            if index is None:
+                raise RuntimeError(f"All model backends failed or are ejected. Last error: {last_error}")
+            tried.add(index)
+            try:
+                response = self.backends[index].generate(prompt)
+            except RuntimeError as e:
+                last_error = e
+                with self._lock:
+                    state = self._state[index]
+                    state["failures"] += 1
+                    state["consecutive_failures"] += 1
+                    if state["consecutive_failures"] >= self.max_failures:
+                        self._eject(index, e)
+                continue
+            finally:
+                # Any exception, not only backend errors, ends the request
+                with self._lock:
+                    self._state[index]["outstanding"] -= 1
+            with self._lock:
+                state = self._state[index]
+                state["completed"] += 1
+                state["consecutive_failures"] = 0
+            return response
+
+    def warm_up(self) -> float:
+        """Warm every healthy backend in parallel; returns the slowest load time."""
+        now = time.monotonic()
+        healthy = [b for b, state in zip(self.backends, self._state) if state["ejected_until"] <= now]
+        if not healthy:
+            raise RuntimeError("No healthy model backend to warm up")
+        with ThreadPoolExecutor(max_workers=len(healthy)) as executor:
+            return max(executor.map(lambda backend: backend.warm_up(), healthy))
+
+    def latency_report(self) -> dict:
+        """Aggregate latency report with a per-endpoint breakdown."""
+        reports = [backend.latency_report() for backend in self.backends]
+        colds = [r["cold_start_seconds"] for r in reports if r.get("cold_start_seconds") is not None]
+        warm_calls = sum(r.get("warm_calls", 0) for r in reports)
+        warm_total = sum((r.get("warm_mean_seconds") or 0) * r.get("warm_calls", 0) for r in reports)
+        warm_mean = warm_total / warm_calls if warm_calls else None
+        cold = max(colds) if colds else None
+        return {
+            "model": self.model,
+            "cold_start_seconds": cold,
+            "warm_calls": warm_calls,
+            "warm_mean_seconds": warm_mean,
+            "cold_to_warm_ratio": cold / warm_mean if cold is not None and warm_mean else None,
+            "endpoints": reports,
+        }
+
+    def stats(self) -> list:
+        """Per-backend outstanding/completed/failure counts and health."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {"backend": getattr(backend, "host", None) or repr(backend),
+                 "healthy": state["ejected_until"] <= now,
+                 **{key: state[key] for key in ("outstanding", "completed", "failures", "error")}}
+                for backend, state in zip(self.backends, self._state)
+            ]
+
+
+def make_backend(model: str, keep_alive: str = DEFAULT_KEEP_ALIVE, hosts: list = None,
+                 record: str = None, replay: str = None):
+    """
+    Single Ollama backend, or a BackendPool when several hosts are configured.
+
+    With a replay fixture (or DOCUMIND_REPLAY) responses come from the fixture and no
+    model is called; with a record path (or DOCUMIND_RECORD) real calls are saved to it.
+    """
+    replay = replay or REPLAY_PATH
+    if replay:
+        return ReplayBackend(replay, model=model)
+    hosts = DEFAULT_HOSTS if hosts is None else hosts
+    if len(hosts) > 1:
+        backend = BackendPool([OllamaBackend(model=model, keep_alive=keep_alive, host=host) for host in hosts])
+    else:
+        backend = OllamaBackend(model=model, keep_alive=keep_alive, host=hosts[0] if hosts else None)
+    record = record or RECORD_PATH
+    return RecordingBackend(backend, record) if record else backend
+
+
+def format_latency_report(report: dict) -> str:
+    """Render a latency report as a single human-readable line."""
+    if report.get("cold_start_seconds") is None:
+        return "No model calls yet"
+    text = f"Cold start: {report['cold_start_seconds']:.2f}s"
+    if report.get("warm_mean_seconds") is not None:
+        text += f" | Warm mean: {report['warm_mean_seconds']:.2f}s over {report['warm_calls']} call(s)"
+        if report.get("cold_to_warm_ratio"):
+            text += f" ({report['cold_to_warm_ratio']:.1f}x)"
+    return text
@@ -0,0 +1,34 @@
+"""
+Where DocuMind keeps its per-project caches.
+Caches never go into the analysed project: each project root gets its own directory
+under DOCUMIND_CACHE_DIR, $XDG_CACHE_HOME/documind or ~/.cache/documind.
+"""
+
+import os
+
+# hashlib is imported where used, keeping the diagram CLI's startup short
+
+
+def cache_root() -> str:
+    """Base directory for all DocuMind caches."""
+    explicit = os.environ.get("DOCUMIND_CACHE_DIR")
+    if explicit:
+        return os.path.expanduser(explicit)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "documind")
+
+
+def project_cache_path(root: str, name: str) -> str:
+    """
+    Path of a cache file for the project at root, creating its cache directory.
+
+    The directory is named after the project plus a hash of its absolute path, so
+    two checkouts with the same name do not share a cache.
+    """
+    import hashlib
+
+    root = os.path.realpath(root)
+    digest = hashlib.sha256(root.encode("utf-8")).hexdigest()[:16]
+    directory = os.path.join(cache_root(), f"{os.path.basename(root) or 'root'}-{digest}")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
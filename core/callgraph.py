@@ -0,0 +1,241 @@
+"""
+Call-graph scheduling for docstring generation.
+Documents callees before callers so their summaries can be passed as short context,
+and runs independent items of each dependency level in parallel. Streaming mode
+instead queues items as they are extracted, trading that order for earlier model calls.
+"""
+
+import ast
+import textwrap
+
+from core.work_queue import WorkQueue, estimate_cost, item_priority
+
+
+def _referenced_names(code: str) -> set:
+    """Names an item loads (calls, instantiations, references) plus self.method calls."""
+    try:
+        tree = ast.parse(textwrap.dedent(code))
+    except SyntaxError:
+        return set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) \
+                and node.value.id in ("self", "cls"):
+            names.add(node.attr)
+    return names
+
+
+def build_call_graph(items: list) -> dict:
+    """
+    Build caller -> callees edges between items from extract_top_level_items.
+
+    Items are identified by their position in the list; a name defined twice
+    resolves to its last definition, as it would at import time.
+
+    Returns:
+        dict: Item index -> set of indices of the items it references.
+    """
+    by_name = {item["name"]: index for index, item in enumerate(items)}
+    graph = {}
+    for index, item in enumerate(items):
+        callees = {by_name[name] for name in _referenced_names(item["code"]) if name in by_name}
+        callees.discard(index)
+        graph[index] = callees
+    return graph
+
+
+def _strongly_connected_components(graph: dict) -> list:
+    """Tarjan's algorithm (iterative) returning a list of components."""
+    index_of, lowlink, on_stack = {}, {}, set()
+    stack, components = [], []
+    counter = 0
+
+    for root in graph:
+        if root in index_of:
+            continue
+        work = [(root, iter(sorted(graph[root])))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(graph[child]))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+    return components
+
+
+def topological_levels(graph: dict) -> list:
+    """
+    Group items into levels where every item only depends on earlier levels.
+
+    Mutually recursive items (cycles) share a level and are documented without
+    each other's summaries.
+
+    Returns:
+        List of levels, each a sorted list of item indices.
+    """
+    components = _strongly_connected_components(graph)
+    component_of = {member: i for i, component in enumerate(components) for member in component}
+
+    level_of = {}
+    # Tarjan emits components callees-first, so one forward pass is enough
+    for i, component in enumerate(components):
+        deps = {component_of[callee] for member in component for callee in graph[member]} - {i}
+        level_of[i] = 1 + max((level_of[dep] for dep in deps), default=-1)
+
+    levels = [[] for _ in range(max(level_of.values(), default=-1) + 1)]
+    for i, component in enumerate(components):
+        levels[level_of[i]].extend(component)
+    return [sorted(level) for level in levels]
+
+
+def summary_line(docstring: str) -> str:
+    """First sentence-line of a docstring, used as compact callee context."""
+    for line in (docstring or "").split("\n"):
+        if line.strip():
+            return line.strip()
+    return ""
+
+
+def callee_context(item_index: int, items: list, graph: dict, docstrings: dict, max_callees: int = 8) -> str:
+    """Build a short context string from the summaries of an item's callees."""
+    lines = []
+    for callee in sorted(graph.get(item_index, ())):
+        summary = summary_line(docstrings.get(callee))
+        if summary:
+            lines.append(f"{items[callee]['name']}: {summary}")
+        if len(lines) >= max_callees:
+            break
+    if not lines:
+        return None
+    return "It uses these functions/classes from the same module - " + "; ".join(lines)
+
+
+def generate_in_dependency_order(generator, items: list, style: str = "google",
+                                 max_workers: int = 4, known: dict = None,
+                                 work_queue: WorkQueue = None, file_path: str = None) -> list:
+    """
+    Generate docstrings for all items, callees first, with callee summaries as context.
+
+    Args:
+        generator: DocstringGenerator used for the model calls.
+        items: Item dicts from extract_top_level_items.
+        style: Docstring style.
+        max_workers: Parallel model calls within one dependency level.
+        known: Item index -> docstring for items that are already documented (skipped).
+        work_queue: Shared WorkQueue to submit to; a private one is used when omitted.
+        file_path: Source file of the items, used to rank test code below public API.
+
+    Returns:
+        List aligned with items holding either the docstring or the Exception raised for it.
+    """
+    graph = build_call_graph(items)
+    docstrings = dict(known or {})
+    results = [docstrings.get(index) for index in range(len(items))]
+
+    def document(index):
+        item = items[index]
+        context = callee_context(index, items, graph, docstrings)
+        if item["type"] == "function":
+            return generator.generate_function_docstring(item["code"], style=style, callee_context=context)
+        result = generator.generate_class_docstring(item["code"], style=style, include_methods=False,
+                                                   callee_context=context)
+        return result.get("class_docstring", "")
+
+    queue = work_queue or WorkQueue(workers=max_workers)
+    try:
+        for level in topological_levels(graph):
+            todo = [index for index in level if index not in docstrings]
+            futures = [queue.submit(document, index, cost=estimate_cost(items[index]["code"]),
+                                    priority=item_priority(items[index], file_path))
+                       for index in todo]
+            for index, future in zip(todo, futures):
+                outcome = future.exception() or future.result()
+                results[index] = outcome
+                if not isinstance(outcome, Exception):
+                    docstrings[index] = outcome
+    finally:
+        if work_queue is None:
+            queue.shutdown()
+    return results
+
+
+def generate_as_extracted(generator, items, style: str = "google", max_workers: int = 4,
+                          work_queue: WorkQueue = None, file_path: str = None) -> tuple:
+    """
+    Generate docstrings while items are still being extracted.
+
+    Each item is queued as soon as the items iterable yields it, so model calls
+    overlap parsing the rest of the file. There is no dependency order: an item
+    gets as context the summaries of the callees whose docstrings are finished
+    by the time its own call starts.
+
+    Args:
+        generator: DocstringGenerator used for the model calls.
+        items: Iterable of items, e.g. iter_top_level_items(file_path).
+        style: Docstring style.
+        max_workers: Parallel model calls when no work_queue is given.
+        work_queue: Shared WorkQueue to submit to; a private one is used when omitted.
+        file_path: Source file of the items, used to rank test code below public API.
+
+    Returns:
+        (items, results): the extracted items as a list, and a list aligned with
+        them holding either the docstring or the Exception raised for it.
+    """
+    seen, by_name, docstrings = [], {}, {}
+
+    def document(index):
+        item = seen[index]
+        callees = {by_name[name] for name in _referenced_names(item["code"]) if name in by_name}
+        callees.discard(index)
+        context = callee_context(index, seen, {index: callees}, docstrings)
+        if item["type"] == "function":
+            docstring = generator.generate_function_docstring(item["code"], style=style, callee_context=context)
+        else:
+            result = generator.generate_class_docstring(item["code"], style=style, include_methods=False,
+                                                       callee_context=context)
+            docstring = result.get("class_docstring", "")
+        docstrings[index] = docstring
+        return docstring
+
+    queue = work_queue or WorkQueue(workers=max_workers)
+    futures = []
+    try:
+        for item in items:
+            seen.append(item)
+            by_name[item["name"]] = len(seen) - 1
+            futures.append(queue.submit(document, len(seen) - 1, cost=estimate_cost(item["code"]),
+                                        priority=item_priority(item, file_path)))
+        results = [future.exception() or future.result() for future in futures]
+    finally:
+        if work_queue is None:
+            queue.shutdown()
+    return seen, results
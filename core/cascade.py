@@ -0,0 +1,85 @@
+"""
+Tiered model cascade.
+Each item goes to the fastest model first; only items whose docstring fails validation
+are re-run on the next, larger model.
+"""
+
+import threading
+
+from core.validation import validate_class_docstring, validate_function_docstring
+
+
+class ModelCascade:
+    """
+    Runs docstring generation through a list of DocstringGenerators, smallest first.
+
+    Exposes the same generate_function_docstring / generate_class_docstring API as a
+    single generator, and records per-tier acceptance rates.
+    """
+
+    def __init__(self, generators: list):
+        if not generators:
+            raise ValueError("ModelCascade needs at least one generator")
+        self.generators = list(generators)
+        self.model = self.generators[-1].model
+        self._lock = threading.Lock()
+        # Keyed by tier position: two tiers may run the same model (e.g. on different hosts)
+        self._tiers = {tier: {"model": generator.model, "attempted": 0, "accepted": 0}
+                       for tier, generator in enumerate(self.generators)}
+
+    def _record(self, tier: int, accepted: bool):
+        with self._lock:
+            self._tiers[tier]["attempted"] += 1
+            if accepted:
+                self._tiers[tier]["accepted"] += 1
+
+    def generate_function_docstring(self, function_code: str, context: str = None, style: str = "google",
+                                    callee_context: str = None) -> str:
+        """Generate a function docstring, escalating to larger models only on validation failure."""
+        docstring = ""
+        for tier, generator in enumerate(self.generators):
+            docstring = generator.generate_function_docstring(function_code, context=context, style=style,
+                                                             callee_context=callee_context)
+            accepted = not validate_function_docstring(function_code, docstring, style)
+            self._record(tier, accepted)
+            if accepted:
+                break
+        return docstring
+
+    def generate_class_docstring(self, class_code: str, context: str = None, style: str = "google",
+                                 include_methods: bool = False, callee_context: str = None) -> dict:
+        """Generate a class docstring, escalating to larger models only on validation failure."""
+        result = {}
+        for tier, generator in enumerate(self.generators):
+            result = generator.generate_class_docstring(class_code, context=context, style=style,
+                                                        include_methods=include_methods, callee_context=callee_context)
+            accepted = not validate_class_docstring(class_code, result.get("class_docstring", ""), style)
+            self._record(tier, accepted)
+            if accepted:
+                break
+        return result
+
+    def warm_up(self) -> float:
+        """Warm every tier; returns the total load time."""
+        return sum(generator.warm_up() for generator in self.generators)
+
+    def latency_report(self) -> dict:
+        """Latency report of the first (fastest) tier, which serves most requests."""
+        return self.generators[0].latency_report()
+
+    def acceptance_rates(self) -> dict:
+        """Per-tier (by index, smallest first) model, attempted/accepted counts and acceptance rate."""
+        with self._lock:
+            return {
+                tier: dict(counts, rate=counts["accepted"] / counts["attempted"] if counts["attempted"] else None)
+                for tier, counts in self._tiers.items()
+            }
+
+
+def format_acceptance_rates(rates: dict) -> str:
+    """Render cascade acceptance rates as one line."""
+    parts = []
+    for tier, counts in rates.items():
+        if counts["attempted"]:
+            parts.append(f"tier {tier + 1} {counts['model']}: {counts['accepted']}/{counts['attempted']} accepted ({counts['rate']:.0%})")
+    return " | ".join(parts) or "No cascade calls yet"
@@ -0,0 +1,419 @@
+"""
+Package-wide class graph for diagrams.
+Extracts classes, their attributes and methods, and the inheritance, composition
+and association edges between them. Each file is parsed once and cached by
+mtime/size/content hash, so re-diagramming a package only reparses changed files.
+"""
+
+import ast
+import os
+
+# hashlib and json are imported where used, keeping the diagram CLI's startup short
+
+
+GRAPH_CACHE_FILE = ".documind_classgraph.json"
+
+# Annotation wrappers whose arguments are the referenced classes; the value says
+# whether they hold many of them
+_CONTAINERS = {
+    "list": True, "List": True, "set": True, "Set": True, "frozenset": True, "FrozenSet": True,
+    "tuple": True, "Tuple": True, "Sequence": True, "Iterable": True, "Iterator": True,
+    "Collection": True, "Deque": True, "deque": True, "MutableSequence": True,
+    "dict": True, "Dict": True, "Mapping": True, "MutableMapping": True, "DefaultDict": True,
+    "Optional": False, "Union": False, "ClassVar": False, "Final": False, "Annotated": False, "Type": False,
+}
+
+_SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules", ".tox", "build", "dist"}
+
+
+def module_name(root: str, path: str) -> str:
+    """Dotted module name of path relative to root ("pkg/sub/__init__.py" -> "pkg.sub")."""
+    rel = os.path.relpath(path, root)
+    parts = rel[:-3].split(os.sep) if rel.endswith(".py") else rel.split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts) or os.path.basename(os.path.abspath(root))
+
+
+def iter_python_files(root: str):
+    """Every .py file under root in a stable order, skipping VCS, cache and virtualenv directories."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS and not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                yield os.path.join(dirpath, filename)
+
+
+def _dotted(node) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        base = _dotted(node.value)
+        return f"{base}.{node.attr}" if base else None
+    return None
+
+
+def _looks_like_class(name: str) -> bool:
+    """CapWords final segment, as class names (not functions or constants) are written."""
+    last = name.rpartition(".")[2]
+    return last[:1].isupper() and (len(last) == 1 or not last.isupper())
+
+
+def _annotation_targets(node, many: bool = False) -> list:
+    """Class names referenced by an annotation, as [(dotted name, many)]."""
+    if node is None:
+        return []
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        try:
+            return _annotation_targets(ast.parse(node.value, mode="eval").body, many)
+        except SyntaxError:
+            return []
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return _annotation_targets(node.left, many) + _annotation_targets(node.right, many)
+    if isinstance(node, ast.Subscript):
+        wrapper = _dotted(node.value) or ""
+        holds_many = _CONTAINERS.get(wrapper.split(".")[-1])
+        if holds_many is None:
+            return [(wrapper, many)] if wrapper else []
+        args = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        if wrapper.split(".")[-1] in ("dict", "Dict", "Mapping", "MutableMapping", "DefaultDict") and len(args) == 2:
+            args = args[1:]
+        targets = []
+        for arg in args:
+            targets += _annotation_targets(arg, many or holds_many)
+        return targets
+    name = _dotted(node)
+    if name and name not in ("None",):
+        return [(name, many)]
+    return []
+
+
+def _annotation_text(node) -> str:
+    # Forward references read better without their quotes
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return ast.unparse(node)
+
+
+def _signature(method) -> str:
+    params = [arg.arg for arg in method.args.args]
+    if params and params[0] in ("self", "cls"):
+        params = params[1:]
+    return f"{method.name}({', '.join(params)})" if params else f"{method.name}()"
+
+
+def _class_record(node) -> dict:
+    """Attributes, methods and outgoing references of one ClassDef."""
+    attributes, references, methods = {}, [], []
+
+    def add_attribute(name, type_text):
+        if name not in attributes or (type_text and not attributes[name]):
+            attributes[name] = type_text
+
+    def add_reference(target, kind, attribute, many=False):
+        references.append({"target": target, "kind": kind, "attribute": attribute, "many": many})
+
+    for item in node.body:
+        if isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+            add_attribute(item.target.id, _annotation_text(item.annotation))
+            for target, many in _annotation_targets(item.annotation):
+                add_reference(target, "association", item.target.id, many)
+        elif isinstance(item, ast.Assign):
+            for target in item.targets:
+                if isinstance(target, ast.Name):
+                    add_attribute(target.id, "")
+        elif isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            methods.append(_signature(item))
+            param_annotations = {arg.arg: arg.annotation for arg in item.args.args + item.args.kwonlyargs}
+            for child in ast.walk(item):
+                if isinstance(child, ast.AnnAssign):
+                    targets, value, annotation = [child.target], child.value, child.annotation
+                elif isinstance(child, ast.Assign):
+                    targets, value, annotation = child.targets, child.value, None
+                else:
+                    continue
+                for target in targets:
+                    if not (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name)
+                            and target.value.id == "self"):
+                        continue
+                    name = target.attr
+                    callee = _dotted(value.func) if isinstance(value, ast.Call) else None
+                    if callee and _looks_like_class(callee):
+                        # self.x = Cls(...): the instance owns the part. The type is kept
+                        # only if Cls turns out to be a class of the graph (see _resolve_all)
+                        add_attribute(name, callee)
+                        add_reference(callee, "composition", name)
+                    elif annotation is not None:
+                        add_attribute(name, _annotation_text(annotation))
+                        for ref, many in _annotation_targets(annotation):
+                            add_reference(ref, "association", name, many)
+                    elif isinstance(value, ast.Name) and param_annotations.get(value.id) is not None:
+                        # self.x = param, with param annotated in the signature
+                        add_attribute(name, _annotation_text(param_annotations[value.id]))
+                        for ref, many in _annotation_targets(param_annotations[value.id]):
+                            add_reference(ref, "association", name, many)
+                    else:
+                        add_attribute(name, "")
+
+    return {
+        "name": node.name,
+        "bases": [base for base in (_dotted(b) for b in node.bases) if base and base != "object"],
+        "attributes": [{"name": name, "type": type_text} for name, type_text in attributes.items()],
+        "methods": methods,
+        "references": references,
+        "line": node.lineno,
+    }
+
+
+def _imports(tree, module: str, is_package: bool) -> dict:
+    """Local name -> dotted target for the module's imports (relative imports resolved)."""
+    package = module if is_package else module.rpartition(".")[0]
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    names[alias.asname] = alias.name
+                else:
+                    head = alias.name.split(".")[0]
+                    names[head] = head
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = package.split(".") if package else []
+                parts = parts[:len(parts) - (node.level - 1)] if node.level > 1 else parts
+                base = ".".join(p for p in parts + ([node.module] if node.module else []) if p)
+            for alias in node.names:
+                if alias.name != "*":
+                    names[alias.asname or alias.name] = f"{base}.{alias.name}" if base else alias.name
+    return names
+
+
+def extract_module(source: str, module: str = "", is_package: bool = False) -> dict:
+    """
+    Extract the class model of one module's source.
+
+    Returns:
+        Dict with module, imports (local name -> dotted target) and top-level classes.
+    """
+    tree = ast.parse(source)
+    return {
+        "module": module,
+        "imports": _imports(tree, module, is_package),
+        "classes": [_class_record(node) for node in tree.body if isinstance(node, ast.ClassDef)],
+    }
+
+
+class ClassGraph:
+    """
+    Class graph over many modules, updated one file at a time.
+
+    Files are tracked by path with their mtime, size and content hash; update_file()
+    reparses a file only when its content actually changed. With a cache path the
+    per-file models survive between runs.
+    """
+
+    def __init__(self, cache_path: str = None):
+        self.cache_path = cache_path
+        self.files = {}
+        self.parsed = 0
+        self.skipped = 0
+        self._dirty = False
+        self._resolved = None
+        if cache_path and os.path.exists(cache_path):
+            import json
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self.files = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.files = {}
+
+    def update_source(self, key: str, source: str, module: str, is_package: bool = False) -> bool:
+        """Add or replace one module from source text; returns True when it was reparsed."""
+        import hashlib
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        entry = self.files.get(key)
+        if entry and entry["hash"] == digest and entry["module"] == module:
+            self.skipped += 1
+            return False
+        model = extract_module(source, module, is_package)
+        self.files[key] = dict(entry or {}, hash=digest, **model)
+        self.parsed += 1
+        self._dirty = True
+        self._resolved = None
+        return True
+
+    def update_file(self, path: str, root: str = None) -> bool:
+        """Reparse path if its mtime/size and then its content changed; returns True when reparsed."""
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.files.get(key)
+        if entry and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+            self.skipped += 1
+            return False
+        module = module_name(root or os.path.dirname(path), path)
+        try:
+            with open(path, "rb") as f:
+                source = f.read().decode("utf-8")
+            changed = self.update_source(key, source, module, os.path.basename(path) == "__init__.py")
+        except (UnicodeDecodeError, SyntaxError, ValueError):
+            # Keep the file tracked (with no classes) so it is not retried until it changes
+            self.files[key] = {"hash": None, "module": module, "imports": {}, "classes": []}
+            changed = True
+            self._resolved = None
+        self.files[key].update(mtime=stat.st_mtime, size=stat.st_size)
+        self._dirty = True
+        return changed
+
+    def remove_file(self, path: str):
+        if self.files.pop(os.path.abspath(path), None) is not None:
+            self._dirty = True
+            self._resolved = None
+
+    def update_package(self, root: str) -> int:
+        """Bring every .py file under root up to date and forget deleted ones; returns files reparsed."""
+        seen, reparsed = set(), 0
+        for path in iter_python_files(root):
+            seen.add(os.path.abspath(path))
+            reparsed += self.update_file(path, root)
+        prefix = os.path.join(os.path.abspath(root), "")
+        for key in [key for key in self.files if key.startswith(prefix) and key not in seen]:
+            self.remove_file(key)
+        return reparsed
+
+    def save(self):
+        """Write the per-file cache atomically if anything changed; returns False if it could not be written."""
+        if not self._dirty or not self.cache_path:
+            return True
+        import json
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.files, f, sort_keys=True)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # The cache is only an optimization: a read-only tree is diagrammed without it
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        self._dirty = False
+        return True
+
+    def _resolve_all(self) -> tuple:
+        """Qualified nodes and resolved edges, recomputed only after a change."""
+        if self._resolved is not None:
+            return self._resolved
+        nodes, by_name = {}, {}
+        for entry in self.files.values():
+            for cls in entry["classes"]:
+                qualname = f"{entry['module']}.{cls['name']}" if entry["module"] else cls["name"]
+                nodes[qualname] = dict(cls, module=entry["module"], qualname=qualname)
+                by_name.setdefault(cls["name"], []).append(qualname)
+
+        def resolve(name, entry):
+            module, imports = entry["module"], entry["imports"]
+            head, _, rest = name.partition(".")
+            candidates = []
+            if not rest:
+                candidates.append(f"{module}.{name}" if module else name)
+            if head in imports:
+                candidates.append(imports[head] + (f".{rest}" if rest else ""))
+            candidates.append(name)
+            for candidate in candidates:
+                if candidate in nodes:
+                    return candidate
+            # Fall back to a unique class of that name anywhere in the graph
+            matches = by_name.get(name.rpartition(".")[2], [])
+            return matches[0] if len(matches) == 1 else None
+
+        edges, seen, untyped = [], set(), set()
+        for entry in self.files.values():
+            for cls in entry["classes"]:
+                source = f"{entry['module']}.{cls['name']}" if entry["module"] else cls["name"]
+                for base in cls["bases"]:
+                    target = resolve(base, entry)
+                    if target and (source, target, "inheritance") not in seen:
+                        seen.add((source, target, "inheritance"))
+                        edges.append({"source": source, "target": target, "kind": "inheritance",
+                                      "label": "", "many": False})
+                for ref in cls["references"]:
+                    target = resolve(ref["target"], entry)
+                    if target is None and ref["kind"] == "composition":
+                        # self.x = f(...) where f is not a class of the graph: no type to show
+                        untyped.add((source, ref["attribute"], ref["target"]))
+                    key = (source, target, ref["kind"], ref["attribute"])
+                    if target and target != source and key not in seen:
+                        seen.add(key)
+                        edges.append({"source": source, "target": target, "kind": ref["kind"],
+                                      "label": ref["attribute"], "many": ref["many"]})
+        for source, attribute, type_text in untyped:
+            nodes[source]["attributes"] = [dict(a, type="") if a["name"] == attribute and a["type"] == type_text
+                                           else a for a in nodes[source]["attributes"]]
+        adjacency = {qualname: set() for qualname in nodes}
+        for edge in edges:
+            adjacency[edge["source"]].add(edge["target"])
+            adjacency[edge["target"]].add(edge["source"])
+        self._resolved = (nodes, edges, adjacency)
+        return self._resolved
+
+    @property
+    def nodes(self) -> dict:
+        """Qualified class name -> class record (with module and qualname)."""
+        return self._resolve_all()[0]
+
+    @property
+    def edges(self) -> list:
+        """Resolved edges: {"source", "target", "kind", "label", "many"}; kind is inheritance,
+        composition or association."""
+        return self._resolve_all()[1]
+
+    def find(self, name: str) -> list:
+        """Qualified names of the classes called name (bare or module-qualified)."""
+        nodes = self.nodes
+        if name in nodes:
+            return [name]
+        return sorted(qualname for qualname, cls in nodes.items() if cls["name"] == name)
+
+    def neighbourhood(self, seeds, hops: int = 1) -> list:
+        """Classes within `hops` edges of any seed, in either direction (seeds first)."""
+        adjacency = self._resolve_all()[2]
+        found = list(seeds)
+        seen, frontier = set(found), list(found)
+        for _ in range(hops):
+            frontier = [other for qualname in frontier for other in sorted(adjacency[qualname])
+                        if other not in seen and not seen.add(other)]
+            found += frontier
+        return found
+
+    def partition(self, classes, max_nodes: int) -> list:
+        """
+        Split classes into groups of at most max_nodes, keeping each module's
+        classes together where it fits and sibling modules next to each other.
+        """
+        nodes = self.nodes
+        by_module = {}
+        for qualname in classes:
+            by_module.setdefault(nodes[qualname]["module"], []).append(qualname)
+        parts, current = [], []
+        for module in sorted(by_module):
+            members = by_module[module]
+            if current and len(current) + len(members) > max_nodes:
+                parts.append(current)
+                current = []
+            while len(members) > max_nodes:
+                parts.append(members[:max_nodes])
+                members = members[max_nodes:]
+            current += members
+        if current:
+            parts.append(current)
+        return parts
+
+
+def build_class_graph(root: str, cache_path: str = None) -> ClassGraph:
+    """Class graph of every module under root, reusing a per-file cache when given."""
+    graph = ClassGraph(cache_path)
+    graph.update_package(root)
+    graph.save()
+    return graph
@@ -0,0 +1,96 @@
+"""
+Adaptive concurrency control for model requests.
+AIMD on observed latency: grow the in-flight limit while latency stays near the best
+seen, cut it multiplicatively on errors or when latency shows the backend is queueing.
+Only time spent in model calls counts: backends report each call with note_model_call(),
+so jobs answered from a cache or index never feed the limiter.
+"""
+
+import threading
+import time
+
+from core import metrics
+
+
+_job_calls = threading.local()
+
+
+def note_model_call(seconds: float):
+    """Credit one model request to the job running on this thread (called by the backends)."""
+    _job_calls.count = getattr(_job_calls, "count", 0) + 1
+    _job_calls.seconds = getattr(_job_calls, "seconds", 0.0) + seconds
+
+
+def start_job():
+    """Reset this thread's model-call tally before a job runs."""
+    _job_calls.count = 0
+    _job_calls.seconds = 0.0
+
+
+def job_model_calls() -> tuple:
+    """(number of model requests, seconds spent in them) for this thread's current job."""
+    return getattr(_job_calls, "count", 0), getattr(_job_calls, "seconds", 0.0)
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    Latency is normalized by job cost (seconds per estimated prompt token) so long
+    prompts are not mistaken for congestion.
+    """
+
+    def __init__(self, initial: int = 2, minimum: int = 1, maximum: int = 16,
+                 tolerance: float = 2.0, backoff: float = 0.5):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self._limit = float(min(max(initial, minimum), self.maximum))
+        self._baseline = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.increases = 0
+        self.decreases = 0
+        metrics.set_gauge("documind_concurrency_limit", self.limit)
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def record(self, seconds: float, cost: int = 1, error: bool = False):
+        """Feed one completed request back into the limit."""
+        unit = seconds / max(cost, 1)
+        now = time.perf_counter()
+        with self._lock:
+            if not error:
+                if self._baseline is None or unit < self._baseline:
+                    self._baseline = unit
+                else:
+                    # Drift slowly upwards so a permanently slower backend resets the baseline
+                    self._baseline += 0.001 * (unit - self._baseline)
+
+            congested = error or unit > self._baseline * self.tolerance
+            if congested:
+                # At most one decrease per request lifetime so a burst of slow replies
+                # from the same window does not collapse the limit to the minimum
+                if now - self._last_decrease >= seconds:
+                    self._limit = max(float(self.minimum), self._limit * self.backoff)
+                    self._last_decrease = now
+                    self.decreases += 1
+            elif self._limit < self.maximum:
+                # About +1 per full window of successful requests
+                self._limit = min(float(self.maximum), self._limit + 1.0 / self._limit)
+                self.increases += 1
+            limit = int(self._limit)
+        metrics.set_gauge("documind_concurrency_limit", limit)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "concurrency_limit": int(self._limit),
+                "baseline_seconds_per_token": self._baseline,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
@@ -0,0 +1,291 @@
+"""
+Structural deduplication of docstring work.
+Items that are identical up to names and constants share one generated docstring.
+"""
+
+import ast
+import hashlib
+import re
+import textwrap
+import threading
+
+from core.docstring_styles import convert_docstring
+
+
+_SELF_NAMES = ("self", "cls")
+
+
+class _BoundNameCollector(ast.NodeVisitor):
+    """Collect names bound inside an item: defs, parameters and assignment targets."""
+
+    def __init__(self):
+        self.bound = set()
+
+    def visit_FunctionDef(self, node):
+        self.bound.add(node.name)
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None:
+                self.bound.add(arg.arg)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.bound.add(node.id)
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+
+class _Normalizer(ast.NodeTransformer):
+    """
+    Alpha-rename bound names and self attributes, and abstract constants by type.
+    Free names (builtins, imports, globals) are kept so different callees hash differently.
+    """
+
+    def __init__(self, bound: set):
+        self.bound = bound
+        self.names = {}
+        self.constants = []
+
+    def _rename(self, name: str) -> str:
+        if name not in self.names:
+            self.names[name] = f"_n{len(self.names)}"
+        return self.names[name]
+
+    def _strip_docstring(self, node):
+        body = node.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            node.body = body[1:] or [ast.Pass()]
+
+    def visit_FunctionDef(self, node):
+        self._strip_docstring(node)
+        node.name = self._rename(node.name)
+        self.generic_visit(node)
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self._strip_docstring(node)
+        node.name = self._rename(node.name)
+        self.generic_visit(node)
+        return node
+
+    def visit_arg(self, node):
+        if node.arg not in _SELF_NAMES:
+            node.arg = self._rename(node.arg)
+        self.generic_visit(node)
+        return node
+
+    def visit_Name(self, node):
+        if node.id in self.bound and node.id not in _SELF_NAMES:
+            node.id = self._rename(node.id)
+        return node
+
+    def visit_Attribute(self, node):
+        self.generic_visit(node)
+        if isinstance(node.value, ast.Name) and node.value.id in _SELF_NAMES:
+            node.attr = self._rename(node.attr)
+        return node
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            node.name = self._rename(node.name)
+        self.generic_visit(node)
+        return node
+
+    def visit_Constant(self, node):
+        if node.value is None or isinstance(node.value, bool):
+            return node
+        self.constants.append(node.value)
+        return ast.Constant(value=f"<{type(node.value).__name__}>")
+
+
+def normalize_code(code: str) -> tuple:
+    """
+    Compute the normalized structural hash of an item.
+
+    Args:
+        code: Source of one function or class.
+
+    Returns:
+        Tuple of (hash, original names in canonical order, constants in source order).
+    """
+    tree = ast.parse(textwrap.dedent(code))
+    collector = _BoundNameCollector()
+    collector.visit(tree)
+    normalizer = _Normalizer(collector.bound - set(_SELF_NAMES))
+    tree = normalizer.visit(tree)
+    digest = hashlib.sha256(ast.dump(tree, annotate_fields=False).encode("utf-8")).hexdigest()
+    names = sorted(normalizer.names, key=lambda name: normalizer.names[name])
+    return digest, names, normalizer.constants
+
+
+# Strings up to this long ("a", "id") also occur as ordinary words, so they are
+# only substituted where the docstring quotes them
+MIN_BARE_CONSTANT_LENGTH = 3
+
+
+def _constant_replacements(old, new) -> dict:
+    """Docstring text -> replacement for one constant that differs between two duplicates."""
+    old_text, new_text = str(old), str(new)
+    if old_text == new_text or not old_text.strip():
+        return {}
+    if not isinstance(old, str) or len(old_text) >= MIN_BARE_CONSTANT_LENGTH:
+        return {old_text: new_text}
+    return {f"{quote}{old_text}{quote}": f"{quote}{new_text}{quote}" for quote in ("'", '"', "`")}
+
+
+# Names that also read as ordinary prose; "Returns a list" must not become "Returns x list"
+_COMMON_WORDS = frozenset("""
+a an the and or not no yes is are be if in on at of to by as for from with into it its all any
+each every some one two first second third last next prev left right up down new old other same
+value values item items key keys name names data list lists dict set map text string line lines
+word words number count size length total sum max min result results output input source target
+file files path paths node nodes tree root parent child children start end begin stop step
+index offset limit level depth mode kind type types format style time date day year message
+error errors code content object objects entry entries record records row rows column columns
+field fields default options config state status flag flags token tokens part parts point points
+group groups page pages user users id base head tail body block link links label match pattern
+""".split())
+
+_ENTRY_FIELDS = r"param|parameter|arg|argument|key|keyword|type|kwtype"
+
+
+def _plain_word(name: str) -> bool:
+    """Whether a name could be an ordinary word of the docstring's prose."""
+    return len(name) == 1 or name.lower() in _COMMON_WORDS
+
+
+def adapt_docstring(docstring: str, old_names: list, new_names: list,
+                    old_constants: list = (), new_constants: list = ()) -> str:
+    """
+    Substitute names (and differing constants) of the stored item with the new item's.
+
+    Names are always renamed in Args/Parameters entries, in :param/:type fields and
+    where they are quoted or backticked. Bare mentions in the prose are renamed only
+    for names that cannot be ordinary words.
+
+    Returns:
+        The adapted docstring, or None when a single-letter or common-word name that
+        differs is mentioned in the prose and the docstring cannot be adapted safely.
+    """
+    renames = {old: new for old, new in zip(old_names, new_names) if old != new}
+    constants = {}
+    for old, new in zip(old_constants, new_constants):
+        for old_text, new_text in _constant_replacements(old, new).items():
+            if old_text not in renames:
+                constants.setdefault(old_text, new_text)
+    if not renames and not constants:
+        return docstring
+
+    def alternatives(words):
+        return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+    branches, plain = [], []
+    if renames:
+        names = alternatives(renames)
+        branches += [
+            # Google/NumPy entry: "name (type): ..." or "name : type"
+            rf"^(?P<lead>[ \t]*\*{{0,2}})(?P<entry>{names})(?=[ \t]*(?:\([^)\n]*\))?[ \t]*:)",
+            # Sphinx field: ":param name:" or ":param type name:"
+            rf"(?P<field>:(?:{_ENTRY_FIELDS})[ \t]+(?:[^:\n]*[ \t])?)(?P<fieldname>{names})(?=:)",
+            # Quoted or backticked mention
+            rf"(?P<quote>``|[`'\"])(?P<quoted>{names})(?P=quote)",
+        ]
+        plain = [old for old in renames if _plain_word(old)]
+        distinctive = [old for old in renames if not _plain_word(old)]
+        if distinctive:
+            branches.append(rf"(?<![\w.])(?P<bare>{alternatives(distinctive)})(?![\w])")
+    if constants:
+        branches.append(rf"(?<![\w.])(?P<constant>{alternatives(constants)})(?![\w])")
+    # One pass so that swapped names (a -> b, b -> a) do not chain
+    pattern = re.compile("|".join(branches), re.MULTILINE)
+
+    if plain:
+        # A plain-word name left in the prose cannot be told apart from the word itself
+        remainder = pattern.sub(" ", docstring)
+        if re.search(rf"(?<![\w.])(?:{alternatives(plain)})(?![\w])", remainder):
+            return None
+
+    def substitute(match):
+        groups = match.groupdict()
+        if groups.get("constant"):
+            return constants[groups["constant"]]
+        if groups.get("entry"):
+            return groups["lead"] + renames[groups["entry"]]
+        if groups.get("fieldname"):
+            return groups["field"] + renames[groups["fieldname"]]
+        if groups.get("quoted"):
+            return groups["quote"] + renames[groups["quoted"]] + groups["quote"]
+        return renames[groups["bare"]]
+
+    return pattern.sub(substitute, docstring)
+
+
+class DedupIndex:
+    """
+    Index of generated docstrings keyed by normalized AST hash.
+    Records lookups and hits so each run can report how many model calls were saved.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def key_for(self, code: str):
+        """Return the structural hash for an item, or None if it does not parse."""
+        try:
+            return normalize_code(code)[0]
+        except SyntaxError:
+            return None
+
+    def lookup(self, code: str, style: str = None):
+        """Return an adapted docstring for a structurally identical item, or None."""
+        try:
+            digest, names, constants = normalize_code(code)
+        except SyntaxError:
+            return None
+        with self._lock:
+            self.lookups += 1
+            entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        stored_names, stored_constants, docstring, stored_style = entry
+        adapted = adapt_docstring(docstring, stored_names, names, stored_constants, constants)
+        if adapted is None:
+            return None
+        with self._lock:
+            self.hits += 1
+        if style and stored_style and style != stored_style:
+            adapted = convert_docstring(adapted, style, stored_style)
+        return adapted
+
+    def add(self, code: str, docstring: str, style: str = None):
+        """Remember the docstring generated for an item."""
+        if not docstring:
+            return
+        try:
+            digest, names, constants = normalize_code(code)
+        except SyntaxError:
+            return
+        with self._lock:
+            self._entries.setdefault(digest, (names, constants, docstring, style))
+
+    def stats(self) -> dict:
+        """Return lookups, hits and hit rate for this index."""
+        with self._lock:
+            rate = self.hits / self.lookups if self.lookups else 0.0
+            return {"entries": len(self._entries), "lookups": self.lookups, "hits": self.hits, "hit_rate": rate}
@@ -1,11 +1,32 @@
 """
 Mermaid class diagram generator for Python files.
 Parses Python code and generates Mermaid-compatible class diagrams.
+Imports nothing model-related, so the CLI starts in tens of milliseconds.
 """
 
-import ast
+import io
+import os
 import sys
 
+if not __package__:
+    # Run as a script: make the project root importable
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.cache_paths import project_cache_path
+from core.class_graph import GRAPH_CACHE_FILE, ClassGraph, build_class_graph
+from core.emitters import EMITTERS, MermaidEmitter, get_emitter, write_diagram
+from core.metrics import span
+from core.profiling import format_profile_paths, maybe_profile, stage
+
+
+# Classes per diagram when diagramming a whole package; browser Mermaid
+# renderers slow to a crawl well before a few hundred classes
+PACKAGE_MAX_NODES = 50
+
+# Formats written as one graph however large it is
+SINGLE_GRAPH_FORMATS = ("json", "svg")
+
 
 def _normalize_indentation(content: str) -> str:
     """Remove common leading whitespace from code block."""
@@ -29,54 +50,181 @@ def _normalize_indentation(content: str) -> str:
     return content
 
 
-def generate_mermaid_diagram_from_code(source_code: str) -> str:
+def render_mermaid(graph, classes=None, namespaces: bool = False) -> str:
+    """
+    Render a ClassGraph as a Mermaid class diagram.
+    
+    Args:
+        graph: ClassGraph to render.
+        classes: Qualified names of the classes to draw (default: all).
+        namespaces: Group classes into one Mermaid namespace per module.
+        
+    Returns:
+        Mermaid diagram string with attributes, methods and
+        inheritance (<|--), composition (*--) and association (-->) edges.
+    """
+    stream = io.StringIO()
+    write_diagram(graph, MermaidEmitter(stream), classes, namespaces=namespaces)
+    return stream.getvalue().rstrip("\n")
+
+
+def select_classes(graph, focus: str = None, hops: int = 1) -> list:
+    """
+    Classes to diagram: all of them, or the k-hop neighbourhood of a focus class.
+    
+    Args:
+        graph: ClassGraph to select from.
+        focus: Class name (bare or module-qualified) to centre on.
+        hops: Relationship edges to follow from the focus class.
+        
+    Returns:
+        Qualified class names.
+    """
+    if not focus:
+        return list(graph.nodes)
+    seeds = graph.find(focus)
+    if not seeds:
+        raise ValueError(f"Class '{focus}' not found")
+    return graph.neighbourhood(seeds, hops)
+
+
+def _plan_parts(graph, focus: str = None, hops: int = 1, max_nodes: int = 0) -> list:
+    """Classes, edges, stubs and header comments of each diagram part."""
+    if not graph.nodes:
+        return [{"classes": []}]
+    classes = select_classes(graph, focus, hops)
+    if not max_nodes or len(classes) <= max_nodes:
+        return [{"classes": classes}]
+    
+    parts = graph.partition(classes, max_nodes)
+    part_of = {qualname: i for i, part in enumerate(parts) for qualname in part}
+    part_edges = [[] for _ in parts]
+    for edge in graph.edges:
+        ends = {part_of.get(edge["source"]), part_of.get(edge["target"])}
+        if None in ends:
+            continue
+        for i in ends:
+            part_edges[i].append(edge)
+    
+    plans = []
+    for i, part in enumerate(parts):
+        stubs = {}
+        for edge in part_edges[i]:
+            for qualname in (edge["source"], edge["target"]):
+                if part_of[qualname] != i:
+                    stubs[qualname] = f"part {part_of[qualname] + 1}"
+        linked = sorted({int(label.split()[1]) for label in stubs.values()})
+        comments = [f"Part {i + 1} of {len(parts)}"]
+        if linked:
+            comments.append(f"Linked parts: {', '.join(str(n) for n in linked)}")
+        plans.append({"classes": part, "edges": part_edges[i], "stubs": stubs, "comments": comments})
+    return plans
+
+
+def write_diagrams(graph, stream, fmt: str = "mermaid", focus: str = None, hops: int = 1,
+                   namespaces: bool = False, max_nodes: int = 0) -> int:
+    """
+    Stream a ClassGraph to a text stream as one or more diagrams.
+    
+    Args:
+        graph: ClassGraph to render.
+        stream: Writable text stream (file, stdout, StringIO).
+        fmt: Output format: mermaid, dot, plantuml, json or svg.
+        focus: Only draw this class and its neighbourhood.
+        hops: Neighbourhood radius around focus.
+        namespaces: Group classes by module.
+        max_nodes: Maximum classes per diagram (0 for no limit); larger graphs are
+            written as linked parts separated by blank lines. JSON and SVG
+            output is always a single graph: nothing has to lay it out client-side.
+        
+    Returns:
+        Number of diagrams written.
+    """
+    plans = _plan_parts(graph, focus, hops, 0 if fmt in SINGLE_GRAPH_FORMATS else max_nodes)
+    for i, plan in enumerate(plans):
+        if i:
+            stream.write("\n")
+        write_diagram(graph, get_emitter(fmt, stream), namespaces=namespaces, **plan)
+    return len(plans)
+
+
+def render_mermaid_parts(graph, focus: str = None, hops: int = 1, namespaces: bool = False,
+                         max_nodes: int = 0) -> list:
+    """
+    Render a ClassGraph as one or more Mermaid diagrams small enough for browsers.
+    
+    Args:
+        graph: ClassGraph to render.
+        focus: Only draw this class and its neighbourhood.
+        hops: Neighbourhood radius around focus.
+        namespaces: Group classes into one Mermaid namespace per module.
+        max_nodes: Maximum classes per diagram (0 for no limit). Larger graphs
+            are split by module into parts; a class from another part that an
+            edge points at is drawn as an empty stub tagged with its part number.
+        
+    Returns:
+        List of Mermaid diagram strings, one per part.
+    """
+    diagrams = []
+    for plan in _plan_parts(graph, focus, hops, max_nodes):
+        stream = io.StringIO()
+        write_diagram(graph, MermaidEmitter(stream), namespaces=namespaces, **plan)
+        diagrams.append(stream.getvalue().rstrip("\n"))
+    return diagrams
+
+
+def graph_from_code(source_code: str) -> ClassGraph:
+    """Class graph of a single source string."""
+    # Normalize indentation
+    with span("diagram.normalize_indentation"):
+        source_code = _normalize_indentation(source_code)
+    
+    # Parse and extract classes with their relationships
+    graph = ClassGraph()
+    with span("diagram.extract_classes"):
+        graph.update_source("<code>", source_code, "")
+    return graph
+
+
+def generate_mermaid_diagram_from_code(source_code: str, focus: str = None, hops: int = 1) -> str:
     """
     Generate a Mermaid class diagram from Python source code string.
     
     Args:
         source_code: Python source code as string.
+        focus: Only draw this class and the classes within `hops` edges of it.
+        hops: Neighbourhood radius around focus.
         
     Returns:
         Mermaid diagram string.
     """
-    # Normalize indentation
-    source_code = _normalize_indentation(source_code)
-    
-    # Parse and extract classes
-    tree = ast.parse(source_code)
-    classes = []
-    
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Module):
-            for item in node.body:
-                if isinstance(item, ast.ClassDef):
-                    methods = []
-                    for method in item.body:
-                        if isinstance(method, ast.FunctionDef):
-                            # Get parameters (skip 'self')
-                            params = [arg.arg for arg in method.args.args]
-                            if params and params[0] == 'self':
-                                params = params[1:]
-                            
-                            # Format method signature
-                            sig = f"{method.name}({', '.join(params)})" if params else f"{method.name}()"
-                            methods.append(sig)
-                    
-                    classes.append({'name': item.name, 'methods': methods})
-            break
-    
-    # Generate Mermaid diagram
-    if not classes:
-        return "classDiagram\n    class NoClassesFound"
-    
-    diagram = ["classDiagram"]
-    for cls in classes:
-        diagram.append(f"    class {cls['name']} {{")
-        for method in cls['methods']:
-            diagram.append(f"        + {method}")
-        diagram.append("    }")
-    
-    return "\n".join(diagram)
+    graph = graph_from_code(source_code)
+    with span("diagram.render"):
+        return render_mermaid(graph, select_classes(graph, focus, hops) if graph.nodes else None)
+
+
+def generate_package_diagram(root: str, cache_path: str = None, focus: str = None, hops: int = 1,
+                             namespaces: bool = True) -> str:
+    """
+    Generate a Mermaid class diagram for every module under a package directory.
+    
+    Args:
+        root: Package (or project) directory.
+        cache_path: Per-file class graph cache; only files changed since the
+            last run are reparsed. Defaults to GRAPH_CACHE_FILE in the user's
+            cache directory for root (see core.cache_paths), never inside root.
+        focus: Only draw this class and the classes within `hops` edges of it.
+        hops: Neighbourhood radius around focus.
+        namespaces: Group classes into one Mermaid namespace per module.
+        
+    Returns:
+        Mermaid diagram string including cross-module edges.
+    """
+    with span("diagram.build_graph"):
+        graph = build_class_graph(root, cache_path or project_cache_path(root, GRAPH_CACHE_FILE))
+    
+    with span("diagram.render"):
+        return render_mermaid(graph, select_classes(graph, focus, hops) if graph.nodes else None, namespaces)
 
 
 def generate_mermaid_diagram(file_path: str) -> str:
@@ -90,28 +238,75 @@ def generate_mermaid_diagram(file_path: str) -> str:
         Mermaid diagram string in format:
         classDiagram
             class ClassName {
+                + str attribute
                 + method1(param1, param2)
                 + method2()
             }
+            BaseName <|-- ClassName
     """
     # Read file
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with span("diagram.read_file"), open(file_path, 'r', encoding='utf-8') as f:
         source_code = f.read()
     
     return generate_mermaid_diagram_from_code(source_code)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python core/diagram_generator.py <file_path>")
-        print("Example: python core/diagram_generator.py test_sample.py")
-        sys.exit(1)
+def main(argv=None):
+    """Command-line entry point: print the diagram for a file or package directory."""
+    import argparse
     
-    file_path = sys.argv[1]
+    arg_parser = argparse.ArgumentParser(
+        prog="python core/diagram_generator.py",
+        description="Generate a class diagram (Mermaid, DOT, PlantUML, JSON or SVG) for a Python file or package.",
+        epilog="Example: python core/diagram_generator.py core/ --format dot --output classes.dot",
+    )
+    arg_parser.add_argument("file_path", help="Python file or package directory to process")
+    arg_parser.add_argument("--focus", metavar="CLASS",
+                            help="Only draw CLASS and the classes within --hops relationships of it")
+    arg_parser.add_argument("--hops", type=int, default=1, help="Neighbourhood radius for --focus (default: 1)")
+    arg_parser.add_argument("--namespaces", action=argparse.BooleanOptionalAction, default=None,
+                            help="Group classes by module (default: on for packages)")
+    arg_parser.add_argument("--max-nodes", type=int, default=None, metavar="N",
+                            help="Split into linked diagrams of at most N classes "
+                                 f"(default: {PACKAGE_MAX_NODES} for packages, no limit for files; 0 disables)")
+    arg_parser.add_argument("--index", metavar="DB",
+                            help="Read the package's classes from a SQLite symbol index, updating it first")
+    arg_parser.add_argument("--format", choices=list(EMITTERS), default="mermaid",
+                            help="Output format (default: mermaid)")
+    arg_parser.add_argument("--output", metavar="FILE", help="Write the diagram to FILE instead of stdout")
+    arg_parser.add_argument("--profile", metavar="DIR",
+                            help="Write cProfile stats, collapsed stacks and allocations to DIR")
+    args = arg_parser.parse_args(argv)
+    file_path = args.file_path
     
     try:
-        diagram = generate_mermaid_diagram(file_path)
-        print(diagram)
+        with maybe_profile("diagram", args.profile) as profiler:
+            with stage("diagram"):
+                is_package = os.path.isdir(file_path)
+                if is_package and args.index:
+                    from core.symbol_index import SymbolIndex
+                    with span("diagram.build_graph"), SymbolIndex(args.index) as index:
+                        index.update_project(file_path)
+                        graph = index.class_graph(file_path)
+                elif is_package:
+                    with span("diagram.build_graph"):
+                        graph = build_class_graph(file_path, project_cache_path(file_path, GRAPH_CACHE_FILE))
+                else:
+                    with span("diagram.read_file"), open(file_path, 'r', encoding='utf-8') as f:
+                        graph = graph_from_code(f.read())
+                namespaces = is_package if args.namespaces is None else args.namespaces
+                max_nodes = args.max_nodes if args.max_nodes is not None else (PACKAGE_MAX_NODES if is_package else 0)
+                with span("diagram.render"):
+                    if args.output:
+                        with open(args.output, "w", encoding="utf-8") as out:
+                            count = write_diagrams(graph, out, args.format, args.focus, args.hops,
+                                                   namespaces, max_nodes)
+                    else:
+                        write_diagrams(graph, sys.stdout, args.format, args.focus, args.hops, namespaces, max_nodes)
+        if args.output:
+            print(f"💾 {count} diagram(s) written to {args.output}")
+        if profiler is not None:
+            print(f"\nProfile written:\n{format_profile_paths(profiler)}")
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
@@ -121,3 +316,7 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Deterministic docstring style conversion (google <-> numpy <-> sphinx).
+Parses a docstring into sections and renders it back in another style without a model call.
+"""
+
+import re
+import textwrap
+
+
+STYLES = ("google", "numpy", "sphinx")
+
+# Google / NumPy section headers mapped to the structured field they fill
+_SECTION_ALIASES = {
+    "args": "params",
+    "arguments": "params",
+    "parameters": "params",
+    "params": "params",
+    "returns": "returns",
+    "return": "returns",
+    "raises": "raises",
+    "raise": "raises",
+    "attributes": "attributes",
+    "methods": "methods",
+}
+
+_GOOGLE_HEADER = re.compile(r"^([A-Za-z][A-Za-z ]*):\s*$")
+_NUMPY_UNDERLINE = re.compile(r"^\s*-{3,}\s*$")
+_SPHINX_FIELD = re.compile(r"^:(\w+)(?:\s+([^:]+?))?:\s*(.*)$")
+_GOOGLE_ENTRY = re.compile(r"^(\*{0,2}[\w.]+)\s*(?:\(([^)]*)\))?\s*:\s*(.*)$")
+_NUMPY_ENTRY = re.compile(r"^(\*{0,2}[\w.]+)\s*:\s*(.*)$")
+
+
+def empty_docstring() -> dict:
+    """Return an empty structured docstring."""
+    return {
+        "summary": "",
+        "description": "",
+        "params": [],
+        "returns": None,
+        "raises": [],
+        "attributes": [],
+        "methods": [],
+        "extra": [],
+    }
+
+
+def detect_style(docstring: str) -> str:
+    """Guess the style of a docstring from its section markup."""
+    lines = docstring.split("\n")
+    if any(_SPHINX_FIELD.match(line.strip()) for line in lines):
+        return "sphinx"
+    if any(_NUMPY_UNDERLINE.match(line) for line in lines[1:]):
+        return "numpy"
+    return "google"
+
+
+def _split_head(lines: list) -> tuple:
+    """Split leading prose lines into summary and description."""
+    text = "\n".join(lines).strip()
+    if not text:
+        return "", ""
+    paragraphs = re.split(r"\n\s*\n", text, maxsplit=1)
+    summary = " ".join(line.strip() for line in paragraphs[0].split("\n"))
+    description = paragraphs[1].strip() if len(paragraphs) > 1 else ""
+    return summary, description
+
+
+def _join(parts: list) -> str:
+    return " ".join(part.strip() for part in parts if part.strip())
+
+
+def _indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _block(lines: list) -> str:
+    """Section body with its common indentation removed but relative indentation (doctests, code) kept."""
+    return textwrap.dedent("\n".join(lines)).strip("\n")
+
+
+def _indented(text: str) -> list:
+    """Lines of text indented by four spaces, leaving blank lines empty."""
+    return [f"    {line}" if line.strip() else "" for line in text.split("\n")]
+
+
+def _parse_entries(body: list) -> list:
+    """Group an indented section body into (header line, continuation lines) pairs."""
+    body = list(body)
+    while body and not body[-1].strip():
+        body.pop()
+    non_blank = [line for line in body if line.strip()]
+    if not non_blank:
+        return []
+    base = min(_indent_of(line) for line in non_blank)
+
+    entries = []
+    for line in body:
+        if not line.strip():
+            continue
+        if _indent_of(line) <= base or not entries:
+            entries.append([line.strip(), []])
+        else:
+            entries[-1][1].append(line.strip())
+    return entries
+
+
+def _fill_section(parsed: dict, field: str, body: list, numpy: bool):
+    """Parse one Google or NumPy section body into the structured docstring."""
+    for head, rest in _parse_entries(body):
+        if field in ("params", "attributes"):
+            match = (_NUMPY_ENTRY if numpy else _GOOGLE_ENTRY).match(head)
+            if numpy and match:
+                name, type_, desc = match.group(1), match.group(2), _join(rest)
+            elif match:
+                name, type_, desc = match.group(1), match.group(2) or "", _join([match.group(3)] + rest)
+            else:
+                name, type_, desc = head, "", _join(rest)
+            parsed[field].append({"name": name, "type": (type_ or "").strip(), "description": desc})
+        elif field == "returns":
+            if numpy:
+                match = _NUMPY_ENTRY.match(head)
+                type_ = match.group(2) if match else head
+                desc = _join(rest)
+            else:
+                match = re.match(r"^([\w\[\], .|]+?):\s*(.*)$", head)
+                if match:
+                    type_, desc = match.group(1), _join([match.group(2)] + rest)
+                else:
+                    type_, desc = "", _join([head] + rest)
+            if parsed["returns"]:
+                # Several return lines: keep them all in one description
+                parsed["returns"]["description"] = _join([parsed["returns"]["description"], desc])
+            else:
+                parsed["returns"] = {"type": type_.strip(), "description": desc}
+        elif field in ("raises", "methods"):
+            key = "type" if field == "raises" else "name"
+            match = re.match(r"^([\w.]+(?:\([^)]*\))?)\s*:\s*(.*)$", head)
+            if match and not numpy:
+                name, desc = match.group(1), _join([match.group(2)] + rest)
+            else:
+                name, desc = head.rstrip(":"), _join(rest)
+            parsed[field].append({key: name, "description": desc})
+
+
+def _parse_sectioned(docstring: str, numpy: bool) -> dict:
+    """Parse a Google or NumPy docstring."""
+    parsed = empty_docstring()
+    lines = docstring.strip("\n").split("\n")
+    head, sections = [], []
+    current = None
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        title = None
+        if numpy and i + 1 < len(lines) and line.strip() and _NUMPY_UNDERLINE.match(lines[i + 1]):
+            title = line.strip()
+            i += 1
+        elif not numpy and _indent_of(line) == _indent_of(lines[0]) and _GOOGLE_HEADER.match(line.strip()):
+            title = _GOOGLE_HEADER.match(line.strip()).group(1)
+        if title is not None:
+            current = [title, []]
+            sections.append(current)
+        elif current is None:
+            head.append(line)
+        else:
+            current[1].append(line)
+        i += 1
+
+    parsed["summary"], parsed["description"] = _split_head(head)
+    for title, body in sections:
+        field = _SECTION_ALIASES.get(title.lower())
+        if field:
+            _fill_section(parsed, field, body, numpy)
+        else:
+            parsed["extra"].append({"title": title, "text": _block(body)})
+    return parsed
+
+
+def _parse_sphinx(docstring: str) -> dict:
+    """Parse a Sphinx (reST field list) docstring."""
+    parsed = empty_docstring()
+    head, fields, extras = [], [], []
+    for line in docstring.strip("\n").split("\n"):
+        match = _SPHINX_FIELD.match(line.strip())
+        if (fields or extras) and not _indent_of(line) and not match and _GOOGLE_HEADER.match(line):
+            # A titled block after the field list (e.g. "Example:"), kept verbatim
+            extras.append([_GOOGLE_HEADER.match(line).group(1), []])
+        elif extras:
+            extras[-1][1].append(line)
+        elif match:
+            fields.append([match.group(1), (match.group(2) or "").strip(), match.group(3)])
+        elif fields and line.strip():
+            fields[-1][2] = _join([fields[-1][2], line])
+        elif not fields:
+            head.append(line)
+
+    parsed["summary"], parsed["description"] = _split_head(head)
+    types = {}
+    for kind, arg, text in fields:
+        if kind in ("param", "parameter", "arg", "argument", "key", "keyword"):
+            parts = arg.split()
+            name = parts[-1] if parts else ""
+            if len(parts) > 1:
+                types[name] = " ".join(parts[:-1])
+            parsed["params"].append({"name": name, "type": "", "description": text.strip()})
+        elif kind in ("ivar", "var", "cvar"):
+            parsed["attributes"].append({"name": arg, "type": "", "description": text.strip()})
+        elif kind in ("type", "vartype"):
+            types[arg] = text.strip()
+        elif kind in ("returns", "return"):
+            returns = parsed["returns"] or {"type": "", "description": ""}
+            returns["description"] = text.strip()
+            parsed["returns"] = returns
+        elif kind == "rtype":
+            returns = parsed["returns"] or {"type": "", "description": ""}
+            returns["type"] = text.strip()
+            parsed["returns"] = returns
+        elif kind in ("raises", "raise", "except", "exception"):
+            parsed["raises"].append({"type": arg, "description": text.strip()})
+        elif kind == "method":
+            parsed["methods"].append({"name": arg, "description": text.strip()})
+        else:
+            parsed["extra"].append({"title": kind.capitalize(), "text": _join([arg, text])})
+    for title, body in extras:
+        parsed["extra"].append({"title": title, "text": _block(body)})
+
+    for entry in parsed["params"] + parsed["attributes"]:
+        entry["type"] = types.get(entry["name"], entry["type"])
+    return parsed
+
+
+def parse_docstring(docstring: str, style: str = None) -> dict:
+    """
+    Parse a docstring into a style-independent structure.
+
+    Args:
+        docstring: Docstring text (without triple quotes).
+        style: Source style; detected from the markup when omitted.
+
+    Returns:
+        Dict with summary, description, params, returns, raises, attributes, methods and extra sections.
+    """
+    style = style or detect_style(docstring)
+    if style == "sphinx":
+        return _parse_sphinx(docstring)
+    return _parse_sectioned(docstring, numpy=(style == "numpy"))
+
+
+def _render_head(parsed: dict) -> list:
+    blocks = [parsed["summary"]] if parsed["summary"] else []
+    if parsed["description"]:
+        blocks.append(parsed["description"])
+    return blocks
+
+
+def _render_google(parsed: dict) -> str:
+    blocks = _render_head(parsed)
+
+    def section(title, lines):
+        if lines:
+            blocks.append("\n".join([f"{title}:"] + _indented("\n".join(lines))))
+
+    section("Args", [f"{p['name']} ({p['type']}): {p['description']}" if p["type"]
+                     else f"{p['name']}: {p['description']}" for p in parsed["params"]])
+    returns = parsed["returns"]
+    if returns:
+        section("Returns", [f"{returns['type']}: {returns['description']}" if returns["type"]
+                            else returns["description"]])
+    section("Raises", [f"{r['type']}: {r['description']}" for r in parsed["raises"]])
+    section("Attributes", [f"{a['name']} ({a['type']}): {a['description']}" if a["type"]
+                           else f"{a['name']}: {a['description']}" for a in parsed["attributes"]])
+    section("Methods", [f"{m['name']}: {m['description']}" for m in parsed["methods"]])
+    for extra in parsed["extra"]:
+        section(extra["title"], extra["text"].split("\n"))
+    return "\n\n".join(blocks)
+
+
+def _render_numpy(parsed: dict) -> str:
+    blocks = _render_head(parsed)
+
+    def section(title, entries):
+        if entries:
+            lines = [title, "-" * len(title)]
+            for head, desc in entries:
+                lines.append(head)
+                if desc:
+                    lines.append(f"    {desc}")
+            blocks.append("\n".join(lines))
+
+    section("Parameters", [(f"{p['name']} : {p['type']}" if p["type"] else p["name"], p["description"])
+                           for p in parsed["params"]])
+    returns = parsed["returns"]
+    if returns:
+        section("Returns", [(returns["type"] or "object", returns["description"])])
+    section("Raises", [(r["type"], r["description"]) for r in parsed["raises"]])
+    section("Attributes", [(f"{a['name']} : {a['type']}" if a["type"] else a["name"], a["description"])
+                           for a in parsed["attributes"]])
+    section("Methods", [(m["name"], m["description"]) for m in parsed["methods"]])
+    for extra in parsed["extra"]:
+        blocks.append(f"{extra['title']}\n{'-' * len(extra['title'])}\n{extra['text']}")
+    return "\n\n".join(blocks)
+
+
+def _render_sphinx(parsed: dict) -> str:
+    blocks = _render_head(parsed)
+    fields = []
+    for p in parsed["params"]:
+        fields.append(f":param {p['name']}: {p['description']}")
+        if p["type"]:
+            fields.append(f":type {p['name']}: {p['type']}")
+    for a in parsed["attributes"]:
+        fields.append(f":ivar {a['name']}: {a['description']}")
+        if a["type"]:
+            fields.append(f":vartype {a['name']}: {a['type']}")
+    for m in parsed["methods"]:
+        fields.append(f":method {m['name']}: {m['description']}")
+    returns = parsed["returns"]
+    if returns:
+        if returns["description"]:
+            fields.append(f":returns: {returns['description']}")
+        if returns["type"]:
+            fields.append(f":rtype: {returns['type']}")
+    for r in parsed["raises"]:
+        fields.append(f":raises {r['type']}: {r['description']}")
+    if fields:
+        blocks.append("\n".join(fields))
+    for extra in parsed["extra"]:
+        blocks.append("\n".join([f"{extra['title']}:"] + _indented(extra["text"])))
+    return "\n\n".join(blocks)
+
+
+_RENDERERS = {"google": _render_google, "numpy": _render_numpy, "sphinx": _render_sphinx}
+
+
+def render_docstring(parsed: dict, style: str = "google") -> str:
+    """Render a structured docstring in the given style."""
+    return _RENDERERS.get(style, _render_google)(parsed).strip()
+
+
+def convert_docstring(docstring: str, style: str, source_style: str = None) -> str:
+    """
+    Convert a docstring to another style without calling the model.
+
+    Args:
+        docstring: Docstring text (without triple quotes).
+        style: Target style ("google", "numpy" or "sphinx").
+        source_style: Style of the input; detected when omitted.
+
+    Returns:
+        The docstring rendered in the target style.
+    """
+    source_style = source_style or detect_style(docstring)
+    if source_style == style or not docstring.strip():
+        return docstring
+    return render_docstring(parse_docstring(docstring, source_style), style)
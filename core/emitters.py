@@ -0,0 +1,358 @@
+"""
+Streaming diagram emitters.
+Each emitter writes one diagram of a ClassGraph to a text stream piece by piece,
+so a large diagram is never built up in memory before it is written.
+Formats: Mermaid, Graphviz DOT, PlantUML, a JSON graph and a pre-rendered SVG image.
+"""
+
+import abc
+from collections import Counter
+
+
+def class_ids(nodes: dict) -> dict:
+    """Bare class name when it is unique in the graph, otherwise the module-qualified name."""
+    counts = Counter(cls["name"] for cls in nodes.values())
+    return {qualname: cls["name"] if counts[cls["name"]] == 1 else qualname.replace(".", "_")
+            for qualname, cls in nodes.items()}
+
+
+class Emitter(abc.ABC):
+    """
+    Base emitter. write_diagram() calls, in order: begin(), then class_() for each
+    class (between start_namespace() and end_namespace() when grouping by module),
+    stub() for classes drawn only as link targets, edge() for each edge, and end().
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def begin(self, comments: list):
+        pass
+
+    def start_namespace(self, module: str):
+        pass
+
+    def end_namespace(self):
+        pass
+
+    @abc.abstractmethod
+    def class_(self, cls: dict, class_id: str):
+        """Write one class."""
+
+    @abc.abstractmethod
+    def stub(self, cls: dict, class_id: str, label: str):
+        """Write a class drawn only as the target of a link."""
+
+    @abc.abstractmethod
+    def edge(self, edge: dict, source_id: str, target_id: str):
+        """Write one edge between two written classes."""
+
+    def end(self):
+        pass
+
+
+class MermaidEmitter(Emitter):
+    """Mermaid classDiagram."""
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._indent = "    "
+        self._written = 0
+
+    @staticmethod
+    def _type(type_text: str) -> str:
+        # Mermaid writes generics as List~int~
+        return type_text.replace("[", "~").replace("]", "~").replace(" ", "")
+
+    def begin(self, comments: list):
+        self.stream.write("classDiagram\n")
+        for comment in comments:
+            self.stream.write(f"    %% {comment}\n")
+
+    def start_namespace(self, module: str):
+        # Mermaid namespace names cannot contain dots
+        self.stream.write(f"    namespace {module.replace('.', '_')} {{\n")
+        self._indent = "        "
+
+    def end_namespace(self):
+        self._indent = "    "
+        self.stream.write("    }\n")
+
+    def class_(self, cls: dict, class_id: str):
+        indent = self._indent
+        lines = [f"{indent}class {class_id} {{"]
+        for attribute in cls["attributes"]:
+            type_text = self._type(attribute["type"])
+            lines.append(f"{indent}    + {type_text + ' ' if type_text else ''}{attribute['name']}")
+        for method in cls["methods"]:
+            lines.append(f"{indent}    + {method}")
+        lines.append(f"{indent}}}")
+        self.stream.write("\n".join(lines) + "\n")
+        self._written += 1
+
+    def stub(self, cls: dict, class_id: str, label: str):
+        self.stream.write(f"    class {class_id}\n    <<{label}>> {class_id}\n")
+        self._written += 1
+
+    def edge(self, edge: dict, source_id: str, target_id: str):
+        if edge["kind"] == "inheritance":
+            self.stream.write(f"    {target_id} <|-- {source_id}\n")
+        else:
+            arrow = "*--" if edge["kind"] == "composition" else "-->"
+            many = ' "*"' if edge["many"] else ""
+            self.stream.write(f"    {source_id} {arrow}{many} {target_id} : {edge['label']}\n")
+
+    def end(self):
+        if not self._written:
+            self.stream.write("    class NoClassesFound\n")
+
+
+class DotEmitter(Emitter):
+    """Graphviz DOT digraph with record-shaped class nodes."""
+
+    _EDGE_STYLES = {
+        "inheritance": "arrowhead=empty",
+        "composition": "dir=back, arrowtail=diamond",
+        "association": "arrowhead=vee",
+    }
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        for char in "\\{}|<>\"":
+            text = text.replace(char, "\\" + char)
+        return text
+
+    def begin(self, comments: list):
+        self.stream.write("digraph classes {\n")
+        for comment in comments:
+            self.stream.write(f"    // {comment}\n")
+        self.stream.write('    rankdir=BT;\n    node [shape=record, fontname="Helvetica", fontsize=10];\n'
+                          '    edge [fontname="Helvetica", fontsize=9];\n')
+        self._indent = "    "
+
+    def start_namespace(self, module: str):
+        self.stream.write(f'    subgraph "cluster_{module}" {{\n        label="{module}";\n')
+        self._indent = "        "
+
+    def end_namespace(self):
+        self._indent = "    "
+        self.stream.write("    }\n")
+
+    def class_(self, cls: dict, class_id: str):
+        attributes = "".join(
+            self._escape(f"+ {attribute['name']}" + (f": {attribute['type']}" if attribute["type"] else "")) + "\\l"
+            for attribute in cls["attributes"])
+        methods = "".join(self._escape(f"+ {method}") + "\\l" for method in cls["methods"])
+        self.stream.write(f'{self._indent}"{class_id}" [label="{{{self._escape(cls["name"])}|{attributes}|{methods}}}"];\n')
+
+    def stub(self, cls: dict, class_id: str, label: str):
+        self.stream.write(f'    "{class_id}" [label="{{{self._escape(cls["name"])}|{self._escape(label)}}}", style=dashed];\n')
+
+    def edge(self, edge: dict, source_id: str, target_id: str):
+        # Composition draws its diamond at the tail, i.e. at the owner
+        attrs = [self._EDGE_STYLES[edge["kind"]]]
+        if edge["label"]:
+            attrs.append(f'label="{self._escape(edge["label"])}"')
+        if edge["many"]:
+            attrs.append('headlabel="*"')
+        self.stream.write(f'    "{source_id}" -> "{target_id}" [{", ".join(attrs)}];\n')
+
+    def end(self):
+        self.stream.write("}\n")
+
+
+class PlantUMLEmitter(Emitter):
+    """PlantUML class diagram."""
+
+    def begin(self, comments: list):
+        self.stream.write("@startuml\n")
+        for comment in comments:
+            self.stream.write(f"' {comment}\n")
+        self._indent = ""
+
+    def start_namespace(self, module: str):
+        self.stream.write(f"package {module} {{\n")
+        self._indent = "  "
+
+    def end_namespace(self):
+        self._indent = ""
+        self.stream.write("}\n")
+
+    def class_(self, cls: dict, class_id: str):
+        indent = self._indent
+        lines = [f"{indent}class {class_id} {{"]
+        for attribute in cls["attributes"]:
+            lines.append(f"{indent}  + {attribute['name']}" + (f" : {attribute['type']}" if attribute["type"] else ""))
+        for method in cls["methods"]:
+            lines.append(f"{indent}  + {method}")
+        lines.append(f"{indent}}}")
+        self.stream.write("\n".join(lines) + "\n")
+
+    def stub(self, cls: dict, class_id: str, label: str):
+        self.stream.write(f"class {class_id} <<{label}>>\n")
+
+    def edge(self, edge: dict, source_id: str, target_id: str):
+        if edge["kind"] == "inheritance":
+            self.stream.write(f"{target_id} <|-- {source_id}\n")
+        else:
+            arrow = "*--" if edge["kind"] == "composition" else "-->"
+            many = ' "*"' if edge["many"] else ""
+            self.stream.write(f"{source_id} {arrow}{many} {target_id} : {edge['label']}\n")
+
+    def end(self):
+        self.stream.write("@enduml\n")
+
+
+class JSONEmitter(Emitter):
+    """
+    JSON graph: {"format": "documind-class-graph", "version": 1, "comments": [...],
+    "nodes": [...], "edges": [...]}. Nodes carry id, qualname, module, name, bases,
+    attributes, methods and line; stub nodes add "stub": true and "part".
+    """
+
+    def __init__(self, stream):
+        import json
+        super().__init__(stream)
+        self._dumps = json.dumps
+        self._section = None
+        self._first = True
+
+    def _close(self) -> str:
+        return "]" if self._first else "\n  ]"
+
+    def _open(self, section: str):
+        if self._section:
+            self.stream.write(self._close() + ",\n")
+        self.stream.write(f'  "{section}": [')
+        self._section, self._first = section, True
+
+    def _item(self, section: str, value: dict):
+        if self._section != section:
+            self._open(section)
+        self.stream.write(("\n    " if self._first else ",\n    ") + self._dumps(value))
+        self._first = False
+
+    def begin(self, comments: list):
+        self.stream.write('{\n  "format": "documind-class-graph",\n  "version": 1,\n'
+                          f'  "comments": {self._dumps(comments)},\n')
+
+    def class_(self, cls: dict, class_id: str):
+        self._item("nodes", {
+            "id": class_id, "qualname": cls["qualname"], "module": cls["module"], "name": cls["name"],
+            "bases": cls["bases"], "attributes": cls["attributes"], "methods": cls["methods"],
+            "line": cls["line"],
+        })
+
+    def stub(self, cls: dict, class_id: str, label: str):
+        self._item("nodes", {"id": class_id, "qualname": cls["qualname"], "module": cls["module"],
+                             "name": cls["name"], "stub": True, "part": label})
+
+    def edge(self, edge: dict, source_id: str, target_id: str):
+        self._item("edges", {"source": source_id, "target": target_id, "kind": edge["kind"],
+                             "label": edge["label"], "many": edge["many"]})
+
+    def end(self):
+        # Both keys are always present, even when empty
+        if self._section is None:
+            self._open("nodes")
+        if self._section == "nodes":
+            self._open("edges")
+        self.stream.write(self._close() + "\n}\n")
+
+
+class SVGEmitter(Emitter):
+    """
+    SVG image laid out in pure Python (see core/svg.py). Unlike the text formats it
+    collects the class model and draws it in end(); drawings are cached by graph hash.
+    """
+
+    def __init__(self, stream, cache=None):
+        super().__init__(stream)
+        self.cache = cache
+        self._module = None
+        self._boxes = []
+        self._edges = []
+
+    def start_namespace(self, module: str):
+        self._module = module
+
+    def end_namespace(self):
+        self._module = None
+
+    def class_(self, cls: dict, class_id: str):
+        self._boxes.append({
+            "id": class_id, "title": cls["name"], "subtitle": self._module,
+            "attributes": [f"+ {a['name']}" + (f": {a['type']}" if a["type"] else "") for a in cls["attributes"]],
+            "methods": [f"+ {method}" for method in cls["methods"]],
+        })
+
+    def stub(self, cls: dict, class_id: str, label: str):
+        self._boxes.append({"id": class_id, "title": cls["name"], "subtitle": label,
+                            "attributes": [], "methods": [], "stub": True})
+
+    def edge(self, edge: dict, source_id: str, target_id: str):
+        self._edges.append({"source": source_id, "target": target_id, "kind": edge["kind"],
+                            "label": edge["label"], "many": edge["many"]})
+
+    def end(self):
+        from core import svg
+        self.stream.write(svg.render_svg(self._boxes, self._edges, self.cache or svg.CACHE) + "\n")
+
+
+EMITTERS = {
+    "mermaid": MermaidEmitter,
+    "dot": DotEmitter,
+    "plantuml": PlantUMLEmitter,
+    "json": JSONEmitter,
+    "svg": SVGEmitter,
+}
+
+
+def get_emitter(fmt: str, stream) -> Emitter:
+    if fmt not in EMITTERS:
+        raise ValueError(f"Unknown diagram format '{fmt}'; choose from {', '.join(EMITTERS)}")
+    return EMITTERS[fmt](stream)
+
+
+def write_diagram(graph, emitter: Emitter, classes=None, edges=None, namespaces: bool = False,
+                  stubs: dict = None, comments: list = None):
+    """
+    Stream one diagram of graph through emitter.
+
+    Args:
+        graph: ClassGraph to draw.
+        emitter: Emitter writing the output format.
+        classes: Qualified names of the classes to draw in full (default: all).
+        edges: Edges to draw (default: every edge between drawn classes and stubs).
+        namespaces: Group classes by module.
+        stubs: Qualified name -> label of classes drawn only as link targets.
+        comments: Lines for the diagram header.
+    """
+    nodes = graph.nodes
+    ids = class_ids(nodes)
+    classes = list(nodes) if classes is None else list(classes)
+    stubs = stubs or {}
+    if edges is None:
+        drawn = set(classes) | set(stubs)
+        edges = [edge for edge in graph.edges if edge["source"] in drawn and edge["target"] in drawn]
+
+    emitter.begin(comments or [])
+    if namespaces:
+        by_module = {}
+        for qualname in classes:
+            by_module.setdefault(nodes[qualname]["module"], []).append(qualname)
+        for module in sorted(by_module):
+            if module:
+                emitter.start_namespace(module)
+            for qualname in by_module[module]:
+                emitter.class_(nodes[qualname], ids[qualname])
+            if module:
+                emitter.end_namespace()
+    else:
+        for qualname in classes:
+            emitter.class_(nodes[qualname], ids[qualname])
+    for qualname, label in stubs.items():
+        emitter.stub(nodes[qualname], ids[qualname], label)
+    for edge in edges:
+        emitter.edge(edge, ids[edge["source"]], ids[edge["target"]])
+    emitter.end()
@@ -0,0 +1,230 @@
+"""
+Map-reduce documentation for modules and packages.
+Item docstrings -> module summaries -> package overview, each level built only from
+the compact summaries of the level below and cached on disk with hash-based invalidation.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the project root importable
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.cache_paths import project_cache_path
+from core.callgraph import generate_in_dependency_order, summary_line
+from core.class_graph import iter_python_files
+from core.parser import extract_top_level_items
+
+
+DEFAULT_CACHE_FILE = ".documind_summaries.json"
+
+# Above this many children a level is reduced in chunks first
+REDUCE_CHUNK_SIZE = 30
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    JSON-backed cache of summaries keyed by level and path.
+    Each entry stores the hash of its inputs; a changed input hash means a stale entry.
+    The CLI keeps it in the user's cache directory (project_cache_path), not in the package.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, key: str, input_hash: str):
+        """Return the cached summary if its inputs are unchanged, else None."""
+        entry = self._entries.get(key)
+        if entry and entry.get("hash") == input_hash:
+            self.hits += 1
+            return entry["summary"]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, input_hash: str, summary: str):
+        self._entries[key] = {"hash": input_hash, "summary": summary}
+        self._dirty = True
+
+    def save(self):
+        """Write the cache atomically if anything changed."""
+        if not self._dirty or not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def _reduce(generator, name: str, summaries: list, readme: bool) -> str:
+    """Summarize many children in chunks first so no prompt grows with package size."""
+    while len(summaries) > REDUCE_CHUNK_SIZE:
+        chunks = [summaries[i:i + REDUCE_CHUNK_SIZE] for i in range(0, len(summaries), REDUCE_CHUNK_SIZE)]
+        summaries = [f"{name} (part {i + 1}): {summary_line(generator.generate_package_overview(name, chunk))}"
+                     for i, chunk in enumerate(chunks)]
+    return generator.generate_package_overview(name, summaries, readme=readme)
+
+
+def summarize_module(generator, file_path: str, cache: SummaryCache, style: str = "google",
+                     max_workers: int = 4) -> str:
+    """
+    Summarize one module from its (cached) item docstrings.
+
+    Only items whose code changed are sent to the model; the module summary is
+    regenerated only when one of its item summaries changed.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        source_code = f.read()
+    module_docstring = ast.get_docstring(ast.parse(source_code))
+    items = extract_top_level_items(file_path)
+
+    known, item_hashes = {}, []
+    for index, item in enumerate(items):
+        item_hash = _digest(generator.model, style, item["code"])
+        item_hashes.append(item_hash)
+        cached = cache.get(f"item:{file_path}:{item['name']}", item_hash)
+        if cached is not None:
+            known[index] = cached
+
+    outcomes = generate_in_dependency_order(generator, items, style=style, max_workers=max_workers, known=known,
+                                            file_path=file_path)
+    item_summaries = []
+    for item, item_hash, outcome in zip(items, item_hashes, outcomes):
+        if isinstance(outcome, Exception) or outcome is None:
+            continue
+        cache.put(f"item:{file_path}:{item['name']}", item_hash, outcome)
+        item_summaries.append(f"{item['name']}: {summary_line(outcome)}")
+
+    module_name = Path(file_path).stem
+    module_hash = _digest(generator.model, module_docstring, *item_summaries)
+    summary = cache.get(f"module:{file_path}", module_hash)
+    if summary is None:
+        summary = generator.generate_module_summary(module_name, item_summaries, module_docstring)
+        cache.put(f"module:{file_path}", module_hash, summary)
+    return summary
+
+
+def summarize_package(generator, root: str, cache: SummaryCache, style: str = "google",
+                      max_workers: int = 4, readme: bool = True) -> dict:
+    """
+    Build module summaries and a package overview for a directory tree.
+
+    Virtualenv, build, VCS and cache directories are left out (see iter_python_files).
+
+    Returns:
+        dict with "name", "overview", "modules" (path -> summary), "packages" (nested
+        results) and, at the top level, "skipped" (path -> error) for unreadable modules.
+    """
+    files = [Path(path) for path in iter_python_files(root)]
+    skipped = {}
+    result = _summarize_directory(generator, Path(root), files, cache, style, max_workers, readme, skipped)
+    result["skipped"] = skipped
+    return result
+
+
+def _summarize_directory(generator, directory: Path, files: list, cache: SummaryCache, style: str,
+                         max_workers: int, readme: bool, skipped: dict) -> dict:
+    result = {"name": directory.name, "overview": "", "modules": {}, "packages": []}
+    subpackages = {}
+    for path in files:
+        if path.parent == directory:
+            subpackages.setdefault(path, None)
+        else:
+            subpackages.setdefault(directory / path.relative_to(directory).parts[0], []).append(path)
+
+    children = []
+    for path in sorted(subpackages):
+        if subpackages[path] is not None:
+            package = _summarize_directory(generator, path, subpackages[path], cache, style, max_workers,
+                                           False, skipped)
+            result["packages"].append(package)
+            if package["overview"]:
+                children.append(f"{path.name}/: {summary_line(package['overview'])}")
+        else:
+            try:
+                summary = summarize_module(generator, str(path), cache, style, max_workers)
+            except (OSError, SyntaxError, UnicodeDecodeError) as e:
+                skipped[str(path)] = str(e)
+                continue
+            result["modules"][str(path)] = summary
+            children.append(f"{path.stem}: {summary_line(summary)}")
+        cache.save()
+
+    if children:
+        package_hash = _digest(generator.model, readme, *children)
+        overview = cache.get(f"package:{directory}:{readme}", package_hash)
+        if overview is None:
+            overview = _reduce(generator, directory.name, children, readme)
+            cache.put(f"package:{directory}:{readme}", package_hash, overview)
+        result["overview"] = overview
+    cache.save()
+    return result
+
+
+def render_markdown(result: dict) -> str:
+    """Render a package result as a README-style Markdown document."""
+    lines = [f"# {result['name']}", "", result["overview"].strip(), ""]
+
+    def walk(package, depth):
+        if package["modules"]:
+            lines.append(f"{'#' * depth} Modules in `{package['name']}`")
+            lines.append("")
+            for path, summary in package["modules"].items():
+                lines.append(f"- **`{Path(path).name}`**: {' '.join(summary.split())}")
+            lines.append("")
+        for sub in package["packages"]:
+            lines.append(f"{'#' * depth} Package `{sub['name']}`")
+            lines.append("")
+            if sub["overview"]:
+                lines.extend([sub["overview"].strip(), ""])
+            walk(sub, min(depth + 1, 6))
+
+    walk(result, 2)
+    return "\n".join(lines).rstrip() + "\n"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python core/hierarchy.py <package_dir> [model]")
+        print("Example: python core/hierarchy.py core")
+        sys.exit(1)
+
+    from core.summarizer import DocstringGenerator
+
+    package_dir = sys.argv[1]
+    model = sys.argv[2] if len(sys.argv) > 2 else "gemma3:4b"
+    if not os.path.isdir(package_dir):
+        print(f"Error: Directory '{package_dir}' not found.")
+        sys.exit(1)
+
+    try:
+        generator = DocstringGenerator(model=model)
+        cache = SummaryCache(project_cache_path(package_dir, DEFAULT_CACHE_FILE))
+        result = summarize_package(generator, package_dir, cache)
+        print(render_markdown(result))
+        print(f"♻️  Summary cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+        for path, error in result["skipped"].items():
+            print(f"⚠️  Skipped {path}: {error}")
+    except FileNotFoundError:
+        print(f"Error: Directory '{package_dir}' not found.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
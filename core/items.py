@@ -0,0 +1,144 @@
+"""
+Compact item records over memory-mapped source files.
+An Item stores only its file id, byte span, kind and name; its code is sliced out
+of the memory-mapped file when something asks for item["code"]. Memory for a
+large batch therefore grows with the number of items, not with source size.
+"""
+
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+
+# Files kept mapped at once; older ones are unmapped and reopened on demand
+MAX_OPEN_FILES = 64
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+class SourceFiles:
+    """Registry of source files addressed by small integer ids, memory-mapped on demand."""
+
+    def __init__(self, max_open: int = MAX_OPEN_FILES):
+        self.max_open = max_open
+        self._files = []
+        self._ids = {}
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, path: str) -> int:
+        """Id for the file's current version; a changed file gets a new id."""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            file_id = self._ids.get(key)
+            if file_id is not None and self._files[file_id][1] == version:
+                return file_id
+            self._files.append((key, version))
+            self._ids[key] = len(self._files) - 1
+            return len(self._files) - 1
+
+    def path(self, file_id: int) -> str:
+        return self._files[file_id][0]
+
+    def _map(self, file_id: int) -> mmap.mmap:
+        # Called with the lock held. Offsets are only valid for the version that was parsed.
+        path, version = self._files[file_id]
+        stat = os.stat(path)
+        if (stat.st_mtime_ns, stat.st_size) != version:
+            raise RuntimeError(f"{path} changed since it was parsed; extract its items again")
+        mapped = self._open.get(file_id)
+        if mapped is not None:
+            self._open.move_to_end(file_id)
+            return mapped
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._open[file_id] = mapped
+        while len(self._open) > self.max_open:
+            self._open.popitem(last=False)[1].close()
+        return mapped
+
+    def read(self, file_id: int, start: int, end: int) -> str:
+        """Text of bytes [start, end) of a registered file, with newlines normalized as text mode would."""
+        if start == end:
+            return ""
+        with self._lock:
+            text = self._map(file_id)[start:end].decode("utf-8")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def close(self):
+        with self._lock:
+            for mapped in self._open.values():
+                mapped.close()
+            self._open.clear()
+
+
+SOURCES = SourceFiles()
+
+
+class Item:
+    """
+    One top-level function or class: (file id, start/end byte offsets, kind, name).
+
+    Reads like the item dicts it replaces: item["type"], item["name"] and
+    item["code"], the last materialized from the mapped file on each access.
+    """
+
+    __slots__ = ("file_id", "start", "end", "kind", "name", "sources")
+
+    _KEYS = ("type", "name", "code")
+
+    def __init__(self, file_id: int, start: int, end: int, kind: str, name: str, sources: SourceFiles = SOURCES):
+        self.file_id = file_id
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.name = name
+        self.sources = sources
+
+    @property
+    def code(self) -> str:
+        return self.sources.read(self.file_id, self.start, self.end)
+
+    @property
+    def size(self) -> int:
+        """Length of the item's source in bytes, without materializing it."""
+        return self.end - self.start
+
+    def __getitem__(self, key: str):
+        if key == "type":
+            return self.kind
+        if key == "name":
+            return self.name
+        if key == "code":
+            return self.code
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self._KEYS else default
+
+    def keys(self):
+        return self._KEYS
+
+    def __contains__(self, key) -> bool:
+        return key in self._KEYS
+
+    def __repr__(self):
+        return (f"Item({self.kind} {self.name!r}, {self.sources.path(self.file_id)}"
+                f"[{self.start}:{self.end}])")
+
+
+def line_offsets(data: bytes, lines) -> dict:
+    """Byte offset at which each wanted (1-based) line starts, scanning data once."""
+    offsets = {}
+    line, pos = 1, len(_UTF8_BOM) if data.startswith(_UTF8_BOM) else 0
+    for wanted in sorted(set(lines)):
+        while line < wanted:
+            pos = data.index(b"\n", pos) + 1
+            line += 1
+        offsets[wanted] = pos
+    return offsets
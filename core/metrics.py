@@ -0,0 +1,203 @@
+"""
+Lightweight per-stage timing spans and histograms.
+Disabled by default; span() then returns a shared no-op context manager so the
+instrumented code pays only a function call. Enable with DOCUMIND_METRICS=1 or enable().
+Aggregates and gauges export as JSON or Prometheus text format.
+"""
+
+import os
+import threading
+import time
+
+
+# Upper bounds (seconds) for stage timings; token counts use their own buckets
+TIME_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum, count, min and max."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "min", "max")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def to_dict(self) -> dict:
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "buckets": {str(bound): value for bound, value in zip(self.buckets, cumulative)},
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe("documind_stage_seconds", time.perf_counter() - self.start,
+                              stage=self.name, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Thread-safe collection of named histograms and gauges, keyed by metric name and labels."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **labels):
+        """Context manager timing one pipeline stage into documind_stage_seconds."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, labels)
+
+    def observe(self, metric: str, value: float, buckets: tuple = TIME_BUCKETS, **labels):
+        """Add one observation to a histogram."""
+        if not self.enabled or value is None:
+            return
+        key = (metric, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def set_gauge(self, metric: str, value: float, **labels):
+        """Set a gauge to its current value."""
+        if not self.enabled or value is None:
+            return
+        key = (metric, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._gauges.clear()
+
+    def snapshot(self) -> list:
+        """All histograms as [{"metric", "labels", ...stats}]."""
+        with self._lock:
+            return [dict(metric=metric, labels=dict(labels), **histogram.to_dict())
+                    for (metric, labels), histogram in sorted(self._histograms.items())]
+
+    def gauges(self) -> list:
+        """All gauges as [{"metric", "labels", "value"}]."""
+        with self._lock:
+            return [{"metric": metric, "labels": dict(labels), "value": value}
+                    for (metric, labels), value in sorted(self._gauges.items())]
+
+    def to_json(self) -> str:
+        import json
+        return json.dumps({"metrics": self.snapshot(), "gauges": self.gauges()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render every histogram and gauge in the Prometheus text exposition format."""
+        lines, typed = [], set()
+        for entry in self.snapshot():
+            metric = entry["metric"]
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            labels = [f'{key}="{value}"' for key, value in entry["labels"].items()]
+            buckets = list(entry["buckets"].items()) + [("+Inf", entry["count"])]
+            for bound, count in buckets:
+                bucket_labels = ",".join(labels + ['le="%s"' % bound])
+                lines.append(f"{metric}_bucket{{{bucket_labels}}} {count}")
+            suffix = "{%s}" % ",".join(labels) if labels else ""
+            lines.append(f"{metric}_sum{suffix} {entry['sum']}")
+            lines.append(f"{metric}_count{suffix} {entry['count']}")
+        for entry in self.gauges():
+            metric = entry["metric"]
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} gauge")
+                typed.add(metric)
+            labels = ",".join(f'{key}="{value}"' for key, value in entry["labels"].items())
+            lines.append(f"{metric}{{{labels}}} {entry['value']}" if labels else f"{metric} {entry['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write metrics to path; a .prom or .txt extension selects Prometheus format, anything else JSON."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+REGISTRY = MetricsRegistry(enabled=os.environ.get("DOCUMIND_METRICS", "").lower() in ("1", "true", "yes"))
+
+span = REGISTRY.span
+observe = REGISTRY.observe
+set_gauge = REGISTRY.set_gauge
+
+
+def enable():
+    REGISTRY.enabled = True
+
+
+def disable():
+    REGISTRY.enabled = False
+
+
+def enabled() -> bool:
+    return REGISTRY.enabled
+
+
+def format_stage_report() -> str:
+    """One line per stage: calls, total and mean seconds, slowest first."""
+    stages = [entry for entry in REGISTRY.snapshot() if entry["metric"] == "documind_stage_seconds"]
+    stages.sort(key=lambda entry: entry["sum"], reverse=True)
+    lines = []
+    for entry in stages:
+        label = entry["labels"].get("stage", "?")
+        extra = ",".join(f"{k}={v}" for k, v in entry["labels"].items() if k != "stage")
+        lines.append(f"  {label + (f' [{extra}]' if extra else ''):<40} {entry['count']:6d} call(s)  "
+                     f"total {entry['sum']:8.3f}s  mean {entry['mean'] * 1000:9.2f} ms")
+    return "\n".join(lines) or "  No stages recorded"
@@ -1,82 +1,342 @@
 """
 Integrated parser that extracts functions/classes, generates docstrings, and creates diagrams.
+Model and diagram code is imported only when the CLI needs it, so parse-only
+callers (the app, pre-commit hooks) start fast.
 """
 
 import ast
 import sys
-from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+if not __package__:
+    # Run as a script: make the project root importable
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from core.summarizer import DocstringGenerator
-from core.diagram_generator import generate_mermaid_diagram
+from core import metrics
+from core.items import SOURCES, Item, SourceFiles, line_offsets
+from core.metrics import span
+from core.profiling import format_profile_paths, maybe_profile, stage
 
 
-def extract_top_level_items(file_path: str):
-    """Extract top-level functions and classes from a Python file."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        source_code = f.read()
+def extract_top_level_items(file_path: str, sources: SourceFiles = SOURCES) -> list:
+    """
+    Extract top-level functions and classes from a Python file.
     
-    tree = ast.parse(source_code)
-    items = []
+    Returns:
+        List of Item records (file id, byte span, kind, name) that read like
+        {"type", "name", "code"} dicts; code is sliced from the memory-mapped
+        file only when accessed.
+    """
+    file_id = sources.register(file_path)
+    with span("parser.read_file"), open(file_path, "rb") as f:
+        data = f.read()
+    
+    with span("parser.ast_parse"):
+        tree = ast.parse(data)
     
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Module):
-            for item in node.body:
-                # Skip private items (starting with _)
-                if isinstance(item, ast.FunctionDef) and not item.name.startswith("_"):
-                    code = ast.get_source_segment(source_code, item) or ""
-                    items.append({"type": "function", "name": item.name, "code": code})
-                elif isinstance(item, ast.ClassDef) and not item.name.startswith("_"):
-                    code = ast.get_source_segment(source_code, item) or ""
-                    items.append({"type": "class", "name": item.name, "code": code})
-            break
+    with span("parser.extract_items"):
+        # Skip private items (starting with _)
+        nodes = [(node, "function" if isinstance(node, ast.FunctionDef) else "class") for node in tree.body
+                 if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and not node.name.startswith("_")]
+        offsets = line_offsets(data, [line for node, _ in nodes for line in (node.lineno, node.end_lineno)])
+        items = [Item(file_id, offsets[node.lineno] + node.col_offset, offsets[node.end_lineno] + node.end_col_offset,
+                      kind, node.name, sources)
+                 for node, kind in nodes]
     
     return items
 
 
+def iter_top_level_items(file_path: str, sources: SourceFiles = SOURCES):
+    """
+    Yield top-level functions and classes from a Python file as each one is completed.
+
+    The file is read line by line and split at top-level statement boundaries with
+    tokenize; each def/class statement is parsed on its own as soon as the next
+    top-level statement starts. Yields the same Item records as
+    extract_top_level_items, in source order, without waiting for the rest of the file.
+    """
+    import tokenize
+
+    file_id = sources.register(file_path)
+    # Lines of the statement being read: (byte offset, line); the first one is row `first_row`
+    pending, first_row, offset = [], 1, 0
+
+    def items_in(start_row: int, end_row: int):
+        """Parse rows start_row..end_row, one complete top-level statement, into Items."""
+        rows = pending[start_row - first_row:end_row - first_row + 1]
+        with span("parser.ast_parse"):
+            try:
+                tree = ast.parse(b"".join(line for _, line in rows))
+            except SyntaxError as e:
+                if e.lineno:
+                    e.lineno += start_row - 1
+                raise
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and not node.name.startswith("_"):
+                yield Item(file_id, rows[node.lineno - 1][0] + node.col_offset,
+                           rows[node.end_lineno - 1][0] + node.end_col_offset,
+                           "function" if isinstance(node, ast.FunctionDef) else "class", node.name, sources)
+
+    with open(file_path, "rb") as f:
+        def readline():
+            nonlocal offset
+            line, start = f.readline(), offset
+            offset += len(line)
+            if start == 0 and line.startswith(b"\xef\xbb\xbf"):
+                # ast columns on the first line do not count the BOM
+                line, start = line[3:], 3
+            pending.append((start, line))
+            return line
+
+        depth = 0
+        line_start = True        # the next significant token starts a top-level logical line
+        block_start = None       # first row of the current top-level statement, decorators included
+        keyword = None           # its first token after any decorators
+        decorating = False       # the last top-level line was a decorator
+        end_row = 0              # row of the last NEWLINE token
+
+        try:
+            for token in tokenize.tokenize(readline):
+                kind = token.type
+                if kind == tokenize.NEWLINE:
+                    end_row = token.start[0]
+                    line_start = depth == 0
+                    continue
+                if kind == tokenize.INDENT:
+                    depth += 1
+                    line_start = False
+                    continue
+                if kind == tokenize.DEDENT:
+                    depth -= 1
+                    line_start = depth == 0
+                    continue
+                if kind in (tokenize.ENCODING, tokenize.NL, tokenize.COMMENT) or not line_start:
+                    continue
+
+                line_start = False
+                if block_start is not None and not decorating:
+                    # A new top-level statement begins, so the previous one is complete
+                    if keyword in ("def", "class"):
+                        yield from items_in(block_start, end_row)
+                    del pending[:end_row - first_row + 1]
+                    first_row, block_start, keyword = end_row + 1, None, None
+                if kind == tokenize.ENDMARKER:
+                    break
+                if block_start is None:
+                    block_start = token.start[0]
+                decorating = token.string == "@"
+                if not decorating and keyword is None:
+                    keyword = token.string
+        except tokenize.TokenError as e:
+            raise SyntaxError(f"{e.args[0]} ({file_path}, line {e.args[1][0]})") from e
+
+
+def _symbol(node, kind: str, parent: str = None) -> dict:
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(base) for base in node.bases)
+        signature = f"{node.name}({bases})" if bases else node.name
+    else:
+        prefix = "async " if isinstance(node, ast.AsyncFunctionDef) else ""
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        signature = f"{prefix}{node.name}({ast.unparse(node.args)}){returns}"
+    return {
+        "kind": kind,
+        "name": node.name,
+        "qualname": f"{parent}.{node.name}" if parent else node.name,
+        "parent": parent,
+        "signature": signature,
+        "docstring": ast.get_docstring(node) or "",
+        "start_line": node.lineno,
+        "end_line": node.end_lineno,
+    }
+
+
+def extract_symbols(source_code: str) -> list:
+    """
+    Extract every top-level function and class, and each class's methods, from source code.
+
+    Args:
+        source_code: Python source code as string.
+
+    Returns:
+        List of dicts with kind (function, class or method), name, qualname, parent,
+        signature, docstring, start_line and end_line. Private names are included.
+    """
+    tree = ast.parse(source_code)
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(_symbol(node, "function"))
+        elif isinstance(node, ast.ClassDef):
+            symbols.append(_symbol(node, "class"))
+            for member in node.body:
+                if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols.append(_symbol(member, "method", node.name))
+    return symbols
+
+
+def _parse_args(argv=None):
+    """Parse command-line arguments for the integrated parser."""
+    import argparse
+    
+    arg_parser = argparse.ArgumentParser(
+        prog="python core/parser.py",
+        description="Extract functions/classes, generate docstrings, and create a class diagram.",
+        epilog="Example: python core/parser.py test_sample.py",
+    )
+    arg_parser.add_argument("file_path", help="Python file to process")
+    arg_parser.add_argument("model", nargs="?", default="gemma3:4b", help="Ollama model (default: gemma3:4b)")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="Start model calls as each function/class is parsed instead of after the "
+                                 "whole file (no callees-first ordering; ignores --batch)")
+    arg_parser.add_argument("--batch", action="store_true",
+                            help="Pack small functions into shared prompts to cut per-call overhead")
+    arg_parser.add_argument("--batch-tokens", type=int, default=1500,
+                            help="Token budget for one batched prompt (default: 1500)")
+    arg_parser.add_argument("--index-project", metavar="DIR",
+                            help="Index documented functions under DIR and reuse close matches as drafts or examples")
+    arg_parser.add_argument("--hosts", metavar="HOST:PORT,...",
+                            help="Comma-separated Ollama endpoints to load-balance across (default: DOCUMIND_OLLAMA_HOSTS)")
+    arg_parser.add_argument("--cascade", metavar="FAST_MODEL",
+                            help="Try FAST_MODEL first and re-run only items failing validation on MODEL")
+    arg_parser.add_argument("--record", metavar="FIXTURE",
+                            help="Save every prompt/response pair and its timing to a JSON fixture")
+    arg_parser.add_argument("--replay", metavar="FIXTURE",
+                            help="Answer prompts from a recorded fixture instead of calling a model")
+    arg_parser.add_argument("--repair", action="store_true",
+                            help="Validate each docstring and re-ask the model for failing sections only")
+    arg_parser.add_argument("--metrics", metavar="FILE",
+                            help="Record per-stage timings and model token counts; .prom writes Prometheus text, else JSON")
+    arg_parser.add_argument("--profile", metavar="DIR",
+                            help="Write cProfile stats, collapsed stacks and per-stage allocations to DIR")
+    arg_parser.add_argument("--workers", type=int, default=8,
+                            help="Upper bound on parallel model calls; the actual limit adapts to latency (default: 8)")
+    return arg_parser.parse_args(argv)
+
+
 def main():
     """Main entry point for the integrated parser."""
-    if len(sys.argv) < 2:
-        print("Usage: python core/parser.py <file_path> [model]")
-        print("Example: python core/parser.py test_sample.py")
-        sys.exit(1)
+    args = _parse_args()
+    with maybe_profile("parser", args.profile) as profiler:
+        _run(args)
+    if profiler is not None:
+        print(f"🔬 Profile written:\n{format_profile_paths(profiler)}")
+
+
+def _run(args):
+    """Extract items, generate docstrings and the diagram for one file."""
+    import itertools
     
-    file_path = sys.argv[1]
-    model = sys.argv[2] if len(sys.argv) > 2 else "gemma3:4b"
+    from core.backends import format_latency_report, make_backend
+    from core.callgraph import generate_as_extracted, generate_in_dependency_order
+    from core.cascade import ModelCascade, format_acceptance_rates
+    from core.concurrency import AdaptiveLimiter
+    from core.dedup import DedupIndex
+    from core.diagram_generator import generate_mermaid_diagram
+    from core.similarity import SimilarityIndex
+    from core.summarizer import DocstringGenerator
+    from core.validation import validate_function_docstring
+    from core.work_queue import WorkQueue
+    
+    file_path = args.file_path
+    model = args.model
+    if args.metrics:
+        metrics.enable()
     
     try:
         # Extract functions and classes
-        items = extract_top_level_items(file_path)
+        with stage("extract"):
+            if args.stream:
+                # Parse only up to the first item now; the rest is parsed while the model works
+                stream = iter_top_level_items(file_path)
+                first = next(stream, None)
+                items = [] if first is None else [first]
+            else:
+                items = extract_top_level_items(file_path)
         
         if not items:
             print(f"❌ No top-level functions or classes found in {file_path}")
             sys.exit(1)
         
         # Initialize docstring generator
-        generator = DocstringGenerator(model=model)
+        dedup_index = DedupIndex()
+        similarity_index = None
+        if args.index_project:
+            similarity_index = SimilarityIndex()
+            indexed = similarity_index.add_paths(args.index_project)
+            print(f"🔎 Indexed {len(similarity_index)} documented function(s) from {indexed} file(s)")
+        hosts = [host.strip() for host in args.hosts.split(",") if host.strip()] if args.hosts else None
+        generator = DocstringGenerator(model=model,
+                                       backend=make_backend(model, hosts=hosts, record=args.record,
+                                                            replay=args.replay),
+                                       dedup_index=dedup_index, similarity_index=similarity_index,
+                                       auto_repair=args.repair)
+        
+        # Cascade mode: a fast model answers first, the main model only gets rejected items.
+        # The fast tier keeps no dedup index so unvalidated docstrings are never reused.
+        cascade = None
+        first_tier = generator
+        if args.cascade:
+            first_tier = DocstringGenerator(model=args.cascade,
+                                            backend=make_backend(args.cascade, hosts=hosts, record=args.record,
+                                                                 replay=args.replay),
+                                            similarity_index=similarity_index, auto_repair=args.repair)
+            cascade = ModelCascade([first_tier, generator])
+        writer = cascade or generator
+        
+        # Pay the model load up front so it is reported separately
+        try:
+            load_time = writer.warm_up()
+            print(f"⏱️  Model warm-up ({args.cascade + ' + ' if cascade else ''}{model}): {load_time:.2f}s")
+        except RuntimeError as e:
+            print(f"⚠️  Model warm-up failed: {e}")
+        
+        # Batch mode: document small functions several at a time up front
+        batched = {}
+        if args.batch and args.stream:
+            print("⚠️  --batch is ignored with --stream")
+        elif args.batch:
+            functions = [item for item in items if item["type"] == "function"]
+            try:
+                batched = first_tier.generate_function_docstrings_batched(
+                    functions, token_budget=args.batch_tokens
+                )
+                print(f"📦 Batched {len(functions)} function(s); "
+                      f"batch success rate {first_tier.batch_size.success_rate:.0%}")
+            except Exception as e:
+                print(f"⚠️  Batch generation failed, falling back to single calls: {e}")
+        
+        # Generate docstrings callees-first so callers get their summaries as context
+        known = {index: batched[item["name"]] for index, item in enumerate(items)
+                 if item["type"] == "function" and item["name"] in batched}
+        if cascade:
+            # Batched fast-tier answers still have to pass validation
+            known = {index: doc for index, doc in known.items()
+                     if not validate_function_docstring(items[index]["code"], doc)}
+        work_queue = WorkQueue(workers=args.workers, limiter=AdaptiveLimiter(maximum=args.workers))
+        try:
+            with stage("docstrings"):
+                if args.stream:
+                    items, outcomes = generate_as_extracted(writer, itertools.chain(items, stream),
+                                                            work_queue=work_queue, file_path=file_path)
+                else:
+                    outcomes = generate_in_dependency_order(writer, items, known=known, work_queue=work_queue,
+                                                            file_path=file_path)
+        finally:
+            work_queue.shutdown()
         
-        # Generate docstrings for each item
         docstrings = []
-        for item in items:
+        for item, outcome in zip(items, outcomes):
             print(f"\n{'=' * 70}")
             print(f"{'🔧 Function' if item['type'] == 'function' else '🏷️  Class'}: {item['name']}")
             print("-" * 70)
             
-            try:
-                if item["type"] == "function":
-                    docstring = generator.generate_function_docstring(item["code"])
-                else:  # class
-                    result = generator.generate_class_docstring(item["code"], include_methods=False)
-                    docstring = result.get("class_docstring", "")
-                
-                docstrings.append({"name": item["name"], "type": item["type"], "docstring": docstring})
-                print(f'"""\n{docstring}\n"""')
-                
-            except Exception as e:
-                print(f"❌ Error generating docstring: {e}")
+            if isinstance(outcome, Exception):
+                print(f"❌ Error generating docstring: {outcome}")
                 docstrings.append({"name": item["name"], "type": item["type"], "docstring": ""})
+            else:
+                docstrings.append({"name": item["name"], "type": item["type"], "docstring": outcome})
+                print(f'"""\n{outcome}\n"""')
         
         # Generate Mermaid diagram
         print(f"\n{'=' * 70}")
@@ -84,13 +344,39 @@ def main():
         print("-" * 70)
         
         try:
-            diagram = generate_mermaid_diagram(file_path)
+            with stage("diagram"):
+                diagram = generate_mermaid_diagram(file_path)
             print(diagram)
         except Exception as e:
             print(f"❌ Error generating diagram: {e}")
         
         print(f"\n{'=' * 70}")
         print(f"✅ Processed {len(items)} item(s) successfully")
+        print(f"⏱️  {format_latency_report(writer.latency_report())}")
+        if cascade:
+            print(f"🪜 Cascade acceptance: {format_acceptance_rates(cascade.acceptance_rates())}")
+        queue_stats = work_queue.stats()
+        if queue_stats["completed"]:
+            print(f"⏱️  Time to first docstring: {queue_stats['time_to_first_result']:.2f}s | "
+                  f"Mean latency: {queue_stats['mean_latency']:.2f}s | "
+                  f"Concurrency limit: {queue_stats['concurrency_limit']}")
+        dedup_stats = dedup_index.stats()
+        print(f"♻️  Structural dedup: {dedup_stats['hits']}/{dedup_stats['lookups']} "
+              f"item(s) reused ({dedup_stats['hit_rate']:.0%})")
+        if similarity_index is not None:
+            print(f"🔎 Similar-code drafts: {generator.similarity_stats['reused']} reused, "
+                  f"{generator.similarity_stats['examples']} used as examples")
+        if args.repair:
+            for tier in ([first_tier] if cascade else []) + [generator]:
+                stats = tier.repair_stats
+                sections = ", ".join(f"{name} x{count}" for name, count in sorted(stats["sections"].items()))
+                print(f"🩹 Section repair ({tier.model}): {stats['repaired']}/{stats['checked']} docstring(s) "
+                      f"repaired{' (' + sections + ')' if sections else ''}")
+        if metrics.enabled():
+            print(f"📈 Stage timings:\n{metrics.format_stage_report()}")
+            if args.metrics:
+                metrics.REGISTRY.write(args.metrics)
+                print(f"💾 Metrics written to {args.metrics}")
         print(f"{'=' * 70}\n")
         
     except FileNotFoundError:
@@ -0,0 +1,252 @@
+"""
+Built-in profiling for the CLIs and the app.
+A Profiler run writes, into one output directory:
+  <name>.pstats     cProfile data for the profiled thread and work-queue jobs run meanwhile (every thread on 3.12+)
+  <name>.collapsed  sampled stacks of every thread, "frame;frame;frame count" (flame graph input)
+  <name>.alloc.txt  tracemalloc top allocators per stage
+Enable with --profile DIR on core/parser.py and core/diagram_generator.py,
+or DOCUMIND_PROFILE=DIR for the Streamlit app.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# cProfile, pstats and tracemalloc are imported only when a profile actually runs
+
+
+# Output directory for app profiles; unset disables profiling in the app
+PROFILE_DIR = os.environ.get("DOCUMIND_PROFILE") or None
+
+# From Python 3.12 cProfile is built on sys.monitoring: the run's profile already sees
+# every thread, and a second profiler cannot be enabled while it is active
+_PROCESS_WIDE_PROFILE = sys.version_info >= (3, 12)
+
+# Only one profiler runs at a time (tracemalloc is process-wide)
+_active = None
+_active_lock = threading.Lock()
+_run_numbers = itertools.count(1)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StackSampler(threading.Thread):
+    """Samples the stacks of all other threads at a fixed interval."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="documind-profiler-sampler", daemon=True)
+        self.interval = interval
+        self.counts = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profiler:
+    """
+    Context manager profiling everything run inside it.
+
+    Use stage(name) inside the run to attribute allocations to pipeline stages;
+    the module-level stage() does the same for whichever profiler is active.
+    """
+
+    def __init__(self, output_dir: str, name: str = "documind", interval: float = 0.005, top: int = 10):
+        self.output_dir = output_dir
+        self.name = name
+        self.interval = interval
+        self.top = top
+        self.stages = []
+        self.paths = {}
+        self._profiles = []
+        self._profiles_lock = threading.Lock()
+        self._sampler = None
+        self._started_tracemalloc = False
+        self._thread = None
+        self._finished = False
+
+    @contextmanager
+    def thread_profile(self):
+        """
+        Profile the calling worker thread for the duration of the block.
+
+        The profile is switched off in the same thread when the block ends, so
+        long-lived threads never stay profiled after the run.
+        """
+        import cProfile
+        if _PROCESS_WIDE_PROFILE or threading.get_ident() == self._thread or self._finished:
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool owns this thread: profiling must never fail the job
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._profiles_lock:
+                if not self._finished:
+                    self._profiles.append(profile)
+
+    def __enter__(self):
+        global _active
+        import cProfile
+        import tracemalloc
+        os.makedirs(self.output_dir, exist_ok=True)
+        with _active_lock:
+            if _active is not None:
+                raise RuntimeError("Another profiler is already running")
+            _active = self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._started = time.perf_counter()
+        self._sampler = _StackSampler(self.interval)
+        self._sampler.start()
+        self._thread = threading.get_ident()
+        main_profile = cProfile.Profile()
+        self._profiles.append(main_profile)
+        main_profile.enable()
+        return self
+
+    @staticmethod
+    def _snapshot():
+        import tracemalloc
+        # Leave out the profiler's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record the top allocators (by net size) of one stage of the run."""
+        before = self._snapshot()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            after = self._snapshot()
+            diff = after.compare_to(before, "lineno")
+            diff.sort(key=lambda stat: stat.size_diff, reverse=True)
+            self.stages.append({"stage": name, "seconds": time.perf_counter() - started,
+                                "top": diff[:self.top]})
+
+    def __exit__(self, *exc):
+        global _active
+        import tracemalloc
+        self._profiles[0].disable()
+        with self._profiles_lock:
+            # Jobs still running keep their profile to themselves
+            self._finished = True
+        self._sampler.stop()
+        elapsed = time.perf_counter() - self._started
+        _, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        with _active_lock:
+            _active = None
+        self._write(elapsed, peak)
+        return False
+
+    def _write(self, elapsed: float, peak: int):
+        import pstats
+        base = os.path.join(self.output_dir, self.name)
+        with self._profiles_lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                # A thread that never ran any Python code has no stats
+                continue
+        stats.dump_stats(f"{base}.pstats")
+
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._sampler.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+        with open(f"{base}.alloc.txt", "w", encoding="utf-8") as f:
+            f.write(f"{self.name}: {elapsed:.3f}s, peak traced memory {peak / 1024:.1f} KiB\n")
+            for entry in self.stages:
+                f.write(f"\n[{entry['stage']}] {entry['seconds']:.3f}s\n")
+                for stat in entry["top"]:
+                    frame = stat.traceback[0]
+                    f.write(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  "
+                            f"{frame.filename}:{frame.lineno}\n")
+        self.paths = {"pstats": f"{base}.pstats", "collapsed": f"{base}.collapsed", "alloc": f"{base}.alloc.txt"}
+
+
+def thread_profile():
+    """Profile the calling thread under the active profiler; a no-op when nothing is being profiled."""
+    profiler = _active
+    if profiler is None:
+        return _noop()
+    return profiler.thread_profile()
+
+
+def stage(name: str):
+    """Allocation stage of the active profiler; a no-op when nothing is being profiled."""
+    profiler = _active
+    if profiler is None:
+        return _noop()
+    return profiler.stage(name)
+
+
+@contextmanager
+def _noop():
+    yield
+
+
+@contextmanager
+def maybe_profile(name: str, output_dir: str = None):
+    """
+    Profile the block when an output directory is given (or DOCUMIND_PROFILE is set).
+    Skipped, not queued, while another profile is running.
+    """
+    output_dir = output_dir or PROFILE_DIR
+    if not output_dir or _active is not None:
+        yield None
+        return
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    profiler = Profiler(output_dir, f"{name}-{stamp}-{os.getpid()}-{next(_run_numbers)}")
+    try:
+        profiler.__enter__()
+    except RuntimeError:
+        yield None
+        return
+    try:
+        yield profiler
+    finally:
+        profiler.__exit__(None, None, None)
+
+
+def format_profile_paths(profiler) -> str:
+    return "\n".join(f"  {kind:<9} {path}" for kind, path in profiler.paths.items())
@@ -0,0 +1,173 @@
+"""
+Lexical similarity index over already-documented functions.
+Finds the closest documented neighbour of an undocumented item with TF-IDF cosine similarity.
+"""
+
+import ast
+import hashlib
+import keyword
+import math
+import re
+import textwrap
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from core.dedup import adapt_docstring, normalize_code
+
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_STRING_LITERAL = re.compile(r'("""|\'\'\')(.*?)\1', re.DOTALL)
+
+
+def code_terms(code: str) -> list:
+    """Split identifiers in code (docstrings removed) into lowercase sub-words."""
+    code = _STRING_LITERAL.sub(" ", code)
+    terms = []
+    for identifier in _IDENTIFIER.findall(code):
+        if keyword.iskeyword(identifier) or identifier in ("self", "cls"):
+            continue
+        for part in _CAMEL_BOUNDARY.sub("_", identifier).split("_"):
+            if len(part) > 1:
+                terms.append(part.lower())
+    return terms
+
+
+def _parameters(node) -> list:
+    args = node.args
+    return [arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs if arg.arg not in ("self", "cls")]
+
+
+def _signature(code: str):
+    """Return (name, parameters) of the first function in code, or (None, [])."""
+    try:
+        tree = ast.parse(textwrap.dedent(code))
+    except SyntaxError:
+        return None, []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            return node.name, _parameters(node)
+    return None, []
+
+
+def _structure(code: str):
+    """Structural (dedup) hash of code, or None if it does not parse."""
+    try:
+        return normalize_code(code)[0]
+    except SyntaxError:
+        return None
+
+
+class SimilarityIndex:
+    """
+    TF-IDF index of documented functions.
+    Uses an inverted index so a query only scores entries that share a term with it.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._vectors = []
+        self._postings = defaultdict(set)
+        self._document_frequency = Counter()
+        self._idf = {}
+        self._weighted = []
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, name: str, code: str, docstring: str, parameters: list = None):
+        """Add one documented function to the index."""
+        terms = Counter(code_terms(code))
+        if not terms or not docstring:
+            return
+        entry_id = len(self.entries)
+        self.entries.append({
+            "name": name,
+            "parameters": parameters if parameters is not None else _signature(code)[1],
+            "docstring": docstring,
+            "code_hash": hashlib.sha256(code.strip().encode("utf-8")).hexdigest(),
+            "structure": _structure(code),
+        })
+        self._vectors.append(terms)
+        for term in terms:
+            self._postings[term].add(entry_id)
+            self._document_frequency[term] += 1
+        self._dirty = True
+
+    def add_source(self, source_code: str):
+        """Index every documented function and method in a module's source."""
+        tree = ast.parse(source_code)
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                docstring = ast.get_docstring(node)
+                if docstring:
+                    code = ast.get_source_segment(source_code, node) or ""
+                    self.add(node.name, code, docstring, _parameters(node))
+
+    def add_paths(self, root: str) -> int:
+        """Index all Python files under a directory (or a single file); returns files indexed."""
+        root_path = Path(root)
+        paths = [root_path] if root_path.is_file() else sorted(root_path.rglob("*.py"))
+        indexed = 0
+        for path in paths:
+            try:
+                self.add_source(path.read_text(encoding="utf-8"))
+                indexed += 1
+            except (OSError, UnicodeDecodeError, SyntaxError, ValueError):
+                continue
+        return indexed
+
+    def _weights(self, terms: Counter) -> dict:
+        weights = {term: (1 + math.log(count)) * self._idf.get(term, 0.0) for term, count in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: w / norm for term, w in weights.items()}
+
+    def _refresh(self):
+        if not self._dirty:
+            return
+        total = len(self.entries)
+        self._idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in self._document_frequency.items()}
+        self._weighted = [self._weights(vector) for vector in self._vectors]
+        self._dirty = False
+
+    def nearest(self, code: str, k: int = 1) -> list:
+        """
+        Find the documented functions most similar to code.
+
+        Returns:
+            List of (score, entry) pairs, best first. The item itself is never returned.
+        """
+        if not self.entries:
+            return []
+        self._refresh()
+        query = self._weights(Counter(code_terms(code)))
+        code_hash = hashlib.sha256(code.strip().encode("utf-8")).hexdigest()
+
+        candidates = set()
+        for term in query:
+            candidates.update(self._postings.get(term, ()))
+
+        scored = []
+        for entry_id in candidates:
+            if self.entries[entry_id]["code_hash"] == code_hash:
+                continue
+            weighted = self._weighted[entry_id]
+            score = sum(weight * weighted.get(term, 0.0) for term, weight in query.items())
+            scored.append((score, entry_id))
+        scored.sort(reverse=True)
+        return [(score, self.entries[entry_id]) for score, entry_id in scored[:k]]
+
+    def same_structure(self, code: str, entry: dict) -> bool:
+        """Whether code is identical to a neighbour up to names and constants, not just lexically close."""
+        structure = entry.get("structure")
+        return structure is not None and structure == _structure(code)
+
+    def draft_docstring(self, code: str, entry: dict) -> str:
+        """Adapt a neighbour's docstring to code by substituting the function and parameter names (None if unsafe)."""
+        name, parameters = _signature(code)
+        old_names, new_names = [entry["name"]], [name or entry["name"]]
+        if len(parameters) == len(entry["parameters"]):
+            old_names += entry["parameters"]
+            new_names += parameters
+        return adapt_docstring(entry["docstring"], old_names, new_names)
@@ -1,6 +1,125 @@
-import subprocess
 import re
 import ast
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+if not __package__:
+    # Run as a script: make the project root importable
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.backends import DEFAULT_KEEP_ALIVE, make_backend
+from core.docstring_styles import convert_docstring
+from core.metrics import span
+from core.validation import repair_class_docstring, repair_function_docstring, validate_function_docstring
+
+
+FUNCTION_STYLE_GUIDES = {
+    "google": """Google-style format:
+- One-line summary (no blank line after)
+- Blank line
+- Detailed description (2-3 sentences max, if needed)
+- Blank line
+- Args:
+    param_name (type): Brief description.
+- Returns:
+    type: Brief description.
+- Raises:
+    ExceptionType: Brief description (only if applicable).""",
+    "numpy": """NumPy-style format:
+- Brief summary (no blank line after)
+- Blank line
+- Extended summary (2-3 sentences max, if needed)
+- Blank line
+- Parameters
+----------
+param_name : type
+    Brief description.
+- Returns
+-------
+type
+    Brief description.
+- Raises
+------
+ExceptionType
+    Brief description (only if applicable).""",
+    "sphinx": """Sphinx-style format:
+- Brief summary
+- Blank line
+- Detailed description (2-3 sentences max, if needed)
+- :param param_name: Brief description
+- :type param_name: type
+- :returns: Brief description
+- :rtype: type
+- :raises ExceptionType: Brief description (only if applicable)"""
+}
+
+CLASS_STYLE_GUIDES = {
+    "google": """Google-style format:
+- One-line summary (no blank line after)
+- Blank line
+- Detailed description (2-3 sentences max, if needed)
+- Blank line
+- Attributes:
+    attr_name (type): Brief description.
+- Methods:
+    method_name: Brief description.""",
+    "numpy": """NumPy-style format:
+- Brief summary (no blank line after)
+- Blank line
+- Extended summary (2-3 sentences max, if needed)
+- Blank line
+- Attributes
+----------
+attr_name : type
+    Brief description.
+- Methods
+-------
+method_name
+    Brief description.""",
+    "sphinx": """Sphinx-style format:
+- Brief summary
+- Blank line
+- Detailed description (2-3 sentences max, if needed)
+- :ivar attr_name: Brief description
+- :type attr_name: type
+- :method method_name: Brief description"""
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt budgeting (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class AdaptiveBatchSize:
+    """
+    Tracks how many functions to pack into one batched prompt.
+    Grows by one after a fully successful batch and halves after a failed one.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 2, maximum: int = 16):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.batches = 0
+        self.successes = 0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.batches if self.batches else 1.0
+
+    def record(self, success: bool):
+        """Update the batch size from the outcome of one batch."""
+        self.batches += 1
+        if success:
+            self.successes += 1
+            self.size = min(self.maximum, self.size + 1)
+        else:
+            self.size = max(self.minimum, self.size // 2)
 
 
 class DocstringGenerator:
@@ -9,38 +128,71 @@ class DocstringGenerator:
     Works completely offline, no API key required.
     """
 
-    def __init__(self, model: str = "gemma3:4b"):
+    def __init__(self, model: str = "gemma3:4b", keep_alive: str = DEFAULT_KEEP_ALIVE, backend=None,
+                 max_cache_entries: int = 1024, dedup_index=None, similarity_index=None,
+                 reuse_threshold: float = 0.95, example_threshold: float = 0.5, auto_repair: bool = False):
         """
         Initialize the generator and verify Ollama + model availability.
+
+        A custom backend (anything with generate/check_available) can be passed
+        in place of the default Ollama CLI backend; DOCUMIND_OLLAMA_HOSTS selects a
+        load-balanced pool of Ollama endpoints instead. With a DedupIndex, structurally
+        identical items reuse an adapted docstring instead of calling the model.
+        With a SimilarityIndex, a close documented neighbour is reused as a draft when it
+        scores >= reuse_threshold, has the same structure and its adapted docstring
+        validates; otherwise it is passed as a short example (>= example_threshold).
+        With auto_repair, model output is validated against the AST and only the failing
+        sections are fixed (see core.validation) instead of regenerating the docstring.
         """
         self.model = model
+        self.backend = backend or make_backend(model, keep_alive)
+        self.batch_size = AdaptiveBatchSize()
+        # Generated docstrings keyed by code; served in any style via conversion
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.max_cache_entries = max_cache_entries
+        self.dedup_index = dedup_index
+        self.similarity_index = similarity_index
+        self.reuse_threshold = reuse_threshold
+        self.example_threshold = example_threshold
+        self.similarity_stats = {"reused": 0, "examples": 0}
+        self.auto_repair = auto_repair
+        self.repair_stats = {"checked": 0, "repaired": 0, "sections": {}}
+        self._stats_lock = threading.Lock()
         self._check_ollama_available()
 
     def _check_ollama_available(self):
-        """Ensure Ollama is installed and the chosen model exists."""
-        try:
-            # check ollama CLI
-            version = subprocess.run(["ollama", "--version"], capture_output=True, text=True)
-            if version.returncode != 0:
-                raise RuntimeError("Ollama not detected. Install from https://ollama.ai")
+        """Ensure the backend is reachable and the chosen model exists."""
+        self.backend.check_available()
 
-            # verify model
-            models = subprocess.run(["ollama", "list"], capture_output=True, text=True)
-            if self.model not in models.stdout:
-                raise RuntimeError(
-                    f"Model '{self.model}' not found.\nRun: ollama pull {self.model}\n\nAvailable:\n{models.stdout}"
-                )
+    def _run_model(self, prompt: str) -> str:
+        """Send prompt to the backend and return its response."""
+        with span("summarizer.model_call", model=self.model):
+            return self.backend.generate(prompt)
 
-        except FileNotFoundError:
-            raise RuntimeError("Ollama not installed or not in PATH. Download from https://ollama.ai")
+    def warm_up(self) -> float:
+        """Load the model ahead of the first real request; returns the load time."""
+        return self.backend.warm_up()
 
-    def _run_model(self, prompt: str) -> str:
-        """Send prompt to Ollama and return its response."""
-        result = subprocess.run(["ollama", "run", self.model, prompt],
-                                capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"Ollama error: {result.stderr}")
-        return result.stdout.strip()
+    def latency_report(self) -> dict:
+        """Cold-start vs. warm latency observed by the backend."""
+        return self.backend.latency_report()
+
+    def repair_docstring(self, code: str, docstring: str, style: str = "google", kind: str = "function") -> str:
+        """Validate a docstring and re-ask the model for its failing sections only."""
+        repair = repair_class_docstring if kind == "class" else repair_function_docstring
+        try:
+            with span("summarizer.repair"):
+                docstring, sections = repair(code, docstring, self._run_model, style)
+        except RuntimeError:
+            sections = []
+        with self._stats_lock:
+            self.repair_stats["checked"] += 1
+            if sections:
+                self.repair_stats["repaired"] += 1
+            for section in sections:
+                self.repair_stats["sections"][section] = self.repair_stats["sections"].get(section, 0) + 1
+        return docstring
 
     def _extract_function_name(self, code: str) -> str:
         """Extract the function name via AST."""
@@ -64,61 +216,95 @@ class DocstringGenerator:
             pass
         return "UnknownClass"
 
+    def _cache_key(self, kind: str, code: str, context: str = None, *extra) -> str:
+        """Hash the inputs that determine a generated docstring (style excluded)."""
+        raw = "\0".join([self.model, kind, code, context or ""] + [str(e) for e in extra])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str, style: str):
+        """Return a cached result rendered in the requested style, or None."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            self._cache.move_to_end(key)
+        cached_style, value = entry
+        if isinstance(value, str):
+            return convert_docstring(value, style, cached_style) if cached_style != style else value
+        result = dict(value, methods=dict(value["methods"]))
+        if cached_style != style:
+            result["class_docstring"] = convert_docstring(value["class_docstring"], style, cached_style)
+            result["methods"] = {name: convert_docstring(doc, style, cached_style)
+                                 for name, doc in value["methods"].items()}
+        return result
+
+    def _cache_put(self, key: str, style: str, value):
+        with self._cache_lock:
+            self._cache[key] = (style, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
     def _clean_code(self, code: str) -> str:
         """Remove existing docstrings and extra spaces."""
         code = re.sub(r'""".*?"""', '', code, flags=re.DOTALL)
         code = re.sub(r"'''.*?'''", '', code, flags=re.DOTALL)
         return code.strip()
 
-    def generate_function_docstring(self, function_code: str, context: str = None, style: str = "google") -> str:
-        """Generate docstring for a Python function."""
+    def generate_function_docstring(self, function_code: str, context: str = None, style: str = "google",
+                                    callee_context: str = None) -> str:
+        """
+        Generate docstring for a Python function.
+
+        callee_context (summaries of the functions it calls) only feeds the prompt; unlike
+        a user-supplied context it does not rule out reusing a duplicate's docstring.
+        """
         func_name = self._extract_function_name(function_code)
         code_clean = self._clean_code(function_code)
         
-        style_guides = {
-            "google": """Google-style format:
-- One-line summary (no blank line after)
-- Blank line
-- Detailed description (2-3 sentences max, if needed)
-- Blank line
-- Args:
-    param_name (type): Brief description.
-- Returns:
-    type: Brief description.
-- Raises:
-    ExceptionType: Brief description (only if applicable).""",
-            "numpy": """NumPy-style format:
-- Brief summary (no blank line after)
-- Blank line
-- Extended summary (2-3 sentences max, if needed)
-- Blank line
-- Parameters
-----------
-param_name : type
-    Brief description.
-- Returns
--------
-type
-    Brief description.
-- Raises
-------
-ExceptionType
-    Brief description (only if applicable).""",
-            "sphinx": """Sphinx-style format:
-- Brief summary
-- Blank line
-- Detailed description (2-3 sentences max, if needed)
-- :param param_name: Brief description
-- :type param_name: type
-- :returns: Brief description
-- :rtype: type
-- :raises ExceptionType: Brief description (only if applicable)"""
-        }
-        style_guide = style_guides.get(style, style_guides["google"])
+        with span("summarizer.cache_lookup"):
+            cache_key = self._cache_key("function", code_clean, context, callee_context or "")
+            cached = self._cache_get(cache_key, style)
+        if cached is not None:
+            return cached
+        
+        if self.dedup_index is not None and not context:
+            reused = self.dedup_index.lookup(function_code, style)
+            if reused is not None:
+                self._cache_put(cache_key, style, reused)
+                return reused
+        
+        example_text = ""
+        if self.similarity_index is not None and not context:
+            neighbours = self.similarity_index.nearest(function_code, k=1)
+            draft = None
+            # A lexically close neighbour may still do something else (sub vs. add), so its
+            # docstring is reused only for the same structure and only if it checks out
+            if neighbours and neighbours[0][0] >= self.reuse_threshold \
+                    and self.similarity_index.same_structure(function_code, neighbours[0][1]):
+                draft = self.similarity_index.draft_docstring(function_code, neighbours[0][1])
+                if draft is not None and validate_function_docstring(function_code, draft):
+                    draft = None
+            if draft is not None:
+                draft = convert_docstring(draft, style)
+                with self._stats_lock:
+                    self.similarity_stats["reused"] += 1
+                self._cache_put(cache_key, style, draft)
+                return draft
+            if neighbours and neighbours[0][0] >= self.example_threshold:
+                example = convert_docstring(neighbours[0][1]["docstring"], style)
+                example_text = f"\n\nDocstring of a similar function in this project (match its tone and length):\n{example[:600]}"
+                with self._stats_lock:
+                    self.similarity_stats["examples"] += 1
         
-        context_text = f"\n\nAdditional context: {context}" if context else ""
+        with span("summarizer.build_prompt"):
+            style_guide = FUNCTION_STYLE_GUIDES.get(style, FUNCTION_STYLE_GUIDES["google"])
+        
+            context_text = f"\n\nAdditional context: {context}" if context else example_text
+            if callee_context:
+                context_text += f"\n\n{callee_context}"
 
-        prompt = f"""You are an expert Python developer. Generate a clean, concise {style} docstring for this function.
+            prompt = f"""You are an expert Python developer. Generate a clean, concise {style} docstring for this function.
 
 Function name: {func_name}
 Code:
@@ -150,49 +336,43 @@ DO NOT add "raises TypeError if inputs are not numbers" unless that check actual
 Return ONLY the docstring content (without triple quotes). Start directly with the one-line summary."""
 
         response = self._run_model(prompt)
-        return self._clean_response(response)
+        with span("summarizer.clean_response"):
+            docstring = self._clean_response(response)
+        if self.auto_repair:
+            docstring = self.repair_docstring(function_code, docstring, style)
+        self._cache_put(cache_key, style, docstring)
+        if self.dedup_index is not None and not context:
+            self.dedup_index.add(function_code, docstring, style)
+        return docstring
     
-    def generate_class_docstring(self, class_code: str, context: str = None, style: str = "google", include_methods: bool = False) -> dict:
-        """Generate docstring for a Python class."""
+    def generate_class_docstring(self, class_code: str, context: str = None, style: str = "google", include_methods: bool = False,
+                                 callee_context: str = None) -> dict:
+        """Generate docstring for a Python class (callee_context as in generate_function_docstring)."""
         class_name = self._extract_class_name(class_code)
         code_clean = self._clean_code(class_code)
         
-        style_guides = {
-            "google": """Google-style format:
-- One-line summary (no blank line after)
-- Blank line
-- Detailed description (2-3 sentences max, if needed)
-- Blank line
-- Attributes:
-    attr_name (type): Brief description.
-- Methods:
-    method_name: Brief description.""",
-            "numpy": """NumPy-style format:
-- Brief summary (no blank line after)
-- Blank line
-- Extended summary (2-3 sentences max, if needed)
-- Blank line
-- Attributes
-----------
-attr_name : type
-    Brief description.
-- Methods
--------
-method_name
-    Brief description.""",
-            "sphinx": """Sphinx-style format:
-- Brief summary
-- Blank line
-- Detailed description (2-3 sentences max, if needed)
-- :ivar attr_name: Brief description
-- :type attr_name: type
-- :method method_name: Brief description"""
-        }
-        style_guide = style_guides.get(style, style_guides["google"])
+        with span("summarizer.cache_lookup"):
+            cache_key = self._cache_key("class", code_clean, context, include_methods, callee_context or "")
+            cached = self._cache_get(cache_key, style)
+        if cached is not None:
+            return cached
+        
+        use_dedup = self.dedup_index is not None and not context and not include_methods
+        if use_dedup:
+            reused = self.dedup_index.lookup(class_code, style)
+            if reused is not None:
+                result = {'class_name': class_name, 'class_docstring': reused, 'methods': {}}
+                self._cache_put(cache_key, style, dict(result, methods={}))
+                return result
         
-        context_text = f"\n\nAdditional context: {context}" if context else ""
+        with span("summarizer.build_prompt"):
+            style_guide = CLASS_STYLE_GUIDES.get(style, CLASS_STYLE_GUIDES["google"])
+        
+            context_text = f"\n\nAdditional context: {context}" if context else ""
+            if callee_context:
+                context_text += f"\n\n{callee_context}"
 
-        prompt = f"""You are an expert Python developer. Generate a clean, concise {style} docstring for this class.
+            prompt = f"""You are an expert Python developer. Generate a clean, concise {style} docstring for this class.
 
 Class name: {class_name}
 Code:
@@ -225,7 +405,10 @@ DO NOT add "raises AttributeError if value is not set" unless that check actuall
 Return ONLY the docstring content (without triple quotes). Start directly with the one-line summary."""
 
         response = self._run_model(prompt)
-        class_docstring = self._clean_response(response)
+        with span("summarizer.clean_response"):
+            class_docstring = self._clean_response(response)
+        if self.auto_repair:
+            class_docstring = self.repair_docstring(class_code, class_docstring, style, kind="class")
         
         result = {
             'class_name': class_name,
@@ -252,8 +435,195 @@ Return ONLY the docstring content (without triple quotes). Start directly with t
             except Exception:
                 pass
         
+        self._cache_put(cache_key, style, dict(result, methods=dict(result['methods'])))
+        if use_dedup:
+            self.dedup_index.add(class_code, class_docstring, style)
         return result
     
+    def generate_module_summary(self, module_name: str, item_summaries: list, module_docstring: str = None) -> str:
+        """
+        Summarize a module from the one-line summaries of its items.
+
+        Args:
+            module_name: Dotted or file name of the module.
+            item_summaries: List of "name: summary" strings for the module's items.
+            module_docstring: Existing module docstring, if any.
+
+        Returns:
+            str: Short plain-text module summary.
+        """
+        existing = f"\nExisting module docstring: {module_docstring.strip()}\n" if module_docstring else ""
+        items_text = "\n".join(f"- {summary}" for summary in item_summaries) or "- (no public functions or classes)"
+
+        prompt = f"""You are an expert Python developer. Summarize the module `{module_name}` for project documentation.
+{existing}
+Its public functions and classes:
+{items_text}
+
+RULES:
+1. 2-4 plain sentences describing what the module is for and its main entry points
+2. Describe ONLY what the listed items do - do not invent features
+3. NO markdown headings, NO bullet lists, NO code
+
+Return ONLY the summary text."""
+
+        return self._clean_response(self._run_model(prompt))
+
+    def generate_package_overview(self, package_name: str, module_summaries: list, readme: bool = False) -> str:
+        """
+        Summarize a package from the summaries of its modules and sub-packages.
+
+        Args:
+            package_name: Name of the package or directory.
+            module_summaries: List of "name: summary" strings, one per module or sub-package.
+            readme: Ask for a README-style Markdown overview instead of a short paragraph.
+
+        Returns:
+            str: Package overview text.
+        """
+        modules_text = "\n".join(f"- {summary}" for summary in module_summaries)
+        if readme:
+            shape = """Write a README-style overview in Markdown:
+- One-paragraph introduction of what the project does
+- A "## Components" section with one bullet per module or sub-package
+- Keep it under 300 words"""
+        else:
+            shape = "Write 3-5 plain sentences describing what the package provides and how its parts fit together."
+
+        prompt = f"""You are an expert Python developer documenting the package `{package_name}`.
+
+Its modules and sub-packages:
+{modules_text}
+
+{shape}
+
+Describe ONLY what the summaries above state - do not invent features.
+Return ONLY the overview text."""
+
+        response = self._run_model(prompt)
+        return response.strip() if readme else self._clean_response(response)
+
+    def generate_function_docstrings_batched(self, functions: list, style: str = "google",
+                                             token_budget: int = 1500, max_item_tokens: int = 300) -> dict:
+        """
+        Generate docstrings for many small functions with as few model calls as possible.
+
+        Functions (item dicts from extract_top_level_items) are packed into one prompt
+        up to the token budget and the model replies with a JSON object keyed by name.
+        Large functions, unparseable replies and missing names fall back to single calls.
+
+        Returns:
+            dict: Function name -> docstring.
+        """
+        docstrings = {}
+        pending = []
+        duplicates = []
+        seen_shapes = set()
+        for item in functions:
+            code = self._clean_code(item["code"])
+            cached = self._cache_get(self._cache_key("function", code), style)
+            shape = self.dedup_index.key_for(code) if self.dedup_index is not None else None
+            if cached is not None:
+                docstrings[item["name"]] = cached
+            elif shape is not None and shape in seen_shapes:
+                # Resolved from the dedup index once its representative is done
+                duplicates.append(item)
+            elif estimate_tokens(code) > max_item_tokens:
+                docstrings[item["name"]] = self.generate_function_docstring(item["code"], style=style)
+            else:
+                pending.append((item["name"], code))
+            if shape is not None:
+                seen_shapes.add(shape)
+
+        while pending:
+            batch, pending = self._take_batch(pending, token_budget)
+            if len(batch) == 1:
+                name, code = batch[0]
+                docstrings[name] = self.generate_function_docstring(code, style=style)
+                continue
+
+            results = self._run_batch(batch, style)
+            self.batch_size.record(len(results) == len(batch))
+            for name, code in batch:
+                if name in results and self.auto_repair:
+                    results[name] = self.repair_docstring(code, results[name], style)
+                if name in results:
+                    docstrings[name] = results[name]
+                    self._cache_put(self._cache_key("function", code), style, results[name])
+                    if self.dedup_index is not None:
+                        self.dedup_index.add(code, results[name], style)
+                else:
+                    docstrings[name] = self.generate_function_docstring(code, style=style)
+
+        for item in duplicates:
+            docstrings[item["name"]] = self.generate_function_docstring(item["code"], style=style)
+
+        return docstrings
+
+    def _take_batch(self, pending: list, token_budget: int):
+        """Split off the next batch: unique names, within the size limit and token budget."""
+        batch, rest, names = [], [], set()
+        tokens = 0
+        for name, code in pending:
+            cost = estimate_tokens(code)
+            fits = len(batch) < self.batch_size.size and tokens + cost <= token_budget
+            if name not in names and (fits or not batch):
+                batch.append((name, code))
+                names.add(name)
+                tokens += cost
+            else:
+                rest.append((name, code))
+        return batch, rest
+
+    def _run_batch(self, batch: list, style: str) -> dict:
+        """Send one multi-function prompt and demultiplex the JSON reply."""
+        style_guide = FUNCTION_STYLE_GUIDES.get(style, FUNCTION_STYLE_GUIDES["google"])
+        names = [name for name, _ in batch]
+        blocks = "\n\n".join(f"# Function: {name}\n```python\n{code}\n```" for name, code in batch)
+
+        prompt = f"""You are an expert Python developer. Generate a clean, concise {style} docstring for EACH of these {len(batch)} functions.
+
+{blocks}
+
+Follow this format exactly for every docstring:
+{style_guide}
+
+RULES:
+1. STRICTLY describe ONLY what each function actually does - do not invent extra behavior
+2. Only document parameters that exist in the signature and exceptions that are actually raised
+3. Keep each docstring CONCISE - one sentence per section when possible
+4. NO function signatures, NO markdown headings, NO triple quotes inside the docstrings
+
+Return ONLY a JSON object mapping each function name to its docstring text, with exactly these keys:
+{json.dumps(names)}"""
+
+        try:
+            response = self._run_model(prompt)
+        except RuntimeError:
+            return {}
+        return self._parse_batch_response(response, names)
+
+    def _parse_batch_response(self, response: str, names: list) -> dict:
+        """Extract per-function docstrings from a JSON reply, keeping only expected names."""
+        start, end = response.find("{"), response.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            data = json.loads(response[start:end + 1])
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+
+        results = {}
+        for name in names:
+            value = data.get(name)
+            if isinstance(value, str) and value.strip():
+                docstring = self._clean_response(value)
+                if docstring:
+                    results[name] = docstring
+        return results
+
     def _clean_response(self, response: str) -> str:
         """Clean up the model response to extract just the docstring."""
         # Remove code block markers
@@ -0,0 +1,297 @@
+"""
+Pure-Python layout and SVG rendering of class diagrams.
+No browser, network or Graphviz: classes are placed with a layered layout
+(base classes and owners above, subclasses and parts below) and drawn as UML
+boxes. Rendered SVGs are cached by a hash of the drawn graph, in memory and
+optionally on disk (DOCUMIND_SVG_CACHE=DIR).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# hashlib, json and html are imported where used, keeping the diagram CLI's startup short
+
+
+# Bump when the layout or drawing changes, so cached SVGs are not reused
+LAYOUT_VERSION = 2
+
+SVG_CACHE_DIR = os.environ.get("DOCUMIND_SVG_CACHE") or None
+
+CHAR_WIDTH = 7.0
+LINE_HEIGHT = 16
+PADDING = 8
+H_GAP = 40
+V_GAP = 60
+MAX_ROW_WIDTH = 1600
+MIN_BOX_WIDTH = 80
+ORDER_SWEEPS = 4
+
+
+class SVGCache:
+    """Rendered SVGs keyed by graph hash: an LRU in memory, plus <key>.svg files when a directory is set."""
+
+    def __init__(self, directory: str = None, max_entries: int = 64):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        if self.directory:
+            path = os.path.join(self.directory, f"{key}.svg")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    svg = f.read()
+                self._remember(key, svg)
+                with self._lock:
+                    self.hits += 1
+                return svg
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, svg: str):
+        self._remember(key, svg)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{key}.svg")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(svg)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key: str, svg: str):
+        with self._lock:
+            self._entries[key] = svg
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+CACHE = SVGCache(SVG_CACHE_DIR)
+
+
+def graph_key(boxes: list, edges: list) -> str:
+    """Hash of everything that affects the drawing."""
+    import hashlib
+    import json
+    payload = json.dumps([LAYOUT_VERSION, boxes, edges], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _box_size(box: dict) -> tuple:
+    lines = [box["title"], box.get("subtitle") or ""] + box["attributes"] + box["methods"]
+    width = max(MIN_BOX_WIDTH, max(len(line) for line in lines) * CHAR_WIDTH + 2 * PADDING)
+    header = LINE_HEIGHT * (2 if box.get("subtitle") else 1) + PADDING
+    if box.get("stub"):
+        return width, header
+    body = LINE_HEIGHT * (len(box["attributes"]) + len(box["methods"])) + 3 * PADDING
+    return width, header + body
+
+
+def _ranks(ids: list, edges: list) -> dict:
+    """Longest-path layer of each box, after dropping edges that close a cycle."""
+    below = {box_id: [] for box_id in ids}
+    for edge in edges:
+        if edge["source"] == edge["target"]:
+            continue
+        if edge["kind"] == "inheritance":
+            upper, lower = edge["target"], edge["source"]
+        else:
+            upper, lower = edge["source"], edge["target"]
+        below[upper].append(lower)
+
+    # Iterative DFS: postorder for a topological order, skipping back edges
+    state, order = {}, []
+    for root in ids:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(below[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child not in state:
+                    state[child] = 1
+                    stack.append((child, iter(below[child])))
+                    break
+            else:
+                state[node] = 2
+                order.append(node)
+                stack.pop()
+
+    position = {node: i for i, node in enumerate(reversed(order))}
+    rank = {box_id: 0 for box_id in ids}
+    for node in reversed(order):
+        for child in below[node]:
+            if position[child] > position[node]:
+                rank[child] = max(rank[child], rank[node] + 1)
+    return rank
+
+
+def _order_layers(layers: list, edges: list) -> list:
+    """Reduce crossings with a few barycenter sweeps, up and down."""
+    neighbours = {}
+    for edge in edges:
+        neighbours.setdefault(edge["source"], []).append(edge["target"])
+        neighbours.setdefault(edge["target"], []).append(edge["source"])
+    for sweep in range(ORDER_SWEEPS):
+        indices = range(1, len(layers)) if sweep % 2 == 0 else range(len(layers) - 2, -1, -1)
+        for i in indices:
+            fixed = layers[i - 1] if sweep % 2 == 0 else layers[i + 1]
+            slot = {box_id: n for n, box_id in enumerate(fixed)}
+            current = {box_id: n for n, box_id in enumerate(layers[i])}
+
+            def barycenter(box_id):
+                placed = [slot[other] for other in neighbours.get(box_id, ()) if other in slot]
+                return sum(placed) / len(placed) if placed else current[box_id]
+
+            layers[i] = sorted(layers[i], key=barycenter)
+    return layers
+
+
+def layout(boxes: list, edges: list) -> tuple:
+    """
+    Position boxes in layers.
+
+    Returns:
+        ({box id: (x, y, width, height)}, total width, total height)
+    """
+    ids = [box["id"] for box in boxes]
+    sizes = {box["id"]: _box_size(box) for box in boxes}
+    rank = _ranks(ids, edges)
+    layers = [[] for _ in range(max(rank.values(), default=-1) + 1)]
+    for box_id in ids:
+        layers[rank[box_id]].append(box_id)
+    layers = _order_layers(layers, edges)
+
+    # Wrap very wide layers onto several rows so the image keeps a sane aspect ratio
+    rows = []
+    for layer in layers:
+        row, width = [], 0.0
+        for box_id in layer:
+            box_width = sizes[box_id][0]
+            if row and width + box_width > MAX_ROW_WIDTH:
+                rows.append(row)
+                row, width = [], 0.0
+            row.append(box_id)
+            width += box_width + H_GAP
+        if row:
+            rows.append(row)
+
+    row_widths = [sum(sizes[box_id][0] for box_id in row) + H_GAP * (len(row) - 1) for row in rows]
+    total_width = max(row_widths, default=0) + 2 * H_GAP
+    positions, y = {}, V_GAP / 2
+    for row, row_width in zip(rows, row_widths):
+        x = (total_width - row_width) / 2
+        height = max(sizes[box_id][1] for box_id in row)
+        for box_id in row:
+            width, box_height = sizes[box_id]
+            positions[box_id] = (x, y, width, box_height)
+            x += width + H_GAP
+        y += height + V_GAP
+    return positions, total_width, y - V_GAP / 2
+
+
+def _anchor(box: tuple, toward: tuple) -> tuple:
+    """Point on the border of box facing the centre of the other box."""
+    x, y, width, height = box
+    cx, cy = x + width / 2, y + height / 2
+    tx, ty = toward[0] + toward[2] / 2, toward[1] + toward[3] / 2
+    if toward[1] >= y + height or toward[1] + toward[3] <= y:
+        # The other box is on another row: leave through the top or bottom edge
+        return (cx, y + height) if ty > cy else (cx, y)
+    return (x + width, cy) if tx > cx else (x, cy)
+
+
+_DEFS = """<defs>
+<marker id="inherit" viewBox="0 0 12 12" refX="11" refY="6" markerWidth="12" markerHeight="12" orient="auto"><path d="M1,1 L11,6 L1,11 Z" fill="#fff" stroke="#333"/></marker>
+<marker id="compose" viewBox="0 0 16 10" refX="1" refY="5" markerWidth="16" markerHeight="10" orient="auto"><path d="M1,5 L8,1 L15,5 L8,9 Z" fill="#333"/></marker>
+<marker id="assoc" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="10" markerHeight="10" orient="auto"><path d="M1,1 L9,5 L1,9" fill="none" stroke="#333"/></marker>
+</defs>"""
+
+
+def draw_svg(boxes: list, edges: list) -> str:
+    """Lay out and draw boxes and edges as a standalone SVG document."""
+    from html import escape
+    if not boxes:
+        # A zero-sized image would render as nothing at all
+        return _placeholder("No classes found")
+    positions, width, height = layout(boxes, edges)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+             f'viewBox="0 0 {width:.0f} {height:.0f}" font-family="monospace" font-size="12">',
+             _DEFS, f'<rect width="{width:.0f}" height="{height:.0f}" fill="#fff"/>']
+
+    for edge in edges:
+        if edge["source"] == edge["target"]:
+            continue
+        source, target = positions[edge["source"]], positions[edge["target"]]
+        x1, y1 = _anchor(source, target)
+        x2, y2 = _anchor(target, source)
+        if edge["kind"] == "inheritance":
+            markers, dash = ' marker-end="url(#inherit)"', ""
+        elif edge["kind"] == "composition":
+            markers, dash = ' marker-start="url(#compose)" marker-end="url(#assoc)"', ""
+        else:
+            markers, dash = ' marker-end="url(#assoc)"', ' stroke-dasharray="5,3"'
+        parts.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" '
+                     f'stroke="#333"{dash}{markers}/>')
+        if edge["label"]:
+            parts.append(f'<text x="{(x1 + x2) / 2:.1f}" y="{(y1 + y2) / 2 - 3:.1f}" text-anchor="middle" '
+                         f'font-size="10" fill="#555">{escape(edge["label"])}</text>')
+        if edge["many"]:
+            parts.append(f'<text x="{x2 + 6:.1f}" y="{y2 - 6 if y2 > y1 else y2 + 14:.1f}" '
+                         f'font-size="10" fill="#555">*</text>')
+
+    for box in boxes:
+        x, y, box_width, box_height = positions[box["id"]]
+        dash = ' stroke-dasharray="4,3"' if box.get("stub") else ""
+        parts.append(f'<g><rect x="{x:.1f}" y="{y:.1f}" width="{box_width:.1f}" height="{box_height:.1f}" '
+                     f'fill="#eef0ff" stroke="#667eea"{dash}/>')
+        cx, line_y = x + box_width / 2, y + PADDING + LINE_HEIGHT - 4
+        parts.append(f'<text x="{cx:.1f}" y="{line_y:.1f}" text-anchor="middle" font-weight="bold">'
+                     f'{escape(box["title"])}</text>')
+        if box.get("subtitle"):
+            line_y += LINE_HEIGHT
+            parts.append(f'<text x="{cx:.1f}" y="{line_y:.1f}" text-anchor="middle" font-size="10" '
+                         f'fill="#555">{escape(box["subtitle"])}</text>')
+        if not box.get("stub"):
+            for section in (box["attributes"], box["methods"]):
+                line_y += PADDING
+                parts.append(f'<line x1="{x:.1f}" y1="{line_y - 4:.1f}" x2="{x + box_width:.1f}" '
+                             f'y2="{line_y - 4:.1f}" stroke="#667eea"/>')
+                for line in section:
+                    line_y += LINE_HEIGHT
+                    parts.append(f'<text x="{x + PADDING:.1f}" y="{line_y:.1f}">{escape(line)}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def _placeholder(message: str) -> str:
+    width, height = max(MIN_BOX_WIDTH, len(message) * CHAR_WIDTH) + 2 * H_GAP, LINE_HEIGHT + V_GAP
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height}" '
+            f'viewBox="0 0 {width:.0f} {height}" font-family="monospace" font-size="12">\n'
+            f'<rect width="{width:.0f}" height="{height}" fill="#fff"/>\n'
+            f'<text x="{width / 2:.1f}" y="{height / 2 + 4:.1f}" text-anchor="middle" fill="#555">{message}</text>\n'
+            f'</svg>')
+
+
+def render_svg(boxes: list, edges: list, cache: SVGCache = CACHE) -> str:
+    """SVG for boxes and edges, reusing a cached drawing of the same graph."""
+    if cache is None:
+        return draw_svg(boxes, edges)
+    key = graph_key(boxes, edges)
+    svg = cache.get(key)
+    if svg is None:
+        svg = draw_svg(boxes, edges)
+        cache.put(key, svg)
+    return svg
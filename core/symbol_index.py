@@ -0,0 +1,293 @@
+"""
+Persistent SQLite index of a project's symbols.
+Stores modules, classes, methods and functions with their signatures, existing
+docstrings and line spans, plus each module's class model for diagrams. Files are
+re-indexed only when their mtime/size and then their content hash change, so
+repeated analyses of a large repository query the index instead of reparsing.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+if not __package__:
+    # Run as a script: make the project root importable
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.cache_paths import project_cache_path
+from core.class_graph import ClassGraph, extract_module, iter_python_files, module_name
+from core.parser import extract_symbols
+
+
+DEFAULT_INDEX_FILE = ".documind_index.sqlite"
+
+# Bump when the extracted data changes shape; older indexes are rebuilt
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    module TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT,
+    error TEXT,
+    class_model TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    parent TEXT,
+    signature TEXT NOT NULL,
+    docstring TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols(file_id);
+"""
+
+_SYMBOL_COLUMNS = ("kind", "name", "qualname", "parent", "signature", "docstring", "start_line", "end_line")
+
+
+class SymbolIndex:
+    """
+    SQLite-backed symbol index, safe to share between threads.
+
+    update_project() brings the index up to date with a directory; find(),
+    symbols() and class_graph() answer queries from the index alone.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_FILE):
+        self.path = path
+        self.stats = {"scanned": 0, "reparsed": 0, "unchanged": 0, "removed": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode = WAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._db.executescript("DROP TABLE IF EXISTS symbols; DROP TABLE IF EXISTS files;")
+        self._db.executescript(_SCHEMA)
+        self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def update_file(self, path: str, root: str = None) -> bool:
+        """Re-index path if it changed since it was last indexed; returns True when it was reparsed."""
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        self.stats["scanned"] += 1
+        with self._lock:
+            row = self._db.execute("SELECT id, mtime, size, hash FROM files WHERE path = ?", (key,)).fetchone()
+        if row and row["mtime"] == stat.st_mtime and row["size"] == stat.st_size:
+            self.stats["unchanged"] += 1
+            return False
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        module = module_name(root or os.path.dirname(path), path)
+        if row and row["hash"] == digest:
+            # Touched but not edited: only the stat fields move
+            with self._lock, self._db:
+                self._db.execute("UPDATE files SET mtime = ?, size = ? WHERE id = ?",
+                                 (stat.st_mtime, stat.st_size, row["id"]))
+            self.stats["unchanged"] += 1
+            return False
+
+        symbols, class_model, error = [], None, None
+        try:
+            source_code = data.decode("utf-8")
+            symbols = extract_symbols(source_code)
+            class_model = json.dumps(extract_module(source_code, module, os.path.basename(path) == "__init__.py"))
+        except (UnicodeDecodeError, SyntaxError, ValueError) as e:
+            # Keep the file recorded so it is not retried until it changes
+            symbols, error = [], str(e)
+
+        with self._lock, self._db:
+            if row:
+                self._db.execute("DELETE FROM symbols WHERE file_id = ?", (row["id"],))
+                self._db.execute(
+                    "UPDATE files SET module = ?, mtime = ?, size = ?, hash = ?, error = ?, class_model = ?, "
+                    "indexed_at = ? WHERE id = ?",
+                    (module, stat.st_mtime, stat.st_size, digest, error, class_model, time.time(), row["id"]))
+                file_id = row["id"]
+            else:
+                file_id = self._db.execute(
+                    "INSERT INTO files (path, module, mtime, size, hash, error, class_model, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, module, stat.st_mtime, stat.st_size, digest, error, class_model, time.time())).lastrowid
+            self._db.executemany(
+                f"INSERT INTO symbols (file_id, {', '.join(_SYMBOL_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in _SYMBOL_COLUMNS)})",
+                [(file_id, *(symbol[column] for column in _SYMBOL_COLUMNS)) for symbol in symbols])
+        self.stats["reparsed"] += 1
+        return True
+
+    def remove_file(self, path: str):
+        with self._lock, self._db:
+            if self._db.execute("DELETE FROM files WHERE path = ?", (os.path.abspath(path),)).rowcount:
+                self.stats["removed"] += 1
+
+    def update_project(self, root: str) -> dict:
+        """
+        Bring the index up to date with every .py file under root.
+
+        Returns:
+            Counts for this update: scanned, reparsed, unchanged and removed files.
+        """
+        before = dict(self.stats)
+        seen = set()
+        for path in iter_python_files(root):
+            seen.add(os.path.abspath(path))
+            self.update_file(path, root)
+        prefix = os.path.join(os.path.abspath(root), "")
+        with self._lock:
+            known = [row["path"] for row in self._db.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))]
+        for path in known:
+            if path not in seen:
+                self.remove_file(path)
+        return {name: self.stats[name] - before[name] for name in self.stats}
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    def find(self, name: str, kind: str = None, limit: int = 100) -> list:
+        """
+        Symbols whose name or qualified name matches; `*` and `?` work as wildcards.
+
+        Returns:
+            List of symbol dicts with path and module added.
+        """
+        sql = ("SELECT s.*, f.path, f.module FROM symbols s JOIN files f ON f.id = s.file_id "
+               "WHERE (s.name GLOB ? OR s.qualname GLOB ?)")
+        params = [name, name]
+        if kind:
+            sql += " AND s.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY f.module, s.start_line LIMIT ?"
+        return self._query(sql, (*params, limit))
+
+    def symbols(self, path: str = None, module: str = None, undocumented: bool = False) -> list:
+        """Symbols of one file or module (default: all), in source order."""
+        sql = "SELECT s.*, f.path, f.module FROM symbols s JOIN files f ON f.id = s.file_id WHERE 1 = 1"
+        params = []
+        if path:
+            sql += " AND f.path = ?"
+            params.append(os.path.abspath(path))
+        if module:
+            sql += " AND f.module = ?"
+            params.append(module)
+        if undocumented:
+            sql += " AND s.docstring = ''"
+        return self._query(sql + " ORDER BY f.module, s.start_line", tuple(params))
+
+    def modules(self) -> list:
+        """Indexed modules with their path, symbol count and parse error (if any)."""
+        return self._query(
+            "SELECT f.module, f.path, f.error, COUNT(s.id) AS symbols FROM files f "
+            "LEFT JOIN symbols s ON s.file_id = f.id GROUP BY f.id ORDER BY f.module")
+
+    def summary(self) -> dict:
+        """Totals per symbol kind, plus how many of them have docstrings."""
+        rows = self._query("SELECT kind, COUNT(*) AS total, SUM(docstring != '') AS documented "
+                           "FROM symbols GROUP BY kind")
+        files = self._query("SELECT COUNT(*) AS files FROM files")[0]["files"]
+        return {"files": files, "kinds": {row["kind"]: {"total": row["total"], "documented": row["documented"]}
+                                          for row in rows}}
+
+    def class_graph(self, root: str = None) -> ClassGraph:
+        """Class graph of the indexed modules (under root, if given) without reparsing anything."""
+        sql, params = "SELECT path, module, mtime, size, hash, class_model FROM files WHERE class_model IS NOT NULL", ()
+        if root:
+            prefix = os.path.join(os.path.abspath(root), "")
+            sql += " AND substr(path, 1, ?) = ?"
+            params = (len(prefix), prefix)
+        graph = ClassGraph()
+        for row in self._query(sql, params):
+            graph.files[row["path"]] = dict(json.loads(row["class_model"]), hash=row["hash"],
+                                            mtime=row["mtime"], size=row["size"])
+        return graph
+
+
+def format_symbol(symbol: dict) -> str:
+    documented = "📝" if symbol["docstring"] else "  "
+    name = f"{symbol['module']}.{symbol['qualname']}"
+    return (f"{documented} {symbol['kind']:<8} {name:<48} "
+            f"{os.path.relpath(symbol['path'])}:{symbol['start_line']}-{symbol['end_line']}")
+
+
+def default_index_path(project: str) -> str:
+    """Where a project's index lives unless a path is given: outside the project, in the user's cache."""
+    return project_cache_path(project, DEFAULT_INDEX_FILE)
+
+
+def main(argv=None):
+    """Command-line entry point: update the index for a project, then answer a query."""
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        prog="python core/symbol_index.py",
+        description="Index a project's modules, classes, functions and docstrings in SQLite.",
+        epilog="Example: python core/symbol_index.py . --find 'generate_*' --kind method",
+    )
+    arg_parser.add_argument("project", help="Project directory to index")
+    arg_parser.add_argument("--db", metavar="FILE",
+                            help="Index database (default: in the user's cache directory for the project)")
+    arg_parser.add_argument("--find", metavar="NAME", help="List symbols matching NAME (* and ? wildcards)")
+    arg_parser.add_argument("--kind", choices=("function", "class", "method"), help="Only list this kind")
+    arg_parser.add_argument("--undocumented", action="store_true", help="List symbols without a docstring")
+    arg_parser.add_argument("--module", help="Only list symbols of this module")
+    args = arg_parser.parse_args(argv)
+
+    if not os.path.isdir(args.project):
+        print(f"Error: Directory '{args.project}' not found.")
+        sys.exit(1)
+    started = time.perf_counter()
+    with SymbolIndex(args.db or default_index_path(args.project)) as index:
+        changes = index.update_project(args.project)
+        print(f"🗂️  Indexed {changes['scanned']} file(s) in {time.perf_counter() - started:.2f}s: "
+              f"{changes['reparsed']} reparsed, {changes['unchanged']} unchanged, {changes['removed']} removed")
+
+        if args.find:
+            results = index.find(args.find, kind=args.kind)
+        elif args.undocumented or args.module:
+            results = [symbol for symbol in index.symbols(module=args.module, undocumented=args.undocumented)
+                       if not args.kind or symbol["kind"] == args.kind]
+        else:
+            summary = index.summary()
+            for kind, counts in sorted(summary["kinds"].items()):
+                print(f"  {kind:<8} {counts['total']:6d}  ({counts['documented']} documented)")
+            return
+        for symbol in results:
+            print(format_symbol(symbol))
+        print(f"🔎 {len(results)} symbol(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+AST-based docstring validation and targeted repair.
+Checks a generated docstring against the code it documents: parameter names,
+Returns/Raises consistency, documented attributes/methods, and leftover code lines.
+Failing sections are fixed in place: invented entries are dropped locally and only
+the missing pieces are re-asked from the model with a short follow-up prompt.
+"""
+
+import ast
+import json
+import re
+import textwrap
+
+from core.docstring_styles import detect_style, parse_docstring, render_docstring
+
+
+# Lines that look like Python rather than prose (left over after _clean_response)
+_CODE_LINE = re.compile(
+    r"^\s*(def |class |return\b|import |from \S+ import |@\w|print\(|"
+    r"(if|elif|for|while|with|try|except)\b.*:\s*$|else:\s*$|[A-Za-z_][\w.]*\s*(\+|-|\*)?=\s*\S)"
+)
+
+
+def _parse_node(code: str, node_types):
+    try:
+        tree = ast.parse(textwrap.dedent(code))
+    except SyntaxError:
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, node_types):
+            return node
+    return None
+
+
+def _own_nodes(node):
+    """Walk a function body without descending into nested functions or classes."""
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        yield child
+        if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            stack.extend(ast.iter_child_nodes(child))
+
+
+def _exception_name(node) -> str:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def function_facts(node) -> dict:
+    """Signature and behaviour facts of a function node that a docstring must agree with."""
+    args = node.args
+    params = [arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs]
+    if args.vararg:
+        params.append(args.vararg.arg)
+    if args.kwarg:
+        params.append(args.kwarg.arg)
+    params = [name for name in params if name not in ("self", "cls")]
+
+    returns_value = yields = False
+    raised = []
+    for child in _own_nodes(node):
+        if isinstance(child, ast.Return) and child.value is not None \
+                and not (isinstance(child.value, ast.Constant) and child.value.value is None):
+            returns_value = True
+        elif isinstance(child, (ast.Yield, ast.YieldFrom)):
+            yields = True
+        elif isinstance(child, ast.Raise) and child.exc is not None:
+            name = _exception_name(child.exc)
+            if name and name not in raised:
+                raised.append(name)
+    return {"name": node.name, "params": params, "returns_value": returns_value or yields, "raises": raised}
+
+
+def _problem(section: str, message: str, kind: str = None, names: list = None) -> dict:
+    return {"section": section, "message": message, "kind": kind, "names": names or []}
+
+
+def _common_problems(docstring: str) -> list:
+    problems = []
+    if not docstring or not docstring.strip():
+        return [_problem("summary", "Docstring is empty", "missing")]
+    code_lines = [line.strip() for line in docstring.split("\n") if _CODE_LINE.match(line)]
+    if code_lines:
+        problems.append(_problem("code", f"Contains code lines: {code_lines[:3]}", "extra", code_lines))
+    return problems
+
+
+def _plain(name: str) -> str:
+    return name.lstrip("*").strip()
+
+
+def validate_function_docstring(code: str, docstring: str, style: str = None) -> list:
+    """
+    Compare a function docstring with the function's AST.
+
+    Returns:
+        List of problems, each {"section", "message", "kind", "names"}; empty when the docstring
+        is consistent. Sections are "summary", "code", "params", "returns" and "raises"; kind is
+        "extra" (documented but not in the code) or "missing" (in the code but not documented).
+    """
+    problems = _common_problems(docstring)
+    node = _parse_node(code, (ast.FunctionDef, ast.AsyncFunctionDef))
+    if node is None or (problems and problems[0]["section"] == "summary"):
+        return problems
+    facts = function_facts(node)
+    parsed = parse_docstring(docstring, style)
+
+    if not parsed["summary"]:
+        problems.append(_problem("summary", "Missing one-line summary", "missing"))
+
+    documented = [_plain(param["name"]) for param in parsed["params"]]
+    unknown = [name for name in documented if name not in facts["params"]]
+    missing = [name for name in facts["params"] if name not in documented]
+    if unknown:
+        problems.append(_problem("params", f"Documents parameters not in the signature: {unknown}", "extra", unknown))
+    if missing:
+        problems.append(_problem("params", f"Parameters not documented: {missing}", "missing", missing))
+
+    if parsed["returns"] and not facts["returns_value"]:
+        problems.append(_problem("returns", "Documents a return value but the function returns nothing", "extra"))
+    elif facts["returns_value"] and not parsed["returns"]:
+        problems.append(_problem("returns", "Function returns a value but Returns is not documented", "missing"))
+
+    documented_raises = [r["type"].split(".")[-1] for r in parsed["raises"]]
+    invented = [name for name in documented_raises if name not in facts["raises"]]
+    undocumented = [name for name in facts["raises"] if name not in documented_raises]
+    if invented:
+        problems.append(_problem("raises", f"Documents exceptions that are never raised: {invented}",
+                                 "extra", invented))
+    if undocumented:
+        problems.append(_problem("raises", f"Raised exceptions not documented: {undocumented}",
+                                 "missing", undocumented))
+    return problems
+
+
+def class_facts(node) -> dict:
+    """Methods and attributes defined by a class node."""
+    methods, attributes = [], []
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            methods.append(item.name)
+            for child in ast.walk(item):
+                for target in getattr(child, "targets", [getattr(child, "target", None)]):
+                    if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) \
+                            and target.value.id == "self" and target.attr not in attributes:
+                        attributes.append(target.attr)
+        elif isinstance(item, ast.Assign):
+            attributes += [t.id for t in item.targets if isinstance(t, ast.Name) and t.id not in attributes]
+        elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+            if item.target.id not in attributes:
+                attributes.append(item.target.id)
+    return {"name": node.name, "methods": methods, "attributes": attributes}
+
+
+def validate_class_docstring(code: str, docstring: str, style: str = None) -> list:
+    """
+    Compare a class docstring with the class's AST.
+
+    Returns:
+        List of problems; sections are "summary", "code", "attributes" and "methods".
+    """
+    problems = _common_problems(docstring)
+    node = _parse_node(code, ast.ClassDef)
+    if node is None or (problems and problems[0]["section"] == "summary"):
+        return problems
+    facts = class_facts(node)
+    parsed = parse_docstring(docstring, style)
+
+    if not parsed["summary"]:
+        problems.append(_problem("summary", "Missing one-line summary", "missing"))
+    unknown_attributes = [a["name"] for a in parsed["attributes"] if _plain(a["name"]) not in facts["attributes"]]
+    if unknown_attributes:
+        problems.append(_problem("attributes", f"Documents attributes the class never sets: {unknown_attributes}",
+                                 "extra", unknown_attributes))
+    unknown_methods = [m["name"].split("(")[0] for m in parsed["methods"]
+                       if m["name"].split("(")[0] not in facts["methods"]]
+    if unknown_methods:
+        problems.append(_problem("methods", f"Documents methods that do not exist: {unknown_methods}",
+                                 "extra", unknown_methods))
+    return problems
+
+
+def _strip_code_lines(docstring: str) -> str:
+    return "\n".join(line for line in docstring.split("\n") if not _CODE_LINE.match(line))
+
+
+def _extract_json(response: str):
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _repair_prompt(code: str, wanted: dict) -> str:
+    """Follow-up prompt asking only for the listed pieces of a docstring."""
+    keys = "\n".join(f'- "{key}": {description}' for key, description in wanted.items())
+    return f"""Code:
+```python
+{textwrap.dedent(code).strip()}
+```
+
+Describe ONLY what this code actually does. Return ONLY a JSON object with exactly these keys:
+{keys}"""
+
+
+def _text(value) -> str:
+    return " ".join(str(value).split()) if isinstance(value, (str, int, float)) else ""
+
+
+def repair_function_docstring(code: str, docstring: str, ask, style: str = None) -> tuple:
+    """
+    Fix only the sections of a function docstring that fail validation.
+
+    Invented parameters, return values, exceptions and code lines are removed without
+    a model call; missing summary, parameters, Returns and Raises entries are requested
+    together in one short prompt and spliced into the parsed docstring.
+
+    Args:
+        code: Source of the function.
+        docstring: Docstring to repair (without triple quotes).
+        ask: Callable sending a prompt to the model and returning its reply.
+        style: Docstring style; detected when omitted.
+
+    Returns:
+        Tuple of (docstring, repaired section names). The original docstring is returned
+        unchanged when nothing fails or the docstring is empty (a full regeneration is needed).
+    """
+    problems = validate_function_docstring(code, docstring, style)
+    node = _parse_node(code, (ast.FunctionDef, ast.AsyncFunctionDef))
+    if not problems or node is None or not docstring.strip():
+        return docstring, []
+    style = style or detect_style(docstring)
+    facts = function_facts(node)
+    failing = {(problem["section"], problem["kind"]): problem["names"] for problem in problems}
+
+    if ("code", "extra") in failing:
+        docstring = _strip_code_lines(docstring)
+    parsed = parse_docstring(docstring, style)
+    parsed["params"] = [p for p in parsed["params"] if _plain(p["name"]) in facts["params"]]
+    if ("returns", "extra") in failing:
+        parsed["returns"] = None
+    parsed["raises"] = [r for r in parsed["raises"] if r["type"].split(".")[-1] in facts["raises"]]
+
+    wanted = {}
+    if not parsed["summary"]:
+        wanted["summary"] = "one-sentence summary of the function"
+    missing_params = failing.get(("params", "missing"), [])
+    if missing_params:
+        wanted["params"] = (f"object mapping each of {json.dumps(missing_params)} to "
+                            '{"type": "...", "description": "one sentence"}')
+    if facts["returns_value"] and not parsed["returns"]:
+        wanted["returns"] = '{"type": "...", "description": "one sentence on what is returned"}'
+    missing_raises = failing.get(("raises", "missing"), [])
+    if missing_raises:
+        wanted["raises"] = f"object mapping each of {json.dumps(missing_raises)} to when it is raised"
+
+    if wanted:
+        data = _extract_json(ask(_repair_prompt(code, wanted))) or {}
+        if "summary" in wanted and _text(data.get("summary")):
+            parsed["summary"] = _text(data["summary"])
+        params = data.get("params") if isinstance(data.get("params"), dict) else {}
+        for name in missing_params:
+            entry = params.get(name)
+            if isinstance(entry, dict) and _text(entry.get("description")):
+                parsed["params"].append({"name": name, "type": _text(entry.get("type")),
+                                         "description": _text(entry["description"])})
+            elif _text(entry):
+                parsed["params"].append({"name": name, "type": "", "description": _text(entry)})
+        order = {name: i for i, name in enumerate(facts["params"])}
+        parsed["params"].sort(key=lambda p: order.get(_plain(p["name"]), len(order)))
+        returns = data.get("returns")
+        if "returns" in wanted and isinstance(returns, dict) and _text(returns.get("description")):
+            parsed["returns"] = {"type": _text(returns.get("type")), "description": _text(returns["description"])}
+        raises = data.get("raises") if isinstance(data.get("raises"), dict) else {}
+        for name in missing_raises:
+            if _text(raises.get(name)):
+                parsed["raises"].append({"type": name, "description": _text(raises[name])})
+
+    repaired = render_docstring(parsed, style)
+    fixed = {problem["section"] for problem in validate_function_docstring(code, repaired, style)}
+    return repaired, sorted({section for section, _ in failing} - fixed)
+
+
+def repair_class_docstring(code: str, docstring: str, ask, style: str = None) -> tuple:
+    """
+    Fix only the sections of a class docstring that fail validation.
+
+    Invented attributes and methods and code lines are removed locally; a missing
+    summary is the only piece re-asked from the model.
+
+    Returns:
+        Tuple of (docstring, repaired section names).
+    """
+    problems = validate_class_docstring(code, docstring, style)
+    node = _parse_node(code, ast.ClassDef)
+    if not problems or node is None or not docstring.strip():
+        return docstring, []
+    style = style or detect_style(docstring)
+    facts = class_facts(node)
+    failing = {problem["section"] for problem in problems}
+
+    if "code" in failing:
+        docstring = _strip_code_lines(docstring)
+    parsed = parse_docstring(docstring, style)
+    parsed["attributes"] = [a for a in parsed["attributes"] if _plain(a["name"]) in facts["attributes"]]
+    parsed["methods"] = [m for m in parsed["methods"] if m["name"].split("(")[0] in facts["methods"]]
+    if not parsed["summary"]:
+        data = _extract_json(ask(_repair_prompt(code, {"summary": "one-sentence summary of the class"}))) or {}
+        parsed["summary"] = _text(data.get("summary"))
+
+    repaired = render_docstring(parsed, style)
+    fixed = {problem["section"] for problem in validate_class_docstring(code, repaired, style)}
+    return repaired, sorted(failing - fixed)
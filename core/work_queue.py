@@ -0,0 +1,176 @@
+"""
+Priority work queue for model requests.
+Interactive work runs before batch work, shortest jobs run first within a priority
+class, and waiting jobs age into better classes so nothing starves.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from core.concurrency import job_model_calls, start_job
+from core.profiling import thread_profile
+
+
+# Priority classes (lower runs first)
+INTERACTIVE = 0
+PUBLIC_API = 1
+BATCH = 2
+TESTS = 3
+
+
+def estimate_cost(text: str) -> int:
+    """Estimated prompt size in tokens, used as the job length for shortest-job-first."""
+    return max(1, len(text or "") // 4)
+
+
+def item_priority(item: dict, file_path: str = None, interactive: bool = False) -> int:
+    """Priority class for an item from extract_top_level_items."""
+    if interactive:
+        return INTERACTIVE
+    path = Path(file_path) if file_path else None
+    if path is not None and (path.name.startswith("test_") or "tests" in path.parts):
+        return TESTS
+    if item.get("name", "").startswith("test_"):
+        return TESTS
+    if item.get("name", "").startswith("_"):
+        return BATCH
+    return PUBLIC_API
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "priority", "cost", "seq", "submitted", "future")
+
+    def __init__(self, fn, args, kwargs, priority, cost, seq):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.cost = cost
+        self.seq = seq
+        self.submitted = time.perf_counter()
+        self.future = Future()
+
+
+class WorkQueue:
+    """
+    Thread-backed queue that schedules jobs by (aged priority class, estimated cost).
+
+    A job's class improves by one for every `aging_seconds` it waits, which
+    bounds how long expensive or low-priority jobs can be overtaken. With an
+    AdaptiveLimiter, `workers` is the upper bound and the limiter decides how
+    many jobs actually run at once.
+    """
+
+    def __init__(self, workers: int = 2, aging_seconds: float = 30.0, limiter=None):
+        self.aging_seconds = aging_seconds
+        self.limiter = limiter
+        self._in_flight = 0
+        self._pending = []
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._closed = False
+        self._started = None
+        self._first_result = None
+        self._latencies = {}
+        self._threads = []
+        for i in range(max(1, workers)):
+            thread = threading.Thread(target=self._worker, name=f"documind-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, *args, priority: int = BATCH, cost: int = 1, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) and return a Future for its result."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Work queue is shut down")
+            job = _Job(fn, args, kwargs, priority, cost, next(self._sequence))
+            if self._started is None:
+                self._started = job.submitted
+            self._pending.append(job)
+            self._condition.notify()
+        return job.future
+
+    def _rank(self, job: _Job, now: float) -> tuple:
+        aged_class = job.priority - int((now - job.submitted) / self.aging_seconds)
+        return (aged_class, job.cost, job.seq)
+
+    def _next_job(self):
+        """Pop the best job; a linear scan keeps aging exact without re-heapifying."""
+        now = time.perf_counter()
+        best = min(range(len(self._pending)), key=lambda i: self._rank(self._pending[i], now))
+        self._pending[best], self._pending[-1] = self._pending[-1], self._pending[best]
+        return self._pending.pop()
+
+    def _has_capacity(self) -> bool:
+        return self.limiter is None or self._in_flight < self.limiter.limit
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not (self._pending and self._has_capacity()):
+                    if self._closed and not self._pending:
+                        return
+                    self._condition.wait()
+                job = self._next_job()
+                self._in_flight += 1
+            if not job.future.set_running_or_notify_cancel():
+                self._finish(job, error=False, record=False)
+                continue
+            start_job()
+            error = False
+            try:
+                with thread_profile():
+                    result = job.fn(*job.args, **job.kwargs)
+                job.future.set_result(result)
+            except BaseException as e:
+                error = True
+                job.future.set_exception(e)
+            self._finish(job, error)
+
+    def _finish(self, job: _Job, error: bool, record: bool = True):
+        done = time.perf_counter()
+        calls, model_seconds = job_model_calls() if record else (0, 0.0)
+        if calls and self.limiter is not None:
+            # Jobs answered without the model (dedup, similarity, cache hits) say nothing about congestion
+            self.limiter.record(model_seconds / calls, job.cost, error)
+        with self._condition:
+            self._in_flight -= 1
+            if record:
+                if self._first_result is None:
+                    self._first_result = done
+                self._latencies.setdefault(job.priority, []).append(done - job.submitted)
+            # The limit may have grown, so more than one waiting worker can proceed
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """Time to first result and mean latency (seconds), overall and per priority class."""
+        with self._condition:
+            latencies = {priority: list(values) for priority, values in self._latencies.items()}
+            first = None
+            if self._first_result is not None:
+                first = self._first_result - self._started
+            pending = len(self._pending)
+            in_flight = self._in_flight
+        every = [value for values in latencies.values() for value in values]
+        return {
+            "pending": pending,
+            "in_flight": in_flight,
+            "concurrency_limit": self.limiter.limit if self.limiter is not None else len(self._threads),
+            "completed": len(every),
+            "time_to_first_result": first,
+            "mean_latency": sum(every) / len(every) if every else None,
+            "mean_latency_by_priority": {priority: sum(values) / len(values)
+                                         for priority, values in sorted(latencies.items())},
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs; workers exit once the queue drains."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
@@ -0,0 +1,39 @@
+"""
+Shared pytest fixtures.
+
+Model calls are served from tests/fixtures/docstrings.json by a ReplayBackend, so the
+suite runs without Ollama. The fixture uses the RecordingBackend format with fixed
+answers; a prompt missing from it raises RuntimeError, so a changed prompt template
+fails the tests that depend on it until their entries are updated (keys are
+core.backends.prompt_key of the model and prompt).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the project root importable without installing it
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.backends import ReplayBackend
+from core.summarizer import DocstringGenerator
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+MODEL = "fixture-model"
+
+
+@pytest.fixture
+def replay_backend():
+    """Backend answering recorded prompts instantly."""
+    return ReplayBackend(str(FIXTURES / "docstrings.json"), model=MODEL, latency=0)
+
+
+@pytest.fixture
+def make_generator(replay_backend):
+    """Factory for a DocstringGenerator on the replay backend; keyword arguments go to the generator."""
+    def make(**kwargs):
+        return DocstringGenerator(model=MODEL, backend=replay_backend, **kwargs)
+    return make
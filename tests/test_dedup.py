@@ -0,0 +1,50 @@
+"""Structural hashing and docstring adaptation for duplicate items."""
+
+from core.dedup import DedupIndex, adapt_docstring, normalize_code
+
+
+def test_renamed_copy_has_the_same_structure():
+    original = normalize_code("def add_totals(first_total, second_total):\n    return first_total + second_total\n")
+    renamed = normalize_code("def sum_prices(base_price, extra_price):\n    return base_price + extra_price\n")
+    other = normalize_code("def sub_totals(first_total, second_total):\n    return first_total - second_total\n")
+    assert original[0] == renamed[0]
+    assert original[0] != other[0]
+
+
+def test_names_are_renamed_in_entries_fields_and_quotes():
+    docstring = "Swap `a` and 'b'.\n\nArgs:\n    a: First.\n    b: Second.\n\n:param a: First.\n:type b: int"
+    adapted = adapt_docstring(docstring, ["swap", "a", "b"], ["swap", "b", "a"])
+    assert adapted == "Swap `b` and 'a'.\n\nArgs:\n    b: First.\n    a: Second.\n\n:param b: First.\n:type a: int"
+
+
+def test_distinctive_names_are_renamed_in_prose():
+    adapted = adapt_docstring("Return the total of first_total and second_total.",
+                              ["add_totals", "first_total", "second_total"],
+                              ["sum_prices", "base_price", "extra_price"])
+    assert adapted == "Return the total of base_price and extra_price."
+
+
+def test_plain_word_names_in_prose_are_not_adapted():
+    # "a" and "value" may just be English words here, so renaming them could corrupt the text
+    assert adapt_docstring("Add a and b.\n\nArgs:\n    a: First.\n    b: Second.",
+                           ["add", "a", "b"], ["add", "x", "y"]) is None
+    assert adapt_docstring("Read the value from disk.\n\nArgs:\n    value: What to read.",
+                           ["read", "value"], ["read", "item"]) is None
+
+
+def test_plain_word_names_only_in_entries_are_renamed():
+    adapted = adapt_docstring("Add two numbers.\n\nArgs:\n    a: First.\n    b: Second.",
+                              ["add", "a", "b"], ["add", "x", "y"])
+    assert adapted == "Add two numbers.\n\nArgs:\n    x: First.\n    y: Second."
+
+
+def test_differing_constants_are_substituted():
+    assert adapt_docstring("Retry 3 times.", ["f"], ["g"], [3], [5]) == "Retry 5 times."
+
+
+def test_index_lookup_counts_only_usable_hits():
+    index = DedupIndex()
+    index.add("def add(a, b):\n    return a + b\n", "Add a and b.\n\nArgs:\n    a: First.\n    b: Second.")
+    assert index.lookup("def add(x, y):\n    return x + y\n") is None
+    assert index.lookup("def add(a, b):\n    return a + b\n").startswith("Add a and b.")
+    assert index.stats()["lookups"] == 2 and index.stats()["hits"] == 1
@@ -0,0 +1,52 @@
+"""Deterministic conversion between Google, NumPy and Sphinx docstrings."""
+
+import pytest
+
+from core.docstring_styles import convert_docstring, detect_style, parse_docstring
+
+
+GOOGLE = """Scale values by a factor.
+
+Multiplies every value; the input list is left unchanged.
+
+Args:
+    values (list): Numbers to scale.
+    factor (float): Multiplier applied to each value.
+
+Returns:
+    list: The scaled numbers.
+
+Raises:
+    ValueError: If factor is zero.
+
+Example:
+    >>> scale([1, 2], 2)
+    [2, 4]
+    >>> for value in scale([1], 3):
+    ...     print(value)
+    3"""
+
+
+@pytest.mark.parametrize("style", ["numpy", "sphinx"])
+def test_google_round_trip_is_lossless(style):
+    converted = convert_docstring(GOOGLE, style)
+    assert detect_style(converted) == style
+    assert convert_docstring(converted, "google", style) == GOOGLE
+
+
+def test_conversion_keeps_the_structure():
+    google = parse_docstring(GOOGLE, "google")
+    for style in ("numpy", "sphinx"):
+        parsed = parse_docstring(convert_docstring(GOOGLE, style), style)
+        for field in ("summary", "description", "params", "returns", "raises", "extra"):
+            assert parsed[field] == google[field], (style, field)
+
+
+def test_example_keeps_its_relative_indentation():
+    numpy = convert_docstring(GOOGLE, "numpy")
+    assert "Example\n-------\n>>> scale([1, 2], 2)" in numpy
+    assert "\n...     print(value)\n" in numpy
+
+
+def test_same_style_is_returned_unchanged():
+    assert convert_docstring(GOOGLE, "google") is GOOGLE
@@ -0,0 +1,81 @@
+"""Diagram emitters writing one class graph in every output format."""
+
+import io
+import json
+
+import pytest
+
+from core.diagram_generator import graph_from_code
+from core.emitters import EMITTERS, Emitter, get_emitter, write_diagram
+
+
+SOURCE = '''
+class Shape:
+    def area(self):
+        return 0
+
+
+class Circle(Shape):
+    def __init__(self, radius: float):
+        self.radius = radius
+
+
+class Canvas:
+    def __init__(self):
+        self.shapes: list[Shape] = []
+        self.background = Circle(1.0)
+'''
+
+
+def _render(fmt: str, source: str = SOURCE) -> str:
+    stream = io.StringIO()
+    write_diagram(graph_from_code(source), get_emitter(fmt, stream))
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("fmt, expected", [
+    ("mermaid", ["classDiagram", "Shape <|-- Circle", 'Canvas --> "*" Shape : shapes',
+                 "Canvas *-- Circle : background"]),
+    ("dot", ['"Circle" -> "Shape" [arrowhead=empty]', '"Canvas" -> "Circle" [dir=back, arrowtail=diamond']),
+    ("plantuml", ["@startuml", "Shape <|-- Circle", "Canvas *-- Circle : background", "@enduml"]),
+])
+def test_text_formats_draw_every_relationship(fmt, expected):
+    output = _render(fmt)
+    for fragment in expected:
+        assert fragment in output
+
+
+def test_json_graph_lists_nodes_and_edges():
+    graph = json.loads(_render("json"))
+    assert [node["id"] for node in graph["nodes"]] == ["Shape", "Circle", "Canvas"]
+    assert {(edge["source"], edge["target"], edge["kind"]) for edge in graph["edges"]} == {
+        ("Circle", "Shape", "inheritance"), ("Canvas", "Shape", "association"), ("Canvas", "Circle", "composition")}
+
+
+def test_svg_draws_every_class():
+    output = _render("svg")
+    assert output.startswith("<svg")
+    for name in ("Shape", "Circle", "Canvas"):
+        assert f">{name}<" in output
+
+
+@pytest.mark.parametrize("fmt", list(EMITTERS))
+def test_empty_graph_still_produces_a_valid_diagram(fmt):
+    output = _render(fmt, "VALUE = 1\n")
+    assert output.strip()
+    if fmt == "json":
+        assert json.loads(output)["nodes"] == []
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        get_emitter("gif", io.StringIO())
+
+
+def test_emitters_must_implement_the_drawing_methods():
+    class Incomplete(Emitter):
+        def class_(self, cls, class_id):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete(io.StringIO())
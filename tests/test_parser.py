@@ -0,0 +1,76 @@
+"""Top-level item extraction: the streaming extractor must match the whole-file one."""
+
+from pathlib import Path
+
+import pytest
+
+from core.parser import extract_top_level_items, iter_top_level_items
+
+
+ROOT = Path(__file__).parent.parent
+
+TRICKY = '''"""Module docstring."""
+import os
+
+
+@property
+def decorated(
+    first,
+    second,
+):
+    """Spans several lines."""
+    text = """
+def not_a_function():
+    pass
+"""
+    return first + second
+
+
+async def fetch(url):
+    return url
+
+
+class Outer(object):
+    class Inner:
+        def method(self):
+            return {
+                "key": 1,
+            }
+
+
+if os.name:
+    def conditional():
+        pass
+
+value = [
+    1,
+]
+
+
+def last(): return 1
+'''
+
+
+def _summary(items) -> list:
+    return [(item["type"], item["name"], item["code"]) for item in items]
+
+
+def test_tricky_source_matches_the_ast_extractor(tmp_path):
+    path = tmp_path / "tricky.py"
+    path.write_text(TRICKY, encoding="utf-8")
+    streamed = _summary(iter_top_level_items(str(path)))
+    assert streamed == _summary(extract_top_level_items(str(path)))
+    # As in extract_top_level_items, async functions and nested definitions are not items
+    assert [name for _, name, _ in streamed] == ["decorated", "Outer", "last"]
+
+
+@pytest.mark.parametrize("path", sorted(ROOT.glob("core/*.py")), ids=lambda path: path.name)
+def test_project_modules_match_the_ast_extractor(path):
+    assert _summary(iter_top_level_items(str(path))) == _summary(extract_top_level_items(str(path)))
+
+
+def test_items_are_yielded_before_the_file_is_read_to_the_end(tmp_path):
+    path = tmp_path / "broken_tail.py"
+    path.write_text("def first():\n    return 1\n\n\ndef second(:\n", encoding="utf-8")
+    stream = iter_top_level_items(str(path))
+    assert next(stream)["name"] == "first"
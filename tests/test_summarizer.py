@@ -0,0 +1,143 @@
+"""DocstringGenerator against recorded model responses: model, cache, dedup, similarity and repair paths."""
+
+from core.callgraph import generate_in_dependency_order
+from core.dedup import DedupIndex
+from core.docstring_styles import parse_docstring
+from core.parser import extract_top_level_items
+from core.similarity import SimilarityIndex
+from core.validation import validate_function_docstring
+
+
+ADD_TOTALS = '''def add_totals(first_total, second_total):
+    return first_total + second_total
+'''
+
+SUM_PRICES = '''def sum_prices(base_price, extra_price):
+    return base_price + extra_price
+'''
+
+STACK = '''class Stack:
+    def __init__(self):
+        self.items = []
+
+    def push(self, item):
+        self.items.append(item)
+'''
+
+SCALE = '''def scale(values, factor):
+    if factor == 0:
+        raise ValueError("factor must be non-zero")
+    return [value * factor for value in values]
+'''
+
+DOCUMENTED_MODULE = '''def count_words(text_block):
+    """
+    Count the words in a block of text.
+
+    Args:
+        text_block (str): Text to split on whitespace.
+
+    Returns:
+        int: Number of words.
+    """
+    return len(text_block.split())
+'''
+
+CALLERS_MODULE = '''def clean_name(raw_name):
+    return raw_name.strip().lower()
+
+
+def load_names(name_lines):
+    return [clean_name(line) for line in name_lines]
+
+
+def load_tags(tag_lines):
+    return [clean_name(line) for line in tag_lines]
+'''
+
+
+def test_function_docstring_comes_from_the_model(make_generator, replay_backend):
+    generator = make_generator()
+    docstring = generator.generate_function_docstring(ADD_TOTALS)
+    assert docstring.startswith("Add two running totals.")
+    assert not validate_function_docstring(ADD_TOTALS, docstring)
+    assert replay_backend.hits == 1
+
+
+def test_class_docstring_comes_from_the_model(make_generator):
+    result = make_generator().generate_class_docstring(STACK)
+    assert result["class_name"] == "Stack"
+    assert result["class_docstring"].startswith("A last-in, first-out stack")
+
+
+def test_cached_docstring_is_converted_to_another_style(make_generator, replay_backend):
+    generator = make_generator()
+    google = generator.generate_function_docstring(ADD_TOTALS, style="google")
+    numpy = generator.generate_function_docstring(ADD_TOTALS, style="numpy")
+    assert replay_backend.hits == 1
+    assert "Parameters\n----------" in numpy
+    assert parse_docstring(numpy, "numpy")["params"] == parse_docstring(google, "google")["params"]
+
+
+def test_structural_duplicate_reuses_the_adapted_docstring(make_generator, replay_backend):
+    generator = make_generator(dedup_index=DedupIndex())
+    generator.generate_function_docstring(ADD_TOTALS)
+    docstring = generator.generate_function_docstring(SUM_PRICES)
+    assert replay_backend.hits == 1
+    assert generator.dedup_index.stats()["hits"] == 1
+    assert [param["name"] for param in parse_docstring(docstring)["params"]] == ["base_price", "extra_price"]
+    assert not validate_function_docstring(SUM_PRICES, docstring)
+
+
+def test_callers_with_callee_context_still_use_dedup(make_generator, replay_backend, tmp_path):
+    source = tmp_path / "names.py"
+    source.write_text(CALLERS_MODULE, encoding="utf-8")
+    items = extract_top_level_items(str(source))
+    generator = make_generator(dedup_index=DedupIndex())
+
+    results = generate_in_dependency_order(generator, items, max_workers=1)
+
+    assert not [result for result in results if isinstance(result, Exception)]
+    # clean_name and the first loader call the model; the second loader is a duplicate
+    assert replay_backend.hits == 2
+    assert generator.dedup_index.stats()["hits"] == 1
+    assert "name_lines" in results[1] and "tag_lines" in results[2]
+
+
+def test_similar_function_with_the_same_structure_reuses_the_draft(make_generator, replay_backend):
+    index = SimilarityIndex()
+    index.add_source(DOCUMENTED_MODULE)
+    generator = make_generator(similarity_index=index, reuse_threshold=0.3)
+
+    docstring = generator.generate_function_docstring(
+        "def count_tokens(token_block):\n    return len(token_block.split())\n")
+
+    assert replay_backend.hits == 0
+    assert generator.similarity_stats == {"reused": 1, "examples": 0}
+    assert "token_block (str)" in docstring and "text_block" not in docstring
+
+
+def test_similar_function_with_other_structure_is_only_an_example(make_generator, replay_backend):
+    index = SimilarityIndex()
+    index.add_source(DOCUMENTED_MODULE)
+    generator = make_generator(similarity_index=index, reuse_threshold=0.3, example_threshold=0.1)
+
+    docstring = generator.generate_function_docstring(
+        "def count_lines(text_block):\n    lines = text_block.splitlines()\n    return len(lines)\n")
+
+    assert replay_backend.hits == 1
+    assert generator.similarity_stats == {"reused": 0, "examples": 1}
+    assert docstring.startswith("Count the lines")
+
+
+def test_auto_repair_fixes_only_the_failing_sections(make_generator, replay_backend):
+    generator = make_generator(auto_repair=True)
+    docstring = generator.generate_function_docstring(SCALE)
+
+    # One call for the docstring, one short follow-up for the missing pieces
+    assert replay_backend.hits == 2
+    assert not validate_function_docstring(SCALE, docstring)
+    parsed = parse_docstring(docstring)
+    assert [param["name"] for param in parsed["params"]] == ["values", "factor"]
+    assert parsed["raises"][0]["type"] == "ValueError"
+    assert generator.repair_stats["repaired"] == 1
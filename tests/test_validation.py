@@ -0,0 +1,64 @@
+"""AST-based docstring validation and section-level repair."""
+
+import json
+
+from core.validation import repair_function_docstring, validate_class_docstring, validate_function_docstring
+
+
+SCALE = '''def scale(values, factor):
+    if factor == 0:
+        raise ValueError("factor must be non-zero")
+    return [value * factor for value in values]
+'''
+
+
+def _problems(docstring: str) -> set:
+    return {(problem["section"], problem["kind"]) for problem in validate_function_docstring(SCALE, docstring)}
+
+
+def test_consistent_docstring_has_no_problems():
+    docstring = ("Scale values.\n\nArgs:\n    values: Numbers.\n    factor: Multiplier.\n\n"
+                 "Returns:\n    list: Scaled numbers.\n\nRaises:\n    ValueError: If factor is zero.")
+    assert validate_function_docstring(SCALE, docstring) == []
+
+
+def test_invented_and_missing_sections_are_reported():
+    docstring = "Scale values.\n\nArgs:\n    values: Numbers.\n    cutoff: Limit.\n\nRaises:\n    KeyError: Never."
+    assert _problems(docstring) == {("params", "extra"), ("params", "missing"), ("returns", "missing"),
+                                    ("raises", "extra"), ("raises", "missing")}
+
+
+def test_empty_docstring_is_a_missing_summary():
+    assert _problems("") == {("summary", "missing")}
+
+
+def test_class_docstring_must_not_invent_attributes():
+    code = "class Box:\n    def __init__(self):\n        self.size = 1\n"
+    problems = validate_class_docstring(code, "A box.\n\nAttributes:\n    weight (int): Never set.")
+    assert problems and problems[0]["names"] == ["weight"]
+
+
+def test_repair_drops_invented_parts_and_asks_only_for_missing_ones():
+    prompts = []
+
+    def ask(prompt):
+        prompts.append(prompt)
+        return json.dumps({"params": {"factor": {"type": "float", "description": "Multiplier."}},
+                           "raises": {"ValueError": "If factor is zero."}})
+
+    docstring = "Scale values.\n\nArgs:\n    values (list): Numbers.\n    cutoff: Limit.\n\nReturns:\n    list: Scaled."
+    repaired, sections = repair_function_docstring(SCALE, docstring, ask)
+
+    assert len(prompts) == 1 and '"params"' in prompts[0] and '"summary"' not in prompts[0]
+    assert validate_function_docstring(SCALE, repaired) == []
+    assert "cutoff" not in repaired
+    assert sections == ["params", "raises"]
+
+
+def test_repair_leaves_a_valid_docstring_alone():
+    def ask(prompt):
+        raise AssertionError("no model call expected")
+
+    docstring = ("Scale values.\n\nArgs:\n    values: Numbers.\n    factor: Multiplier.\n\n"
+                 "Returns:\n    list: Scaled numbers.\n\nRaises:\n    ValueError: If factor is zero.")
+    assert repair_function_docstring(SCALE, docstring, ask) == (docstring, [])
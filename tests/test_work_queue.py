@@ -0,0 +1,60 @@
+"""WorkQueue scheduling: priority classes, shortest job first and aging."""
+
+import threading
+import time
+
+from core.work_queue import BATCH, INTERACTIVE, PUBLIC_API, TESTS, WorkQueue, item_priority
+
+
+def _blocked_queue(**kwargs):
+    """A one-worker queue whose worker is busy until the returned event is set."""
+    queue = WorkQueue(workers=1, **kwargs)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    queue.submit(block, priority=INTERACTIVE)
+    assert started.wait(5)
+    return queue, release
+
+
+def test_jobs_run_by_priority_class_then_cost():
+    queue, release = _blocked_queue()
+    order = []
+    jobs = [("tests", TESTS, 1), ("batch", BATCH, 1), ("big api", PUBLIC_API, 500),
+            ("small api", PUBLIC_API, 5), ("interactive", INTERACTIVE, 1000)]
+    futures = [queue.submit(order.append, name, priority=priority, cost=cost) for name, priority, cost in jobs]
+    release.set()
+    for future in futures:
+        future.result(5)
+    queue.shutdown()
+    assert order == ["interactive", "small api", "big api", "batch", "tests"]
+
+
+def test_waiting_jobs_age_into_a_better_class():
+    queue, release = _blocked_queue(aging_seconds=0.05)
+    order = []
+    old = queue.submit(order.append, "old test job", priority=TESTS)
+    time.sleep(0.3)
+    new = queue.submit(order.append, "new interactive job", priority=INTERACTIVE)
+    release.set()
+    old.result(5), new.result(5)
+    queue.shutdown()
+    assert order == ["old test job", "new interactive job"]
+
+
+def test_failures_reach_the_future():
+    queue = WorkQueue(workers=1)
+    future = queue.submit(lambda: 1 / 0)
+    assert isinstance(future.exception(5), ZeroDivisionError)
+    queue.shutdown()
+    assert queue.stats()["completed"] == 1
+
+
+def test_item_priority_ranks_tests_and_private_items_last():
+    assert item_priority({"name": "parse"}, "pkg/module.py") == PUBLIC_API
+    assert item_priority({"name": "_helper"}, "pkg/module.py") == BATCH
+    assert item_priority({"name": "parse"}, "tests/test_module.py") == TESTS
+    assert item_priority({"name": "parse"}, "pkg/module.py", interactive=True) == INTERACTIVE